@@ -1,11 +1,12 @@
 """主控制器 — 应用的核心编排层，负责所有业务逻辑，连接 View 和 Model"""
 
 import logging
-from PySide6.QtCore import QObject
+from PySide6.QtCore import QObject, QTimer
 
 from models.data_manager import DataManager
 from models.course_stats import CourseCardData, DashboardData
 from services.theme_service import ThemeService
+from services.clock_service import ClockService
 from services.player.player_service import VLC_AVAILABLE, VLCPlayerProxy, QtPlayerProxy
 from services.scanner import VideoScanner
 from utils.paths import PathManager
@@ -17,12 +18,20 @@ logger = setup_logger("MainController", PathManager.LOG_DIR)
 class MainController(QObject):
     """主控制器 — 持有所有 Service/Model 引用，View 通过 Controller 获取数据和执行操作"""
 
-    def __init__(self, data_manager: DataManager, theme_service: ThemeService):
+    def __init__(self, data_manager: DataManager, theme_service: ThemeService,
+                 clock_service: ClockService = None):
         super().__init__()
         self.data_manager = data_manager
         self.theme_service = theme_service
+        self.clock_service = clock_service
         self._view = None
 
+        # 播放暂停后不再有进度上报，定时兜底把进度日志压缩进快照
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(int(data_manager.save_interval * 1000) or 1000)
+        self._flush_timer.timeout.connect(lambda: self.data_manager.flush(wait=False))
+        self._flush_timer.start()
+
         logger.info("MainController 初始化完成")
 
     # ==================== View 绑定 ====================
@@ -38,11 +47,21 @@ class MainController(QObject):
         view.home_view.course_selected.connect(self._on_course_selected)
         view.detail_view.back_requested.connect(self._on_go_home)
         view.detail_view.progress_updated.connect(self._on_progress_update)
+        if self.clock_service:
+            self.clock_service.date_changed.connect(self._on_date_changed)
+
+    def _on_date_changed(self, today):
+        """跨过午夜 → 按日期缓存的统计失效，刷新首页（今日学习、余额、连续天数）"""
+        logger.info(f"日期变更: {today}")
+        self.data_manager.on_date_changed()
+        if self._view:
+            self._view.home_view.refresh_list()
 
     # ==================== 导航 ====================
 
     def _on_course_selected(self, course_id: str):
-        """用户选择了某门课程 → 进入详情页"""
+        """用户选择了某门课程 → 进入详情页（首次打开时加载该课程的视频列表）"""
+        self.data_manager.flush(wait=False)
         course = self.data_manager.get_course_by_id(course_id)
         if course and self._view:
             self._view.detail_view.load_course(course)
@@ -52,6 +71,7 @@ class MainController(QObject):
         """返回首页"""
         if self._view and hasattr(self._view.detail_view, 'player') and self._view.detail_view.player:
             self._view.detail_view.player.stop()
+        self.data_manager.flush(wait=False)
         if self._view:
             self._view.home_view.refresh_list()
             self._view.stack.setCurrentIndex(0)
@@ -64,27 +84,33 @@ class MainController(QObject):
     # ==================== 课程管理 ====================
 
     def add_course(self, folder_path: str,
-                    progress_callback=None) -> dict | None:
+                    progress_callback=None, cancel=None) -> dict | None:
         """
         扫描并添加课程。
 
         Args:
             folder_path: 课程文件夹路径
             progress_callback: 扫描进度回调 (current, total)
+            cancel: 扫描的取消标志（CancelToken）
 
         Returns:
-            新课程数据，或 None（无视频/重复）
+            新课程数据，或 None（无视频/重复/已取消）
         """
         import os
 
         # 去重检查
-        for course in self.data_manager.get_courses():
-            if course['path'] == folder_path:
-                logger.warning(f"课程已存在: {folder_path}")
-                return None
+        if self.data_manager.find_course_by_path(folder_path):
+            logger.warning(f"课程已存在: {folder_path}")
+            return None
 
         # 扫描
-        videos, stats = VideoScanner.scan_directory(folder_path, progress_callback)
+        videos, stats = VideoScanner.scan_directory(
+            folder_path, progress_callback, workers=self.data_manager.get_setting("scan_workers"),
+            cancel=cancel)
+
+        if cancel is not None and cancel.cancelled:
+            logger.info(f"扫描已取消，未添加课程: {folder_path}")
+            return None
 
         if stats['total_videos'] == 0:
             logger.warning(f"未找到视频文件: {folder_path}")
@@ -94,6 +120,45 @@ class MainController(QObject):
         course = self.data_manager.add_course(name, folder_path, videos, stats)
         return course
 
+    def resync_course(self, course_id: str, progress_callback=None, cancel=None) -> dict | None:
+        """
+        重新扫描课程文件夹，同步新增/移除/时长变化的视频，保留已有进度。
+
+        课程中保存了每个视频扫描时的大小与修改时间：两者都未变化的文件只需 stat，沿用已保存的时长，
+        与是否启用探测缓存无关；只有新增或变化的文件才读取时长（仍先查探测缓存）。
+
+        Args:
+            course_id: 课程 ID
+            progress_callback: 扫描进度回调 (current, total)
+            cancel: 扫描的取消标志（CancelToken），取消后不修改课程
+
+        Returns:
+            {"added", "removed", "updated"}，或 None（课程不存在/文件夹不可访问/未找到视频/已取消）
+        """
+        course = self.data_manager.get_course_by_id(course_id)
+        if not course:
+            return None
+
+        videos, stats = VideoScanner.scan_directory(
+            course["path"], progress_callback, workers=self.data_manager.get_setting("scan_workers"),
+            cancel=cancel, known=self.data_manager.get_video_file_keys(course_id))
+
+        # 部分结果会把未扫描到的视频当作已移除
+        if cancel is not None and cancel.cancelled:
+            logger.info(f"扫描已取消，跳过同步: {course['path']}")
+            return None
+
+        # 文件夹被移走或所在磁盘未挂载时不清空课程
+        if stats["total_videos"] == 0:
+            logger.warning(f"未找到视频文件，跳过同步: {course['path']}")
+            return None
+
+        return self.data_manager.resync_course(course_id, videos)
+
+    def update_video_durations(self, course_id: str, durations: list):
+        """补全流式扫描逐批读取到的视频时长 [(下标, 时长)]"""
+        self.data_manager.update_video_durations(course_id, durations)
+
     def delete_course(self, course_id: str):
         """删除课程"""
         self.data_manager.delete_course(course_id)
@@ -104,10 +169,7 @@ class MainController(QObject):
 
     def is_course_exists(self, folder_path: str) -> bool:
         """检查路径是否已添加"""
-        for course in self.data_manager.get_courses():
-            if course['path'] == folder_path:
-                return True
-        return False
+        return self.data_manager.find_course_by_path(folder_path) is not None
 
     # ==================== 首页数据 ====================
 
@@ -119,6 +181,34 @@ class MainController(QObject):
         """获取所有课程的原始数据"""
         return self.data_manager.get_courses()
 
+    def get_video_summary(self, course_id: str):
+        """获取课程的视频聚合值（完成数、已看时长等），不加载视频列表"""
+        return self.data_manager.get_video_summary(course_id)
+
+    def get_longest_streak(self) -> int:
+        """获取历史最长连续学习天数"""
+        return self.data_manager.get_longest_streak()
+
+    def today(self):
+        """今天的日期（与 DataManager 共用同一时钟）"""
+        return self.data_manager.clock.today()
+
+    def get_global_daily_index(self):
+        """获取全部课程逐日合计的学习索引（热力图、今日学习时长）"""
+        return self.data_manager.get_global_daily_index()
+
+    def get_global_daily_totals(self, start, end):
+        """获取全部课程在日期窗口内逐日的学习秒数合计（首页热力图）"""
+        return self.data_manager.get_global_daily_totals(start, end)
+
+    def get_plan_inputs(self, course_id: str):
+        """获取计划预览的课程侧输入（PlanInputs），供编辑弹窗逐刻度估算"""
+        return self.data_manager.get_plan_inputs(course_id)
+
+    def study_time(self, course_ids=None, granularity: str = "week", start=None, end=None):
+        """获取按日 / 周 / 月分桶的学习时长报表（[StudyBucket]）"""
+        return self.data_manager.study_time(course_ids, granularity, start, end)
+
     # ==================== 课程看板数据 ====================
 
     def get_dashboard_data(self, course_id: str) -> DashboardData:
@@ -148,6 +238,14 @@ class MainController(QObject):
         """VLC 是否可用"""
         return VLC_AVAILABLE
 
+    # ==================== 生命周期 ====================
+
+    def shutdown(self):
+        """应用退出前写回所有延迟保存的数据"""
+        self._flush_timer.stop()
+        self.data_manager.close()
+        logger.info("数据已写回，MainController 已关闭")
+
     # ==================== 主题 ====================
 
     def toggle_theme(self):
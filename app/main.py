@@ -1,6 +1,7 @@
 """CourseFlow 入口 — 依赖注入容器，组装并启动应用"""
 
 import sys
+import multiprocessing
 
 from utils.env import setup_qt_env
 from utils.paths import PathManager
@@ -9,11 +10,15 @@ from utils.fonts import load_fonts, apply_global_font
 
 from models.data_manager import DataManager
 from services.theme_service import ThemeService
+from services.clock_service import ClockService
+from services.probe_cache import ProbeCache
+from services.scanner import VideoScanner
 from controllers.main_controller import MainController
 
 
 def main():
     # ---- 1. 环境准备 ----
+    multiprocessing.freeze_support()  # 打包后扫描器的进程池需要
     setup_qt_env()
     PathManager.ensure_dirs()
 
@@ -35,12 +40,17 @@ def main():
     # ---- 4. 依赖注入 ----
     theme_service = ThemeService(initial_theme="dark")
     data_manager = DataManager()
-    controller = MainController(data_manager, theme_service)
+    probe_cache = ProbeCache(PathManager.PROBE_CACHE_DB)
+    VideoScanner.probe_cache = probe_cache
+    clock_service = ClockService(data_manager.clock)
+    controller = MainController(data_manager, theme_service, clock_service)
 
     # ---- 5. 创建主窗口 ----
     from views.main_window import MainWindow
     window = MainWindow(controller)
     controller.set_view(window)
+    app.aboutToQuit.connect(controller.shutdown)
+    app.aboutToQuit.connect(probe_cache.close)
 
     # ---- 6. 启动 ----
     window.show()
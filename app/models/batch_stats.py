@@ -0,0 +1,117 @@
+"""批量统计 — 用 NumPy 一次计算整个课程库的卡片数据（可选依赖）
+
+逐门课程计算卡片数据时，每门课程都要经过若干次 Python 函数调用。课程数上千时，
+把各课程的聚合值和周计划打包成数组，按列做向量运算更快。
+未安装 NumPy 时 NUMPY_AVAILABLE 为 False，由 DataManager 回退到逐门课程计算。
+
+运算口径与 DataManager 的逐门课程计算（含 models/plan_calendar.py）逐项一致，
+浮点运算的顺序也相同，结果完全相等。
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+from models.plan_preview import MAX_FINISH_DAYS
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+@dataclass
+class CourseColumns:
+    """整个课程库按列打包的输入（每个字段为长度 n 的序列，weekly_schedule 为 n×7）"""
+
+    total_duration: list
+    watched_sec: list
+    remaining_sec: list
+    studied_sec: list      # daily_stats 合计
+    studied_days: list     # daily_stats 记录天数
+    start_ordinal: list    # 开始日期序号，无开始日期为 -1
+    weekly_schedule: list
+
+
+@dataclass
+class BatchResult:
+    """批量计算结果（NumPy 数组）"""
+
+    progress_percent: object  # 未取整
+    balance_minutes: object
+    remaining_days: object
+    finish_offset: object     # 距今天数；-1 表示超过推算上限或无计划，-2 表示已完成
+
+
+def compute(columns: CourseColumns, today: date) -> BatchResult:
+    """按列计算进度、余额、剩余天数和预计完成日期偏移"""
+    total = np.asarray(columns.total_duration, dtype=float)
+    watched = np.asarray(columns.watched_sec, dtype=float)
+    remaining = np.asarray(columns.remaining_sec, dtype=float)
+    studied = np.asarray(columns.studied_sec, dtype=float)
+    days = np.asarray(columns.studied_days, dtype=np.int64)
+    start = np.asarray(columns.start_ordinal, dtype=np.int64)
+    schedule = np.asarray(columns.weekly_schedule, dtype=float).reshape(-1, 7)
+    n = len(total)
+    rows = np.arange(n)
+    # 周合计按周一到周日顺序逐项累加，与 sum(schedule) 一致
+    weekly_hours = np.cumsum(schedule, axis=1)[:, 6] if n else np.zeros(0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        progress = np.where(total > 0, watched / total * 100, 0.0)
+
+        # ---- 学习余额 ----
+        today_ordinal = today.toordinal()
+        span = today_ordinal - start + 1
+        has_plan = (start >= 0) & (span > 0) & ~(weekly_hours < 0.1)
+        start_weekday = (start - 1) % 7  # date.fromordinal(k).weekday() == (k - 1) % 7
+        prefix = _prefix_sums(schedule, start_weekday)
+        weeks, rest = np.divmod(np.maximum(span, 0), 7)
+        plan_hours = weeks * prefix[:, 7] + prefix[rows, rest]
+        balance = np.where(has_plan, (studied / 3600.0 - plan_hours) * 60.0, 0.0)
+
+        # ---- 剩余天数 ----
+        avg_history = np.where(days > 0, studied / np.maximum(days, 1), 0.0)
+        avg_plan = weekly_hours / 7.0 * 3600.0
+        avg_daily = np.where(avg_history > 60, avg_history,
+                             np.where(weekly_hours > 0.1, avg_plan, 3600.0))
+        remaining_days = np.where(
+            remaining > 0, np.maximum(1, np.floor(remaining / avg_daily + 0.5)), 0).astype(np.int64)
+
+        # ---- 预计完成日期 ----
+        offset = _finish_offsets(schedule, today.weekday(), remaining / 3600.0, weekly_hours)
+
+    return BatchResult(progress_percent=progress, balance_minutes=balance,
+                       remaining_days=remaining_days, finish_offset=offset)
+
+
+def _prefix_sums(schedule, first_weekday):
+    """每行从各自的起始星期开始连续 r 天的计划累计，返回 n×8 数组（同 weekday_prefix_sums）"""
+    n = len(schedule)
+    order = (np.asarray(first_weekday).reshape(-1, 1) + np.arange(7)) % 7
+    rolled = np.take_along_axis(schedule, np.broadcast_to(order, (n, 7)), axis=1)
+    return np.concatenate([np.zeros((n, 1)), np.cumsum(rolled, axis=1)], axis=1)
+
+
+def _finish_offsets(schedule, today_weekday: int, needed, weekly_hours):
+    """向量化的 plan_calendar.finish_offset；-2 表示已完成，-1 表示无计划或超过推算上限"""
+    n = len(needed)
+    prefix = _prefix_sums(schedule, today_weekday)
+    weekly = prefix[:, 7]
+    peak = prefix[:, 1:].max(axis=1) if n else np.zeros(0)
+    active = (needed > 0) & ~(weekly_hours < 0.01)
+    safe_weekly = np.where(active, weekly, 1.0)
+    weeks = np.maximum(0, np.ceil((needed - peak) / safe_weekly))
+    weeks = np.where(~active, 0, weeks)
+    # ceil 的估计可能因浮点误差偏差一周，两个方向各校正一次
+    back = active & (weeks > 0) & ((weeks - 1) * safe_weekly + peak >= needed)
+    weeks = np.where(back, weeks - 1, weeks)
+    ahead = active & (weeks * safe_weekly + peak < needed)
+    weeks = np.where(ahead, weeks + 1, weeks)
+    reached = weeks[:, None] * safe_weekly[:, None] + prefix[:, 1:] >= needed[:, None]
+    rest = reached.argmax(axis=1) + 1 if n else np.zeros(0, dtype=np.int64)
+    offset = (weeks * 7 + rest - 1).astype(np.int64)
+    offset = np.where(offset + 1 < MAX_FINISH_DAYS, offset, -1)
+    offset = np.where(active, offset, -1)
+    return np.where(needed <= 0, -2, offset)
@@ -1,6 +1,7 @@
 """课程统计数据容器 — 统一 View 层所需的所有计算字段"""
 
-from dataclasses import dataclass, field
+import math
+from dataclasses import dataclass, field, asdict
 from datetime import date
 
 
@@ -92,6 +93,9 @@ class CourseCardData:
     # 预计剩余天数
     remaining_days: int = 0
 
+    # 预计完成日期
+    estimated_finish_date: str = "--"
+
 
 @dataclass
 class DashboardData:
@@ -121,3 +125,81 @@ class DashboardData:
 
     # 每日统计（用于热力图）
     daily_stats: dict = field(default_factory=dict)
+
+
+@dataclass
+class VideoSummary:
+    """一门课程视频列表的聚合值（随清单保存，首页无需加载完整视频列表）"""
+
+    video_count: int = 0
+    completed_videos: int = 0
+    watched_sec: float = 0.0
+    remaining_sec: float = 0.0
+
+    @classmethod
+    def from_videos(cls, videos: list) -> "VideoSummary":
+        """由完整视频列表计算"""
+        summary = cls(video_count=len(videos))
+        for v in videos:
+            summary.watched_sec += v.get("watched_duration", 0)
+            if v.get("completed", False):
+                summary.completed_videos += 1
+            else:
+                summary.remaining_sec += max(0, v.get("duration", 0) - v.get("watched_duration", 0))
+        return summary
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoSummary":
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class CourseAggregates:
+    """一门课程视频的运行聚合值，由 DataManager 在每次变更时按差值维护，统计读取为 O(1)"""
+
+    video_count: int = 0
+    completed_videos: int = 0
+    watched_sec: float = 0.0
+    remaining_sec: float = 0.0
+
+    @classmethod
+    def from_summary(cls, summary: VideoSummary) -> "CourseAggregates":
+        return cls(video_count=summary.video_count,
+                   completed_videos=summary.completed_videos,
+                   watched_sec=summary.watched_sec,
+                   remaining_sec=summary.remaining_sec)
+
+    def apply_video_change(self, duration: float, old_watched: float, old_completed: bool,
+                           new_watched: float, new_completed: bool):
+        """按单个视频进度变更前后的差值更新"""
+        self.watched_sec += new_watched - old_watched
+        self.completed_videos += int(new_completed) - int(old_completed)
+        self.remaining_sec += (_remaining(duration, new_watched, new_completed)
+                               - _remaining(duration, old_watched, old_completed))
+
+    def apply_duration_change(self, old_duration: float, new_duration: float,
+                              watched: float, completed: bool):
+        """按单个视频时长变更前后的差值更新（流式扫描逐批补全时长）"""
+        self.remaining_sec += (_remaining(new_duration, watched, completed)
+                               - _remaining(old_duration, watched, completed))
+
+    def video_summary(self) -> VideoSummary:
+        return VideoSummary(video_count=self.video_count,
+                            completed_videos=self.completed_videos,
+                            watched_sec=self.watched_sec,
+                            remaining_sec=self.remaining_sec)
+
+    def matches(self, other: "CourseAggregates") -> bool:
+        """与另一组聚合值一致（秒数允许浮点累加误差）"""
+        return (self.video_count == other.video_count
+                and self.completed_videos == other.completed_videos
+                and all(math.isclose(getattr(self, k), getattr(other, k), rel_tol=1e-9, abs_tol=1e-6)
+                        for k in ("watched_sec", "remaining_sec")))
+
+
+def _remaining(duration: float, watched: float, completed: bool) -> float:
+    """单个视频的剩余时长，与 VideoSummary.from_videos 的口径一致"""
+    return 0.0 if completed else max(0.0, duration - watched)
@@ -0,0 +1,154 @@
+"""每日学习索引 — daily_stats 的稠密数组 + 前缀和表示
+
+daily_stats 以 "YYYY-MM-DD" 字符串为键，求区间合计需要逐键累加。DailyIndex 按日期序号
+把每天的学习秒数放进稠密数组，并维护前缀和：
+
+    origin        数组第 0 格对应的日期序号（date.toordinal）
+    seconds       array('d')，每天的学习秒数
+    cumulative    array('d')，cumulative[i] = seconds[:i] 之和，长度比 seconds 多 1
+    recorded      bytearray，该天在 daily_stats 中是否有记录
+
+任意日期区间的合计为两次前缀和相减，O(1)。进度总是记在当天（数组末尾），
+增量更新只需改动末尾的前缀和；早于 origin 的日期需要整体平移，代价 O(天数)。
+"""
+
+import math
+from array import array
+from datetime import date, timedelta
+
+
+def _ordinal(day) -> int:
+    """date 或 "YYYY-MM-DD" → 日期序号"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+class DailyIndex:
+    """一门课程（或全部课程合计）的每日学习秒数索引"""
+
+    __slots__ = ("origin", "seconds", "cumulative", "recorded", "day_count")
+
+    def __init__(self):
+        self.origin: int | None = None
+        self.seconds = array("d")
+        self.cumulative = array("d", [0.0])
+        self.recorded = bytearray()
+        self.day_count = 0  # 有记录的天数（与 len(daily_stats) 一致）
+
+    @classmethod
+    def from_stats(cls, *stats: dict) -> "DailyIndex":
+        """由一个或多个 daily_stats 字典构建（多个时逐日相加），无法解析的日期键被忽略"""
+        by_day: dict[int, float] = {}
+        for daily in stats:
+            for key, value in daily.items():
+                try:
+                    ordinal = _ordinal(key)
+                except (TypeError, ValueError):
+                    continue
+                by_day[ordinal] = by_day.get(ordinal, 0.0) + value
+        index = cls()
+        if not by_day:
+            return index
+        index.origin = min(by_day)
+        size = max(by_day) - index.origin + 1
+        index.seconds = array("d", bytes(8 * size))
+        index.recorded = bytearray(size)
+        for ordinal, value in by_day.items():
+            index.seconds[ordinal - index.origin] = value
+            index.recorded[ordinal - index.origin] = 1
+        index.day_count = len(by_day)
+        total = 0.0
+        for value in index.seconds:
+            total += value
+            index.cumulative.append(total)
+        return index
+
+    # ==================== 修改 ====================
+
+    def add(self, day, seconds: float):
+        """在某天累加学习秒数；day 为 date 或 "YYYY-MM-DD" """
+        ordinal = _ordinal(day)
+        if self.origin is None:
+            self.origin = ordinal
+        if ordinal < self.origin:
+            self._prepend(self.origin - ordinal)
+        i = ordinal - self.origin
+        if i >= len(self.seconds):
+            grow = i + 1 - len(self.seconds)
+            self.seconds.extend(array("d", bytes(8 * grow)))
+            self.recorded.extend(bytes(grow))
+            self.cumulative.extend(array("d", [self.cumulative[-1]]) * grow)
+        self.seconds[i] += seconds
+        if not self.recorded[i]:
+            self.recorded[i] = 1
+            self.day_count += 1
+        for j in range(i + 1, len(self.cumulative)):
+            self.cumulative[j] += seconds
+
+    def _prepend(self, days: int):
+        """在数组前补 days 个空白日"""
+        self.origin -= days
+        self.seconds = array("d", bytes(8 * days)) + self.seconds
+        self.recorded = bytearray(days) + self.recorded
+        self.cumulative = array("d", bytes(8 * days)) + self.cumulative
+
+    # ==================== 查询 ====================
+
+    @property
+    def total(self) -> float:
+        """全部日期的学习秒数合计"""
+        return self.cumulative[-1]
+
+    def between(self, start, end) -> float:
+        """start 到 end（含两端）的学习秒数合计，O(1)"""
+        if self.origin is None:
+            return 0.0
+        lo = max(_ordinal(start) - self.origin, 0)
+        hi = min(_ordinal(end) - self.origin, len(self.seconds) - 1)
+        if lo > hi:
+            return 0.0
+        return self.cumulative[hi + 1] - self.cumulative[lo]
+
+    def last_days(self, n: int, today: date) -> float:
+        """截至 today（含）最近 n 天的学习秒数合计"""
+        return self.between(today - timedelta(days=n - 1), today) if n > 0 else 0.0
+
+    def day_seconds(self, day) -> float:
+        """某天的学习秒数"""
+        if self.origin is None:
+            return 0.0
+        i = _ordinal(day) - self.origin
+        return self.seconds[i] if 0 <= i < len(self.seconds) else 0.0
+
+    def values(self, start: date, end: date) -> list:
+        """start 到 end（含两端）每天的学习秒数，超出记录范围的日期为 0"""
+        return list(self.window(start, end))
+
+    def window(self, start: date, end: date) -> array:
+        """
+        同 values()，但返回紧凑的 array('d')：记录范围内的部分整段切片复制，
+        代价只与窗口天数有关，与历史长度无关。
+        """
+        count = (end - start).days + 1
+        if count <= 0:
+            return array("d")
+        if self.origin is None:
+            return array("d", bytes(8 * count))
+        lo = _ordinal(start) - self.origin
+        head = min(max(-lo, 0), count)
+        body = self.seconds[max(lo, 0):max(lo + count, 0)]
+        tail = count - head - len(body)
+        return array("d", bytes(8 * head)) + body + array("d", bytes(8 * tail))
+
+    def matches(self, other: "DailyIndex") -> bool:
+        """与另一个索引的记录天数及每天的秒数一致（允许浮点累加误差）"""
+        if self.day_count != other.day_count:
+            return False
+        if other.origin is None:
+            return self.origin is None or not any(self.seconds)
+        start = date.fromordinal(other.origin)
+        end = start + timedelta(days=len(other.seconds) - 1)
+        return (math.isclose(self.total, other.total, rel_tol=1e-9, abs_tol=1e-6)
+                and all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+                        for a, b in zip(self.values(start, end), other.values(start, end))))
@@ -1,13 +1,28 @@
 """数据管理器 — 课程数据的加载、保存和操作的唯一入口"""
 
 import uuid
+import time
 import logging
+from array import array
 from datetime import datetime, timedelta, date
 from pathlib import Path
 
 from utils.paths import PathManager
-from utils.atomic_write import atomic_write_json, safe_read_json
 from utils.logger import setup_logger
+from utils.atomic_write import DURABILITY_NONE
+from utils.serialization import FORMAT_JSON_COMPACT
+from utils.clock import Clock, default_clock
+from models.json_store import JsonStore
+from models.course_stats import VideoSummary, CourseAggregates
+from models.video_table import VideoTable, file_key
+from models.schema import SCHEMA_VERSION, migrate, validate_headers
+from models import plan_preview
+from models.plan_preview import PlanInputs, PlanPreview
+from models.daily_index import DailyIndex
+from models.stats_cache import StatsCache
+from models.streak import StreakTracker
+from models.time_buckets import StudyBucket, buckets
+from models import batch_stats
 
 logger = setup_logger("DataManager", PathManager.LOG_DIR)
 
@@ -15,57 +30,284 @@ logger = setup_logger("DataManager", PathManager.LOG_DIR)
 class DataManager:
     """数据管理器，负责课程数据的加载、保存和操作（单一数据源）"""
 
-    def __init__(self):
-        """初始化数据管理器，自动加载数据并执行迁移"""
+    # 快照压缩间隔（秒）。播放进度逐条追加到日志（满足「每 5 秒自动持久化」），
+    # 完整的 courses.json 只需定期重写一次
+    SAVE_INTERVAL_SEC = 60.0
+
+    # 常驻内存的视频列表数上限（LRU）。首页只需要清单中的课程头信息和视频聚合值
+    RESIDENT_COURSES = 8
+
+    def __init__(self, save_interval: float = SAVE_INTERVAL_SEC, monotonic=time.monotonic,
+                 backend: str = None, durability: str = DURABILITY_NONE,
+                 shard_format: str = FORMAT_JSON_COMPACT,
+                 resident_courses: int | None = RESIDENT_COURSES, clock: Clock = None):
+        """
+        初始化数据管理器，自动加载数据并执行迁移。
+
+        Args:
+            save_interval: 快照的最短重写间隔（秒），0 表示每次变更都压缩日志
+            monotonic: 单调时钟函数，测试中可替换为模拟时钟
+            backend: 存储后端 "json" 或 "sqlite"；None 时若已存在 courses.db 则使用 SQLite
+            durability: JSON 后端的写盘持久性级别（"none" / "file" / "dir"）
+            shard_format: JSON 后端课程分片的序列化格式（"json" / "json-compact" / "msgpack"）
+            resident_courses: JSON 后端常驻内存的视频列表数上限，None 表示启动时全部加载
+            clock: 当前时间来源，None 时使用默认时钟（utils.clock.default_clock）
+        """
         PathManager.ensure_dirs()
         self.data_file = PathManager.COURSES_JSON
+        self.save_interval = save_interval
+        self.durability = durability
+        self.shard_format = shard_format
+        self.resident_courses = resident_courses
+        self.clock = clock or default_clock()
+        self.store = self._create_store(backend, save_interval, monotonic)
+        self.stats_cache = StatsCache()
+        self._course_versions: dict[str, int] = {}  # 课程 ID → 版本号，每次变更递增
+        self._activity_version = 0                   # activity_log 版本号
         self.data = self._load_data()
         self._migrate_data()
+        self._rebuild_indexes()
+        self._streak = StreakTracker.from_log(self.data.get("activity_log", {}))
         logger.info(f"DataManager 初始化完成，已加载 {len(self.data.get('courses', []))} 门课程")
 
     # ==================== 数据加载/保存 ====================
 
+    def _create_store(self, backend: str, save_interval: float, monotonic):
+        """按后端名称创建存储；首次切换到 SQLite 时自动导入现有 courses.json"""
+        if backend is None:
+            backend = "sqlite" if PathManager.COURSES_DB.exists() else "json"
+        if backend == "sqlite":
+            from models.sqlite_store import SqliteStore
+            if not PathManager.COURSES_DB.exists() and self.data_file.exists():
+                return SqliteStore.import_json(
+                    self.data_file, PathManager.COURSES_DB, shard_dir=PathManager.COURSES_DIR,
+                    meta_file=PathManager.META_JSON, shard_format=self.shard_format)
+            return SqliteStore(PathManager.COURSES_DB)
+        if backend == "json":
+            return JsonStore(self.data_file, save_interval, monotonic,
+                             shard_dir=PathManager.COURSES_DIR, meta_file=PathManager.META_JSON,
+                             durability=self.durability, shard_format=self.shard_format,
+                             max_resident=self.resident_courses)
+        raise ValueError(f"未知的存储后端: {backend}")
+
     def _load_data(self) -> dict:
         """安全加载数据，文件不存在或损坏时返回默认结构"""
-        return safe_read_json(self.data_file, default={"courses": []})
+        return self.store.load()
 
     def _save_data(self, data: dict = None):
-        """原子保存数据到 JSON 文件"""
-        if data is None:
-            data = self.data
-        try:
-            atomic_write_json(self.data_file, data)
-        except Exception as e:
-            logger.error(f"数据保存失败: {e}")
-            raise
+        """立即持久化完整数据"""
+        self.store.save(self.data if data is None else data)
+
+    @property
+    def io_stats(self) -> dict:
+        """存储后端的 I/O 统计（快照次数/字节数、日志记录数/字节数）"""
+        return self.store.io_stats
+
+    @property
+    def stats_cache_info(self) -> dict:
+        """统计缓存的命中/未命中次数"""
+        return self.stats_cache.info
+
+    @property
+    def is_dirty(self) -> bool:
+        """是否存在尚未写入快照的变更"""
+        return self.store.is_dirty
+
+    def flush(self, wait: bool = True):
+        """
+        将延迟写回的变更落盘。
+
+        Args:
+            wait: 是否阻塞到写盘完成；界面线程中的定时保存、切换课程、返回首页传 False，
+                  只把快照交给后台写盘线程；退出应用时由 close() 等待写盘完成
+        """
+        self.store.flush(wait=wait)
+
+    def close(self):
+        """退出前写回数据并释放存储资源"""
+        self.store.close()
 
     def _migrate_data(self):
-        """数据迁移：补全旧版本缺失的字段"""
-        migrated = False
-        for course in self.data.get("courses", []):
-            # 确保必要字段存在
-            if "daily_stats" not in course:
-                course["daily_stats"] = {}
-                migrated = True
-            if "weekly_schedule" not in course:
-                course["weekly_schedule"] = [0.0] * 7
-                migrated = True
-            if "start_date" not in course:
-                course["start_date"] = None
-                migrated = True
-            for video in course.get("videos", []):
-                if "watched_duration" not in video:
-                    video["watched_duration"] = 0
-                    migrated = True
-                if "completed" not in video:
-                    video["completed"] = False
-                    migrated = True
-                if "last_watched" not in video:
-                    video["last_watched"] = None
-                    migrated = True
-        if migrated:
+        """
+        数据迁移：存储记录的数据结构版本落后时依次执行迁移步骤（见 models/schema.py）。
+
+        版本为最新且清单校验和相符时直接返回，启动不做任何逐视频的工作；
+        校验和不符（如手工编辑过）时深度校验并修复课程头信息。
+        """
+        version = self.store.schema_version
+        current = version is None or version >= SCHEMA_VERSION
+        if current and self.store.headers_intact:
+            if version is None:
+                self.store.schema_version = SCHEMA_VERSION
+            return
+
+        changed = False
+        if not current:
+            migrate(self.data, version, lambda course: self.store.load_videos(course, evict=False))
+            changed = True
+        if not self.store.headers_intact and validate_headers(self.data):
+            logger.warning("课程数据校验未通过，已修复无效字段")
+            changed = True
+        self.store.schema_version = SCHEMA_VERSION
+        if changed:
             self._save_data()
-            logger.info("数据迁移完成：已补全旧版本缺失字段")
+            logger.info(f"数据迁移完成：数据结构版本 {version} → {SCHEMA_VERSION}")
+
+    # ==================== 索引 ====================
+
+    def _rebuild_indexes(self):
+        """
+        由 self.data 重建查找索引（加载后调用）。
+
+        - _courses_by_id: 课程 ID → 课程字典
+        - _course_ids_by_path: 课程文件夹路径 → 课程 ID
+        - _aggregates: 课程 ID → CourseAggregates，首次读取统计时建立，之后随每次变更按差值更新
+        - _daily_indexes: 课程 ID → DailyIndex；_global_daily: 全部课程合计的 DailyIndex；
+          均在首次查询时由 daily_stats 建立，之后随进度更新增量维护
+
+        视频按 rel_path 的索引由各课程的 VideoTable 自行维护（首次查找时建立）。
+        """
+        self._courses_by_id = {}
+        self._course_ids_by_path = {}
+        self._aggregates = {}
+        self._daily_indexes = {}
+        self._global_daily = None
+        for course in self.data.get("courses", []):
+            self._index_course(course)
+
+    def _index_course(self, course: dict):
+        self._courses_by_id.setdefault(course["id"], course)
+        self._course_ids_by_path.setdefault(course["path"], course["id"])
+
+    def _unindex_course(self, course_id: str):
+        course = self._courses_by_id.pop(course_id, None)
+        if course is not None and self._course_ids_by_path.get(course["path"]) == course_id:
+            del self._course_ids_by_path[course["path"]]
+        self._aggregates.pop(course_id, None)
+        self._daily_indexes.pop(course_id, None)
+        self._global_daily = None
+        self._course_versions.pop(course_id, None)
+        self.stats_cache.discard(course_id)
+
+    def _touch(self, course_id: str):
+        """课程发生变更：递增版本号，使其缓存的统计失效"""
+        self._course_versions[course_id] = self._course_versions.get(course_id, 0) + 1
+
+    def find_course_by_path(self, path: str) -> dict | None:
+        """根据课程文件夹路径查找课程头信息"""
+        course_id = self._course_ids_by_path.get(path)
+        return self._courses_by_id.get(course_id) if course_id else None
+
+    # ==================== 按需加载 ====================
+
+    def _find_course(self, course_id: str) -> dict | None:
+        """根据 ID 查找课程头信息，不加载视频列表"""
+        return self._courses_by_id.get(course_id)
+
+    def _ensure_videos(self, course: dict) -> VideoTable:
+        """确保课程的视频列表已在内存中（首次打开课程时读取分片），并标记为最近使用"""
+        return self.store.load_videos(course)
+
+    def get_video_summary(self, course_id: str) -> VideoSummary:
+        """课程的视频聚合值（取自运行聚合值，不加载视频列表）"""
+        course = self._find_course(course_id)
+        if not course:
+            return VideoSummary()
+        return self._course_aggregates(course).video_summary()
+
+    # ==================== 运行聚合值 ====================
+
+    def _course_aggregates(self, course: dict) -> CourseAggregates:
+        """
+        课程的运行聚合值。首次读取时从头计算一次（未加载视频列表时取清单中保存的值），
+        此后由 update_video_progress 按差值维护。
+        """
+        aggregates = self._aggregates.get(course["id"])
+        if aggregates is None:
+            aggregates = CourseAggregates.from_summary(self.store.video_summary(course))
+            self._aggregates[course["id"]] = aggregates
+        return aggregates
+
+    def _daily_index(self, course: dict) -> DailyIndex:
+        """课程的每日学习索引；daily_stats 应只经由 DataManager 修改"""
+        index = self._daily_indexes.get(course["id"])
+        if index is None:
+            index = DailyIndex.from_stats(course.get("daily_stats", {}))
+            self._daily_indexes[course["id"]] = index
+        return index
+
+    def get_global_daily_index(self) -> DailyIndex:
+        """全部课程逐日合计的学习索引（首页热力图、今日学习时长）"""
+        if self._global_daily is None:
+            self._global_daily = DailyIndex.from_stats(
+                *(c.get("daily_stats", {}) for c in self.get_courses()))
+        return self._global_daily
+
+    def get_global_daily_totals(self, start: date, end: date) -> array:
+        """
+        全部课程在 start 到 end（含两端）逐日的学习秒数合计（array('d')，首页热力图）。
+
+        取自增量维护的全局每日索引，代价只与窗口天数有关，与课程数和历史长度无关。
+        """
+        return self.get_global_daily_index().window(start, end)
+
+    def get_studied_seconds(self, course_id: str, start: date, end: date) -> float:
+        """课程在 start 到 end（含两端）之间的学习秒数，O(1)"""
+        course = self._find_course(course_id)
+        if not course:
+            return 0.0
+        return self._daily_index(course).between(start, end)
+
+    def study_time(self, course_ids=None, granularity: str = "week",
+                   start: date = None, end: date = None) -> list:
+        """
+        按日 / 周 / 月分桶的学习时长报表。
+
+        每个桶的合计取自每日索引的前缀和（O(1)），代价与桶数 × 课程数成正比，与天数无关。
+
+        Args:
+            course_ids: 课程 ID 列表；None 时为全部课程合计。不存在的 ID 被忽略
+            granularity: "day" / "week"（ISO 周，周一开始）/ "month"
+            start: 起始日期（含），None 时为最早有记录的日期
+            end: 结束日期（含），None 时为今天
+
+        Returns:
+            [StudyBucket]，按时间顺序
+        """
+        if course_ids is None:
+            indexes = [self.get_global_daily_index()]
+        else:
+            courses = (self._find_course(cid) for cid in course_ids)
+            indexes = [self._daily_index(c) for c in courses if c]
+        end = end or self.clock.today()
+        if start is None:
+            origins = [index.origin for index in indexes if index.origin is not None]
+            start = date.fromordinal(min(origins)) if origins else end
+        return [StudyBucket(first, last, sum(index.between(lo, hi) for index in indexes))
+                for first, last, lo, hi in buckets(start, end, granularity)]
+
+    def verify_aggregates(self) -> list:
+        """
+        一致性检查：从头重新计算已建立的运行聚合值与每日索引，并与维护值比较。
+
+        Returns:
+            不一致的课程 ID 列表（全局每日索引不一致时包含 None）
+        """
+        mismatched = []
+        for course_id, aggregates in self._aggregates.items():
+            course = self._find_course(course_id)
+            expected = CourseAggregates.from_summary(self.store.video_summary(course))
+            if not aggregates.matches(expected):
+                mismatched.append(course_id)
+        for course_id, index in self._daily_indexes.items():
+            expected = DailyIndex.from_stats(self._find_course(course_id).get("daily_stats", {}))
+            if not index.matches(expected) and course_id not in mismatched:
+                mismatched.append(course_id)
+        if self._global_daily is not None:
+            expected = DailyIndex.from_stats(*(c.get("daily_stats", {}) for c in self.get_courses()))
+            if not self._global_daily.matches(expected):
+                mismatched.append(None)
+        return mismatched
 
     # ==================== 课程 CRUD ====================
 
@@ -76,7 +318,8 @@ class DataManager:
         Args:
             name: 课程名称
             path: 课程文件夹路径
-            videos_data: 视频数据列表 [{"rel_path": ..., "abs_path": ..., "duration": ...}]
+            videos_data: 视频数据列表 [{"rel_path": ..., "abs_path": ..., "duration": ...}]，
+                         扫描时取得的 size / mtime_ns 一并保存，供重新同步时判断文件是否变化
             duration_stats: {"total_videos": int, "total_duration": float}
 
         Returns:
@@ -88,39 +331,33 @@ class DataManager:
             "id": course_id,
             "name": name,
             "path": path,
-            "added_at": datetime.now().isoformat(),
+            "added_at": self.clock.now().isoformat(),
             "total_videos": duration_stats["total_videos"],
             "total_duration": duration_stats["total_duration"],
             "start_date": None,
             "weekly_schedule": [0.0] * 7,
             "daily_stats": {},
-            "videos": [],
+            "videos": VideoTable.from_dicts(
+                {"rel_path": v["rel_path"], "duration": v["duration"],
+                 "size": v.get("size"), "mtime_ns": v.get("mtime_ns")} for v in videos_data),
         }
 
-        for v in videos_data:
-            new_course["videos"].append({
-                "rel_path": v["rel_path"],
-                "duration": v["duration"],
-                "watched_duration": 0,
-                "completed": False,
-                "last_watched": None,
-            })
-
         self.data["courses"].append(new_course)
-        self._save_data()
+        self._index_course(new_course)
+        self.store.add_course(new_course)
         logger.info(f"课程已添加: {name} ({len(videos_data)} 个视频)")
         return new_course
 
     def get_courses(self) -> list:
-        """获取所有课程列表"""
+        """获取所有课程列表（课程头信息，未打开过的课程可能不含 "videos"）"""
         return self.data.get("courses", [])
 
     def get_course_by_id(self, course_id: str) -> dict | None:
-        """根据 ID 获取课程，找不到返回 None"""
-        for course in self.data.get("courses", []):
-            if course["id"] == course_id:
-                return course
-        return None
+        """根据 ID 获取包含视频列表的完整课程，找不到返回 None"""
+        course = self._find_course(course_id)
+        if course:
+            self._ensure_videos(course)
+        return course
 
     def delete_course(self, course_id: str):
         """删除课程及其所有数据"""
@@ -128,15 +365,116 @@ class DataManager:
         self.data["courses"] = [c for c in self.data.get("courses", []) if c["id"] != course_id]
         after = len(self.data["courses"])
         if before > after:
-            self._save_data()
+            self._unindex_course(course_id)
+            self.store.delete_course(course_id)
             logger.info(f"课程已删除: {course_id}")
 
+    def resync_course(self, course_id: str, videos_data: list) -> dict:
+        """
+        用重新扫描的结果同步课程视频列表：新增、移除与时长变化一次性应用并保存，已有视频的进度保留。
+
+        Args:
+            course_id: 课程 ID
+            videos_data: VideoScanner.scan_directory 返回的视频列表（按遍历顺序）
+
+        Returns:
+            {"added": int, "removed": int, "updated": int}；全部为 0 且文件键（大小、修改时间）
+            都未变化时不修改课程、不写盘
+        """
+        changes = {"added": 0, "removed": 0, "updated": 0}
+        course = self._find_course(course_id)
+        if not course:
+            return changes
+        videos = self._ensure_videos(course)
+
+        seen = set()
+        keys_changed = False
+        for video in videos_data:
+            i = videos.index_of(video["rel_path"])
+            if i is None:
+                changes["added"] += 1
+            elif videos.durations[i] != video["duration"]:
+                changes["updated"] += 1
+            elif videos.file_key(i) != file_key(video):
+                keys_changed = True
+            seen.add(video["rel_path"])
+        changes["removed"] = sum(1 for rel_path in videos.rel_paths if rel_path not in seen)
+        if not any(changes.values()) and not keys_changed:
+            return changes
+
+        # 按新的遍历顺序重建视频表（与重新添加课程的顺序一致），沿用已有视频的进度
+        table = VideoTable()
+        for video in videos_data:
+            i = videos.index_of(video["rel_path"])
+            if i is None:
+                table.append(video["rel_path"], video["duration"], key=file_key(video))
+            else:
+                table.append(video["rel_path"], video["duration"], videos.watched[i],
+                             videos.is_completed(i), videos.last_watched[i], file_key(video))
+        course["videos"] = table
+        course["total_videos"] = len(table)
+        course["total_duration"] = sum(table.durations)
+        self._aggregates[course_id] = CourseAggregates.from_summary(table.summary())
+        self._touch(course_id)
+        self.store.replace_videos(course)
+        logger.info(f"课程已同步: {course['name']} (新增 {changes['added']}, "
+                    f"移除 {changes['removed']}, 时长变化 {changes['updated']})")
+        return changes
+
+    def get_video_file_keys(self, course_id: str) -> dict:
+        """
+        课程中文件键已知且已取得时长的视频，供重新扫描时跳过未变化的文件。
+
+        Returns:
+            {rel_path: (size, mtime_ns, duration)}；时长为 0（尚未读取或读取失败）的视频不在其中
+        """
+        course = self._find_course(course_id)
+        if not course:
+            return {}
+        videos = self._ensure_videos(course)
+        known = {}
+        for i, rel_path in enumerate(videos.rel_paths):
+            key = videos.file_key(i)
+            if key is not None and videos.durations[i] > 0:
+                known[rel_path] = (*key, videos.durations[i])
+        return known
+
+    def update_video_durations(self, course_id: str, durations: list):
+        """
+        补全视频时长（流式扫描先以时长 0 创建课程，再逐批写入读取到的时长）。
+
+        Args:
+            course_id: 课程 ID
+            durations: [(视频下标, 时长)]，即 ScanBatch(PROBED).items
+        """
+        course = self._find_course(course_id)
+        if not course or not durations:
+            return
+        aggregates = self._course_aggregates(course)
+        videos = self._ensure_videos(course)
+        delta = 0.0
+        changed = []
+        for i, duration in durations:
+            old = videos.durations[i]
+            if old == duration:
+                continue
+            videos.durations[i] = duration
+            aggregates.apply_duration_change(old, duration, videos.watched[i], videos.is_completed(i))
+            delta += duration - old
+            changed.append(i)
+        if not changed:
+            return
+        course["total_duration"] = course.get("total_duration", 0) + delta
+        self._touch(course_id)
+        self.store.update_durations(course, changed)
+
     def update_course_name(self, course_id: str, new_name: str):
         """更新课程名称"""
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if course:
             course["name"] = new_name
-            self._save_data()
+            self._touch(course_id)
+            self.store.update_course(course)
 
     # ==================== 视频进度 ====================
 
@@ -151,70 +489,84 @@ class DataManager:
             watched_duration: 已观看时长（秒）
             completed: 是否已完成
         """
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return
 
-        today_str = datetime.now().strftime("%Y-%m-%d")
+        today_str = self.clock.today_key()
 
         # 确保 daily_stats 存在
         if "daily_stats" not in course:
             course["daily_stats"] = {}
 
-        for video in course["videos"]:
-            if video["rel_path"] == rel_path:
-                prev_watched = video.get("watched_duration", 0)
+        aggregates = self._course_aggregates(course)
+        videos = self._ensure_videos(course)
+        i = videos.index_of(rel_path)
+        if i is None:
+            return
+
+        prev_watched = videos.watched[i]
+        was_completed = videos.is_completed(i)
 
-                # 增量更新每日统计
-                if watched_duration > prev_watched:
-                    delta = watched_duration - prev_watched
-                    course["daily_stats"][today_str] = course["daily_stats"].get(today_str, 0) + delta
-                    video["watched_duration"] = watched_duration
+        # 增量更新每日统计
+        if watched_duration > prev_watched:
+            delta = watched_duration - prev_watched
+            course["daily_stats"][today_str] = course["daily_stats"].get(today_str, 0) + delta
+            for index in (self._daily_indexes.get(course_id), self._global_daily):
+                if index is not None:
+                    index.add(today_str, delta)
+        else:
+            watched_duration = prev_watched
 
-                # 标记完成
-                if completed and not video.get("completed", False):
-                    video["completed"] = True
-                    self._log_activity()
+        videos.set_progress(i, watched_duration, was_completed or completed, self.clock.now().timestamp())
+        aggregates.apply_video_change(videos.durations[i], prev_watched, was_completed,
+                                      watched_duration, was_completed or completed)
+        self._touch(course_id)
 
-                video["last_watched"] = datetime.now().isoformat()
-                break
+        # 标记完成
+        if completed and not was_completed:
+            self._log_activity()
 
-        self._save_data()
+        self.store.update_progress(course, videos[i], today_str)
 
     def _log_activity(self):
         """记录每日活动（完成视频数）"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.clock.today_key()
         log = self.data.get("activity_log", {})
         log[today] = log.get(today, 0) + 1
         self.data["activity_log"] = log
+        self._activity_version += 1
+        if not self._streak.record(self.clock.today()):
+            self._streak = StreakTracker.from_log(log)
+        self.store.log_activity(today, log[today])
 
     # ==================== 学习计划 ====================
 
     def set_weekly_schedule(self, course_id: str, schedule: list, start_date_iso: str):
         """设置课程的周计划和开始日期"""
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if course:
             course["weekly_schedule"] = list(schedule)
             course["start_date"] = start_date_iso
-            self._save_data()
+            self._touch(course_id)
+            self.store.update_course(course)
 
     def get_today_plan_seconds(self, course_id: str) -> float:
         """获取今日计划学习时长（秒）"""
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return 0.0
         schedule = course.get("weekly_schedule", [0] * 7)
-        wd = datetime.now().weekday()
+        wd = self.clock.today().weekday()
         return schedule[wd] * 3600.0
 
     def get_today_progress(self, course_id: str) -> float:
         """获取今日已学习时长（秒）"""
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return 0.0
-        today_str = datetime.now().strftime("%Y-%m-%d")
         stats = course.get("daily_stats", {})
-        return stats.get(today_str, 0.0)
+        return stats.get(self.clock.today_key(), 0.0)
 
     # ==================== 学习余额 ====================
 
@@ -226,46 +578,11 @@ class DataManager:
             (balance_minutes, actual_total_minutes, plan_total_minutes)
             余额 = 0 表示无开始日期或计划全为 0
         """
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return 0.0, 0.0, 0.0
-
-        start_date_iso = course.get("start_date")
-        if not start_date_iso:
-            return 0.0, 0.0, 0.0
-
-        try:
-            start_date = datetime.fromisoformat(start_date_iso).date()
-        except (ValueError, TypeError):
-            return 0.0, 0.0, 0.0
-
-        today = datetime.now().date()
-        if today < start_date:
-            return 0.0, 0.0, 0.0
-
-        schedule = course.get("weekly_schedule", [0.0] * 7)
-        if sum(schedule) < 0.1:
-            return 0.0, 0.0, 0.0
-
-        # 计算累计计划时长（小时）
-        plan_total_hours = 0.0
-        curr = start_date
-        while curr <= today:
-            wd = curr.weekday()
-            plan_total_hours += schedule[wd]
-            curr += timedelta(days=1)
-
-        # 计算实际累计时长（小时）
-        stats = course.get("daily_stats", {})
-        actual_seconds = sum(stats.values())
-        actual_total_hours = actual_seconds / 3600.0
-
-        balance_hours = actual_total_hours - plan_total_hours
-        return (
-            balance_hours * 60.0,      # balance_minutes
-            actual_total_hours * 60.0,  # actual_total_minutes
-            plan_total_hours * 60.0,    # plan_total_minutes
-        )
+        return plan_preview.balance(course.get("weekly_schedule", [0.0] * 7), course.get("start_date"),
+                                    self._daily_index(course).total, self.clock.today())
 
     # ==================== 剩余天数计算 ====================
 
@@ -275,37 +592,13 @@ class DataManager:
 
         优先使用历史平均速度；无历史数据则使用周计划推算。
         """
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return 0
-
-        # 计算剩余时长（秒）
-        remaining_sec = 0.0
-        for v in course.get("videos", []):
-            if not v.get("completed", False):
-                remaining_sec += max(0, v.get("duration", 0) - v.get("watched_duration", 0))
-
-        if remaining_sec <= 0:
-            return 0
-
-        # 策略 1：使用历史平均每日学习时长
-        daily_stats = course.get("daily_stats", {})
-        if daily_stats:
-            values = list(daily_stats.values())
-            avg_daily_sec = sum(values) / len(values)
-            if avg_daily_sec > 60:  # 平均每天至少 1 分钟才有效
-                return max(1, int(remaining_sec / avg_daily_sec + 0.5))
-
-        # 策略 2：使用周计划平均每日时长
-        schedule = course.get("weekly_schedule", [0] * 7)
-        weekly_hours = sum(schedule)
-        if weekly_hours > 0.1:
-            avg_daily_hours = weekly_hours / 7.0
-            avg_daily_sec = avg_daily_hours * 3600.0
-            return max(1, int(remaining_sec / avg_daily_sec + 0.5))
-
-        # 策略 3：兜底 — 假设每天 1 小时
-        return max(1, int(remaining_sec / 3600.0 + 0.5))
+        daily = self._daily_index(course)
+        return plan_preview.remaining_days(course.get("weekly_schedule", [0] * 7),
+                                           self._course_aggregates(course).remaining_sec,
+                                           daily.total, daily.day_count)
 
     # ==================== 预计完成日期 ====================
 
@@ -316,55 +609,60 @@ class DataManager:
         Returns:
             日期字符串 (YYYY-MM-DD)，或 "--" (无计划/所有视频为空)，或 "已完成"
         """
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return "--"
+        return plan_preview.finish_date(course.get("weekly_schedule", [0] * 7),
+                                        self.get_video_summary(course_id).remaining_sec,
+                                        self.clock.today())
 
-        # 计算剩余时长
-        remaining_hours = 0.0
-        for v in course.get("videos", []):
-            if not v.get("completed", False):
-                remaining_hours += max(0, v.get("duration", 0) - v.get("watched_duration", 0)) / 3600.0
+    # ==================== 计划预览 ====================
 
-        if remaining_hours <= 0:
-            return "已完成"
-
-        schedule = course.get("weekly_schedule", [0] * 7)
-        if sum(schedule) < 0.01:
-            return "--"
+    def get_plan_inputs(self, course_id: str) -> PlanInputs:
+        """计划预览的课程侧输入（剩余时长、累计学习时长与天数、今天），取自增量维护的聚合值"""
+        course = self._find_course(course_id)
+        if not course:
+            return PlanInputs(today=self.clock.today())
+        daily = self._daily_index(course)
+        return PlanInputs(remaining_sec=self._course_aggregates(course).remaining_sec,
+                          studied_sec=daily.total, studied_days=daily.day_count,
+                          today=self.clock.today())
 
-        sim_date = date.today()
-        needed = remaining_hours
-        days_count = 0
-        max_days = 365 * 5  # 防止无限循环
+    def preview_plan(self, course_id: str, schedule: list, start_date_iso: str) -> PlanPreview:
+        """某个周计划下的余额、剩余天数与预计完成日期，不修改课程"""
+        return plan_preview.evaluate(schedule, start_date_iso, self.get_plan_inputs(course_id))
 
-        while needed > 0 and days_count < max_days:
-            day_wd = sim_date.weekday()
-            day_plan = schedule[day_wd]
-            needed -= day_plan
-            if needed > 0:
-                sim_date += timedelta(days=1)
-            days_count += 1
+    # ==================== 聚合统计 ====================
 
-        if days_count >= max_days:
-            return "--"
-        return sim_date.strftime("%Y-%m-%d")
+    def on_date_changed(self):
+        """跨过午夜：按日期缓存的统计全部过期，释放旧条目（由 ClockService.date_changed 触发）"""
+        self.stats_cache.clear()
 
-    # ==================== 聚合统计 ====================
+    def _cache_key(self, course_id: str) -> tuple:
+        """课程统计的版本键：课程版本号 + 今天的日期（跨日后计划、余额等随之变化）"""
+        return self._course_versions.get(course_id, 0), self.clock.today()
 
     def calculate_course_stats(self, course_id: str):
-        """计算课程的完整统计数据，返回 CourseStats 实例"""
+        """课程的完整统计数据（CourseStats），课程未变更且未跨日时取缓存"""
         from models.course_stats import CourseStats
 
-        course = self.get_course_by_id(course_id)
-        if not course:
+        if not self._find_course(course_id):
             return CourseStats()
+        key = self._cache_key(course_id) + (self._activity_version,)
+        return self.stats_cache.get("stats", course_id, key,
+                                    lambda: self._compute_course_stats(course_id))
+
+    def _compute_course_stats(self, course_id: str):
+        """计算课程的完整统计数据，返回 CourseStats 实例"""
+        from models.course_stats import CourseStats
 
-        videos = course.get("videos", [])
-        total_v = len(videos)
-        completed_v = sum(1 for v in videos if v.get("completed", False))
+        course = self._find_course(course_id)
+
+        summary = self.get_video_summary(course_id)
+        total_v = summary.video_count
+        completed_v = summary.completed_videos
         total_dur = course.get("total_duration", 0)
-        watched_dur = sum(v.get("watched_duration", 0) for v in videos)
+        watched_dur = summary.watched_sec
         today_sec = self.get_today_progress(course_id)
         plan_sec = self.get_today_plan_seconds(course_id)
         bal_min, act_min, plan_min = self.get_course_balance(course_id)
@@ -387,39 +685,95 @@ class DataManager:
         )
 
     def get_course_card_data(self):
-        """获取所有课程的卡片展示数据列表"""
+        """获取所有课程的卡片展示数据列表，未变更的课程取缓存"""
+        return [self.stats_cache.get("card", course["id"], self._cache_key(course["id"]),
+                                     lambda course=course: self._compute_card_data(course))
+                for course in self.get_courses()]
+
+    def _compute_card_data(self, course: dict):
+        """计算一门课程的卡片展示数据"""
         from models.course_stats import CourseCardData
 
+        stats = self.calculate_course_stats(course["id"])
+        return CourseCardData(
+            course_id=course["id"],
+            course_name=course["name"],
+            progress_percent=stats.progress_percent,
+            watched_sec=stats.watched_duration_sec,
+            total_sec=stats.total_duration_sec,
+            today_watched_sec=stats.today_watched_sec,
+            today_plan_sec=stats.today_plan_sec,
+            balance_minutes=stats.balance_minutes,
+            remaining_days=self.calculate_remaining_days(course["id"]),
+            estimated_finish_date=stats.estimated_finish_date,
+        )
+
+    def compute_all_card_data(self) -> list:
+        """
+        批量计算所有课程的卡片数据（课程数很多时使用）。
+
+        把各课程的运行聚合值、每日索引与周计划打包成数组，由 models/batch_stats.py
+        向量化计算进度、余额、剩余天数和预计完成日期；结果与 get_course_card_data() 相同。
+        未安装 NumPy 时回退到逐门课程计算。
+        """
+        from models.course_stats import CourseCardData
+
+        if not batch_stats.NUMPY_AVAILABLE:
+            return self.get_course_card_data()
+
+        courses = self.get_courses()
+        today = self.clock.today()
+        today_str = self.clock.today_key()
+        columns = batch_stats.CourseColumns([], [], [], [], [], [], [])
+        for course in courses:
+            aggregates = self._course_aggregates(course)
+            daily = self._daily_index(course)
+            columns.total_duration.append(course.get("total_duration", 0))
+            columns.watched_sec.append(aggregates.watched_sec)
+            columns.remaining_sec.append(aggregates.remaining_sec)
+            columns.studied_sec.append(daily.total)
+            columns.studied_days.append(daily.day_count)
+            columns.start_ordinal.append(_start_ordinal(course.get("start_date")))
+            columns.weekly_schedule.append(course.get("weekly_schedule", [0.0] * 7))
+        result = batch_stats.compute(columns, today)
+
+        weekday = today.weekday()
         cards = []
-        for course in self.get_courses():
-            stats = self.calculate_course_stats(course["id"])
-            card = CourseCardData(
+        for i, course in enumerate(courses):
+            offset = int(result.finish_offset[i])
+            if offset == -2:
+                finish = "已完成"
+            elif offset < 0:
+                finish = "--"
+            else:
+                finish = (today + timedelta(days=offset)).strftime("%Y-%m-%d")
+            cards.append(CourseCardData(
                 course_id=course["id"],
                 course_name=course["name"],
-                progress_percent=stats.progress_percent,
-                watched_sec=stats.watched_duration_sec,
-                total_sec=stats.total_duration_sec,
-                today_watched_sec=stats.today_watched_sec,
-                today_plan_sec=stats.today_plan_sec,
-                balance_minutes=stats.balance_minutes,
-                remaining_days=self.calculate_remaining_days(course["id"]),
-            )
-            cards.append(card)
+                progress_percent=round(float(result.progress_percent[i]), 1),
+                watched_sec=columns.watched_sec[i],
+                total_sec=columns.total_duration[i],
+                today_watched_sec=course.get("daily_stats", {}).get(today_str, 0.0),
+                today_plan_sec=columns.weekly_schedule[i][weekday] * 3600.0,
+                balance_minutes=float(result.balance_minutes[i]),
+                remaining_days=int(result.remaining_days[i]),
+                estimated_finish_date=finish,
+            ))
         return cards
 
     def get_dashboard_data(self, course_id: str):
         """获取课程看板的完整数据"""
         from models.course_stats import DashboardData
 
-        course = self.get_course_by_id(course_id)
+        course = self._find_course(course_id)
         if not course:
             return DashboardData()
 
-        videos = course.get("videos", [])
-        total_v = len(videos)
-        completed_v = sum(1 for v in videos if v.get("completed", False))
+        summary = self.get_video_summary(course_id)
+        total_v = summary.video_count
+        completed_v = summary.completed_videos
         total_h = course.get("total_duration", 0) / 3600.0
-        watched_h = sum(v.get("watched_duration", 0) for v in videos) / 3600.0
+        watched_h = summary.watched_sec / 3600.0
         today_s = self.get_today_progress(course_id)
         plan_s = self.get_today_plan_seconds(course_id)
         bal_min, _, _ = self.get_course_balance(course_id)
@@ -445,29 +799,12 @@ class DataManager:
         return self.data.get("activity_log", {})
 
     def _calculate_streak(self) -> int:
-        """计算当前连续学习天数"""
-        log = self.data.get("activity_log", {})
-        if not log:
-            return 0
-
-        today = date.today()
-        streak = 0
-        check_date = today
-
-        # 检查今天是否有活动（有则从今天开始算，没有则从昨天开始）
-        today_str = today.strftime("%Y-%m-%d")
-        if today_str not in log:
-            check_date = today - timedelta(days=1)
+        """当前连续学习天数（增量维护，O(1)）"""
+        return self._streak.current(self.clock.today())
 
-        while True:
-            date_str = check_date.strftime("%Y-%m-%d")
-            if date_str in log and log[date_str] > 0:
-                streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                break
-
-        return streak
+    def get_longest_streak(self) -> int:
+        """历史最长连续学习天数"""
+        return self._streak.longest
 
     # ==================== 全局设置 ====================
 
@@ -481,4 +818,14 @@ class DataManager:
         if "settings" not in self.data:
             self.data["settings"] = {}
         self.data["settings"][key] = value
-        self._save_data()
+        self.store.set_setting(key, value)
+
+
+def _start_ordinal(start_date_iso) -> int:
+    """课程开始日期的日期序号，无开始日期或无法解析时为 -1"""
+    if not start_date_iso:
+        return -1
+    try:
+        return datetime.fromisoformat(start_date_iso).date().toordinal()
+    except (ValueError, TypeError):
+        return -1
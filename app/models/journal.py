@@ -0,0 +1,141 @@
+"""进度日志（WAL）— 高频变更以追加方式写入 courses.journal，定期压缩进 courses.json 快照"""
+
+import json
+import os
+from pathlib import Path
+
+from utils.atomic_write import DURABILITY_NONE
+
+
+class ProgressJournal:
+    """
+    追加式进度日志。
+
+    每条记录是一行紧凑 JSON，保存变更后的「绝对值」而非增量，
+    因此重放是幂等的：快照已包含的记录被再次重放也不会重复计数。
+
+    压缩流程：
+    1. rotate() 把当前日志改名为 .1 段，新记录写入新的空日志
+    2. 写入完整快照
+    3. discard_rotated() 删除 .1 段
+    步骤 2 失败时 .1 段保留，下次启动时与当前日志一起重放（由 JsonStore 逐条 apply_record）。
+
+    持久性：每条记录都刷新到操作系统，进程崩溃不会丢失；durability 为 "none" 时
+    断电前是否落盘取决于操作系统回写，其他级别在每条记录后 fsync。
+    """
+
+    def __init__(self, path: Path, durability: str = DURABILITY_NONE):
+        """
+        Args:
+            durability: 持久性级别，见 utils.atomic_write；非 "none" 时每条记录后 fsync
+        """
+        self.path = Path(path)
+        self.rotated_path = self.path.with_name(self.path.name + ".1")
+        self.durability = durability
+        self._fh = None
+        self.bytes_written = 0
+
+    # ==================== 写入 ====================
+
+    def append(self, record: dict) -> int:
+        """追加一条记录并刷新到操作系统（按 durability 决定是否 fsync），返回写入字节数（与课程库大小无关）"""
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "ab")
+        self._fh.write(line)
+        self._fh.flush()
+        if self.durability != DURABILITY_NONE:
+            os.fsync(self._fh.fileno())
+        self.bytes_written += len(line)
+        return len(line)
+
+    def close(self):
+        """关闭日志文件句柄"""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    # ==================== 压缩 ====================
+
+    def rotate(self) -> Path | None:
+        """
+        把当前日志移入 .1 段，返回 .1 段路径；当前日志为空时返回 None。
+
+        若上次压缩失败遗留了 .1 段，则把当前日志追加到其后，保证记录顺序。
+        """
+        self.close()
+        if not self.path.exists():
+            return self.rotated_path if self.rotated_path.exists() else None
+        if self.rotated_path.exists():
+            with open(self.rotated_path, "ab") as dst, open(self.path, "rb") as src:
+                dst.write(src.read())
+            os.unlink(self.path)
+        else:
+            os.replace(self.path, self.rotated_path)
+        return self.rotated_path
+
+    def discard_rotated(self):
+        """快照写入成功后删除 .1 段"""
+        try:
+            os.unlink(self.rotated_path)
+        except FileNotFoundError:
+            pass
+
+    # ==================== 重放 ====================
+
+    def read_records(self) -> list:
+        """按写入顺序读取 .1 段和当前日志中的全部记录，跳过崩溃导致的残缺行"""
+        records = []
+        for path in (self.rotated_path, self.path):
+            if not path.exists():
+                continue
+            with open(path, "rb") as f:
+                for raw in f:
+                    try:
+                        records.append(json.loads(raw))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+        return records
+
+
+# ==================== 记录格式 ====================
+
+def video_record(course_id: str, video: dict, day: str, day_seconds: float | None) -> dict:
+    """视频进度记录：视频的最新状态 + 当日累计学习秒数（当日尚无统计时为 None）"""
+    return {
+        "op": "video",
+        "course": course_id,
+        "rel": video["rel_path"],
+        "watched": video.get("watched_duration", 0),
+        "completed": video.get("completed", False),
+        "last": video.get("last_watched"),
+        "day": day,
+        "day_sec": day_seconds,
+    }
+
+
+def activity_record(day: str, count: int) -> dict:
+    """活动日志记录：当日完成视频数"""
+    return {"op": "activity", "day": day, "count": count}
+
+
+def apply_record(data: dict, record: dict) -> bool:
+    """将单条记录应用到数据字典（课程视频列表为 VideoTable），目标课程/视频不存在时返回 False"""
+    op = record.get("op")
+    if op == "activity":
+        data.setdefault("activity_log", {})[record["day"]] = record["count"]
+        return True
+    if op == "video":
+        for course in data.get("courses", []):
+            if course["id"] != record["course"]:
+                continue
+            videos = course.get("videos")
+            i = videos.index_of(record["rel"]) if videos is not None else None
+            if i is None:
+                return False
+            videos.set_progress(i, record["watched"], record["completed"], record["last"])
+            if record.get("day_sec") is not None:
+                course.setdefault("daily_stats", {})[record["day"]] = record["day_sec"]
+            return True
+    return False
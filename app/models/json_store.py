@@ -0,0 +1,484 @@
+"""JSON 存储后端 — 清单 + 课程分片 + 进度日志，DataManager 的默认持久化实现
+
+磁盘布局：
+    data/courses.json        清单：{"layout": "sharded", "courses": [课程头信息...]}
+    data/courses/<id>.json   课程分片：{"videos": [...]}（内存中为 VideoTable，见 models/video_table.py）；
+                             msgpack 格式的分片扩展名为 .msgpack
+    data/meta.json           全局数据：activity_log、settings
+    data/courses.journal     进度日志（见 models/journal.py）
+
+两级加载：清单中的课程头信息（名称、路径、总计、计划、daily_stats 以及视频聚合值
+video_summary）在启动时全部加载；视频列表首次打开课程时才读取分片，
+常驻内存的视频列表数量受 LRU 上限约束。
+
+保存时只重写发生变更的分片，观看一门课程的视频不会重写其他课程。
+分片默认使用紧凑 JSON（可选 msgpack），清单与 meta.json 始终为缩进 JSON，便于手工编辑。
+读取时按文件头识别格式；切换分片格式无需迁移，旧扩展名的分片下次重写时替换。
+旧版单文件 courses.json 与 daily_stats 存放在分片中的旧版分片布局在首次加载时自动迁移。
+"""
+
+import os
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.paths import PathManager
+from utils.atomic_write import encode_json, safe_read_json, DURABILITY_NONE
+from utils.serialization import FORMAT_JSON_COMPACT, SUFFIX_FORMATS, encode, suffix_for_format
+from utils.async_writer import AsyncWriter
+from utils.logger import setup_logger
+from models.course_stats import VideoSummary
+from models.video_table import VideoTable
+from models.schema import headers_checksum
+from models.journal import ProgressJournal, video_record, activity_record, apply_record
+
+logger = setup_logger("JsonStore", PathManager.LOG_DIR)
+
+LAYOUT_SHARDED = "sharded"
+
+# 存放在课程分片中的字段，其余字段属于清单中的课程头信息
+SHARD_KEYS = ("videos",)
+
+# 清单中课程头信息的视频聚合值字段（不进入内存中的课程字典）
+SUMMARY_KEY = "video_summary"
+
+# 课程分片可能使用的扩展名（切换格式后旧分片仍按原扩展名读取）
+SHARD_SUFFIXES = (".json", *SUFFIX_FORMATS)
+
+
+class JsonStore:
+    """
+    JSON 文件存储。
+
+    - 结构性变更（增删课程、改名、计划、设置）立即写出受影响的文件
+    - 播放进度、活动日志逐条追加到 courses.journal，脏分片按 save_interval 在后台压缩
+    - 所有文件经由 AsyncWriter 写盘；同步保存只是提交后等待写盘线程完成
+    - 定时压缩与 LRU 释放从不等待写盘线程，只有 flush()（默认）与 close() 阻塞到写盘完成
+    - 视频列表按需加载：未加载的课程字典中没有 "videos" 键，由 load_videos() 补齐
+    """
+
+    def __init__(self, data_file: Path, save_interval: float, monotonic=time.monotonic,
+                 shard_dir: Path = None, meta_file: Path = None,
+                 durability: str = DURABILITY_NONE, shard_format: str = FORMAT_JSON_COMPACT,
+                 max_resident: int = None):
+        """
+        Args:
+            data_file: 清单文件路径（courses.json）
+            save_interval: 快照的最短重写间隔（秒），0 表示每次变更都压缩日志
+            monotonic: 单调时钟函数，测试中可替换为模拟时钟
+            shard_dir: 课程分片目录，默认为清单同目录下的 courses/
+            meta_file: 全局数据文件，默认为清单同目录下的 meta.json
+            durability: 写盘持久性级别，见 utils.atomic_write
+            shard_format: 课程分片的序列化格式，见 utils.serialization；
+                          清单与 meta.json 始终为缩进 JSON，便于手工查看
+            max_resident: 常驻内存的视频列表数上限；None 表示启动时加载全部视频
+        """
+        self.data_file = Path(data_file)
+        self.shard_dir = Path(shard_dir) if shard_dir else self.data_file.parent / "courses"
+        self.meta_file = Path(meta_file) if meta_file else self.data_file.parent / "meta.json"
+        self.journal = ProgressJournal(self.data_file.with_suffix(".journal"), durability=durability)
+        self.save_interval = save_interval
+        self.shard_format = shard_format
+        self.max_resident = max_resident
+        self._monotonic = monotonic
+        self._data = None
+        self._dirty = False
+        self._manifest_dirty = False
+        self._meta_dirty = False
+        self._dirty_shards: set[str] = set()
+        self._deleted_shards: set[str] = set()
+        self._stale_shards: dict[str, Path] = {}  # 课程 ID → 扩展名与当前格式不符、重写后待删除的分片
+        self._stale_in_flight: dict[str, Path] = {}  # 已交给写盘线程删除、尚未确认的旧分片
+        self._resident: OrderedDict[str, None] = OrderedDict()
+        self._summaries: dict[str, VideoSummary] = {}
+        self._last_save_at = monotonic()
+        self._write_failed = False
+        self.schema_version: int | None = None  # 清单中记录的数据结构版本，None 表示尚无数据
+        self.headers_intact = True              # 清单的课程头信息校验和是否相符
+        self.writer = AsyncWriter(durability=durability, name="JsonStoreWriter")
+        self.io_stats = {"saves": 0, "bytes_written": 0, "files_written": 0,
+                         "journal_records": 0, "journal_bytes": 0, "shards_loaded": 0}
+
+    def shard_path(self, course_id: str) -> Path:
+        """课程分片文件路径（扩展名与分片格式一致）"""
+        return self.shard_dir / f"{course_id}{suffix_for_format(self.shard_format)}"
+
+    def _existing_shard_path(self, course_id: str) -> Path:
+        """读取用的分片路径：当前格式的文件不存在时，查找切换格式前写出的分片"""
+        path = self.shard_path(course_id)
+        if path.exists():
+            return path
+        for suffix in SHARD_SUFFIXES:
+            candidate = path.with_suffix(suffix)
+            if candidate.exists():
+                return candidate
+        return path
+
+    # ==================== 加载 ====================
+
+    def load(self) -> dict:
+        """加载清单并重放进度日志；旧版单文件自动迁移为分片布局"""
+        manifest = safe_read_json(self.data_file, default={})
+        if manifest.get("layout") == LAYOUT_SHARDED:
+            self.schema_version = manifest.get("schema_version", 0)
+            self.headers_intact = manifest.get("checksum") == headers_checksum(manifest.get("courses", []))
+            data = self._assemble(manifest)
+            legacy = False
+        else:
+            data = manifest if "courses" in manifest else {"courses": []}
+            legacy = "courses" in manifest
+            if legacy:
+                self.schema_version = 0
+                self.headers_intact = False
+            for course in data["courses"]:
+                if "videos" in course:
+                    course["videos"] = VideoTable.from_dicts(course["videos"])
+            self._resident.update((c["id"], None) for c in data["courses"] if "id" in c)
+
+        self._data = data
+        self._replay_journal()
+
+        if legacy:
+            self._migrate_legacy()
+        return data
+
+    def _assemble(self, manifest: dict) -> dict:
+        """由清单和全局数据组装数据字典；视频列表仅在未启用按需加载时读取"""
+        data = {"courses": []}
+        for header in manifest.get("courses", []):
+            course = dict(header)
+            summary = course.pop(SUMMARY_KEY, None)
+            if summary is not None:
+                self._summaries[course["id"]] = VideoSummary.from_dict(summary)
+            data["courses"].append(course)
+            if "daily_stats" not in course:
+                # 旧版分片布局：daily_stats 存放在分片中，移入清单
+                self._read_shard(course, upgrade=True)
+                self._manifest_dirty = True
+                self._dirty = True
+            elif self.max_resident is None:
+                self._read_shard(course)
+        data.update(safe_read_json(self.meta_file, default={}))
+        return data
+
+    def _read_shard(self, course: dict, upgrade: bool = False):
+        """读取课程分片并标记为常驻"""
+        path = self._existing_shard_path(course["id"])
+        if path != self.shard_path(course["id"]):
+            self._stale_shards[course["id"]] = path
+        shard = safe_read_json(path, default={})
+        course["videos"] = VideoTable.from_dicts(shard.get("videos", []))
+        if upgrade:
+            course["daily_stats"] = shard.get("daily_stats", {})
+            self._dirty_shards.add(course["id"])
+        self._resident[course["id"]] = None
+        self._resident.move_to_end(course["id"])
+        self.io_stats["shards_loaded"] += 1
+
+    def _replay_journal(self):
+        """在快照上重放进度日志，并把涉及的分片标记为脏"""
+        courses = {c["id"]: c for c in self._data.get("courses", [])}
+        replayed = 0
+        for record in self.journal.read_records():
+            course = courses.get(record.get("course"))
+            if course is not None and "videos" not in course:
+                self._read_shard(course)
+            if not apply_record(self._data, record):
+                continue
+            replayed += 1
+            if record["op"] == "video":
+                self._dirty_shards.add(record["course"])
+                self._manifest_dirty = True
+            else:
+                self._meta_dirty = True
+        if replayed:
+            self._dirty = True
+            logger.info(f"已从进度日志恢复 {replayed} 条记录")
+
+    def _migrate_legacy(self):
+        """旧版单文件 → 分片布局；原文件备份为 courses.legacy.json"""
+        backup = self.data_file.with_name(self.data_file.stem + ".legacy.json")
+        shutil.copy2(str(self.data_file), str(backup))
+        self.save()
+        logger.info(f"已将 {self.data_file.name} 迁移为分片布局，原文件备份至 {backup.name}")
+
+    # ==================== 按需加载 ====================
+
+    def is_resident(self, course_id: str) -> bool:
+        """课程的视频列表是否已在内存中"""
+        return course_id in self._resident
+
+    def load_videos(self, course: dict, evict: bool = True) -> VideoTable:
+        """
+        确保课程的视频列表已加载，并把该课程标记为最近使用。
+
+        Args:
+            evict: 是否立即按 LRU 上限释放其他课程；数据迁移期间需要全部常驻，传 False
+        """
+        if "videos" in course:
+            self._resident[course["id"]] = None
+            self._resident.move_to_end(course["id"])
+        else:
+            self._read_shard(course)
+        if evict:
+            self._evict()
+        return course["videos"]
+
+    def video_summary(self, course: dict) -> VideoSummary:
+        """课程的视频聚合值：常驻时由视频列表计算，否则取清单中保存的值"""
+        if "videos" in course:
+            return course["videos"].summary()
+        summary = self._summaries.get(course["id"])
+        if summary is None:
+            summary = VideoSummary.from_videos(
+                safe_read_json(self._existing_shard_path(course["id"]), default={}).get("videos", []))
+            self._summaries[course["id"]] = summary
+        return summary
+
+    def _evict(self):
+        """
+        超过常驻上限时，按最久未使用的顺序释放视频列表。
+
+        只在写盘线程空闲时释放：已确认落盘的课程才能释放，写盘失败时课程重新变脏而不会被释放。
+        写盘线程忙时不等待，暂时超出上限，留待下次加载课程时再释放。
+        """
+        if self.max_resident is None or len(self._resident) <= self.max_resident:
+            return
+        if not self.writer.wait_idle(timeout=0):
+            return
+        self._wait_compaction()
+        courses = {c["id"]: c for c in self._data.get("courses", [])}
+        for course_id in list(self._resident)[:-1]:  # 最近使用的课程始终保留
+            if len(self._resident) <= self.max_resident:
+                break
+            if course_id in self._dirty_shards:
+                continue
+            course = courses.get(course_id)
+            if course is not None and "videos" in course:
+                self._summaries[course_id] = course.pop("videos").summary()
+            del self._resident[course_id]
+
+    # ==================== 保存 ====================
+
+    def save(self, data: dict = None):
+        """立即写出全部文件（数据迁移时使用）；未加载的视频列表在磁盘上保持不变"""
+        if data is not None:
+            self._data = data
+        self._manifest_dirty = True
+        self._meta_dirty = True
+        self._dirty_shards.update(c["id"] for c in self._data.get("courses", []) if "videos" in c)
+        self._write_dirty()
+        self._evict()
+
+    @property
+    def is_dirty(self) -> bool:
+        """是否存在尚未写入分片的日志记录"""
+        return self._dirty
+
+    def flush(self, wait: bool = True):
+        """
+        将日志压缩进分片（含此前后台写盘失败需要重写的文件）。
+
+        Args:
+            wait: 是否阻塞到写盘完成；False 时在后台压缩（定时器、页面切换使用，不阻塞界面）
+        """
+        if not wait:
+            self._compact_in_background()
+            return
+        self._wait_compaction()
+        if self._dirty:
+            self._write_dirty()
+
+    def close(self):
+        """写回分片，停止写盘线程并关闭日志文件"""
+        self.flush()
+        self.writer.close()
+        self.journal.close()
+
+    # ==================== 变更通知 ====================
+
+    def add_course(self, course: dict):
+        self._manifest_dirty = True
+        self._dirty_shards.add(course["id"])
+        self._resident[course["id"]] = None
+        self._write_dirty()
+        self._evict()
+
+    def update_course(self, course: dict):
+        self._manifest_dirty = True
+        self._write_dirty()
+
+    def replace_videos(self, course: dict):
+        """视频列表整体替换（重新同步课程文件夹）：重写该课程分片与清单，一次写盘"""
+        self._manifest_dirty = True
+        self._dirty_shards.add(course["id"])
+        self._summaries.pop(course["id"], None)
+        self._write_dirty()
+
+    def update_durations(self, course: dict, indexes: list):
+        """视频时长补全：标记该课程分片与清单，延迟写盘（随后的 flush 或压缩一并写出）"""
+        self._dirty_shards.add(course["id"])
+        self._manifest_dirty = True
+        self._summaries.pop(course["id"], None)
+        self._mark_dirty()
+
+    def delete_course(self, course_id: str):
+        self._manifest_dirty = True
+        self._dirty_shards.discard(course_id)
+        self._deleted_shards.add(course_id)
+        self._resident.pop(course_id, None)
+        self._summaries.pop(course_id, None)
+        self._write_dirty()
+
+    def set_setting(self, key: str, value):
+        self._meta_dirty = True
+        self._write_dirty()
+
+    def update_progress(self, course: dict, video: dict, day: str):
+        """视频进度变更：追加日志并标记该课程分片与清单，必要时后台压缩"""
+        self._append_journal(video_record(
+            course["id"], video, day, course.get("daily_stats", {}).get(day)))
+        self._dirty_shards.add(course["id"])
+        self._manifest_dirty = True
+        self._mark_dirty()
+
+    def log_activity(self, day: str, count: int):
+        """活动日志变更：追加日志（随后的进度更新负责触发压缩）"""
+        self._append_journal(activity_record(day, count))
+        self._meta_dirty = True
+
+    # ==================== 序列化 ====================
+
+    def _take_dirty_payloads(self) -> tuple[list, list]:
+        """
+        在当前线程序列化所有脏文件并清空脏集合。
+
+        Returns:
+            (payloads, deleted): payloads 为 [(path, bytes)]，清单排在最后作为提交点；
+            deleted 为待删除的分片路径
+        """
+        courses = {c["id"]: c for c in self._data.get("courses", [])}
+        payloads, deleted = [], []
+        for course_id in sorted(self._dirty_shards):
+            course = courses.get(course_id)
+            if course is not None and "videos" in course:
+                shard = {"videos": course["videos"].to_dicts()}
+                payloads.append((self.shard_path(course_id), encode(shard, self.shard_format)))
+                stale = self._stale_shards.pop(course_id, None)
+                if stale is not None:
+                    self._stale_in_flight[course_id] = stale
+                    deleted.append(stale)
+        if self._meta_dirty:
+            meta = {k: v for k, v in self._data.items() if k != "courses"}
+            payloads.append((self.meta_file, encode_json(meta)))
+        if self._manifest_dirty:
+            headers = []
+            for course in self._data.get("courses", []):
+                header = {k: v for k, v in course.items() if k not in SHARD_KEYS}
+                header[SUMMARY_KEY] = self.video_summary(course).to_dict()
+                headers.append(header)
+            manifest = {"layout": LAYOUT_SHARDED}
+            if self.schema_version is not None:
+                manifest["schema_version"] = self.schema_version
+            manifest["checksum"] = headers_checksum(headers)
+            manifest["courses"] = headers
+            payloads.append((self.data_file, encode_json(manifest)))
+        for course_id in self._deleted_shards:
+            self._stale_shards.pop(course_id, None)
+            deleted.extend(self.shard_path(course_id).with_suffix(suffix) for suffix in SHARD_SUFFIXES)
+
+        self._dirty_shards.clear()
+        self._deleted_shards.clear()
+        self._meta_dirty = False
+        self._manifest_dirty = False
+        return payloads, deleted
+
+    def _submit_payloads(self, payloads: list, deleted: list):
+        """
+        把快照交给写盘线程。
+
+        清单写入后再删除已移除课程的分片；全部写入成功后才删除已并入的日志段，
+        任一写入失败则保留日志段，并在下次写盘前把全部文件重新标记为脏。
+        """
+        for path, payload in payloads:
+            self.writer.submit(path, payload)
+        self.writer.call(lambda: self._discard_merged(deleted), on_failure=self._on_write_failed)
+
+    def _discard_merged(self, deleted: list):
+        """写盘线程：删除已移除课程的分片与已并入快照的日志段"""
+        for path in deleted:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self.journal.discard_rotated()
+
+    def _on_write_failed(self):
+        """写盘线程：记录失败，保留日志段待重放"""
+        self._write_failed = True
+        logger.error(f"快照写入失败，进度日志已保留: {self.writer.last_error}")
+
+    def _write_dirty(self):
+        """同步写出所有脏文件，并清空已并入的进度日志"""
+        self._wait_compaction()
+        self.journal.rotate()
+        payloads, deleted = self._take_dirty_payloads()
+        self._submit_payloads(payloads, deleted)
+        self._on_snapshot_written(payloads)
+        self.writer.flush()
+        if self._write_failed:
+            error = self.writer.last_error
+            self._wait_compaction()
+            raise error
+
+    def _on_snapshot_written(self, payloads: list):
+        """快照已生成：清除脏标记并记录 I/O 统计"""
+        self._dirty = False
+        self._last_save_at = self._monotonic()
+        self.io_stats["saves"] += 1
+        self.io_stats["files_written"] += len(payloads)
+        self.io_stats["bytes_written"] += sum(len(p) for _, p in payloads)
+
+    # ==================== 日志与压缩 ====================
+
+    def _append_journal(self, record: dict):
+        """追加一条进度日志，代价只与记录大小有关"""
+        self.io_stats["journal_bytes"] += self.journal.append(record)
+        self.io_stats["journal_records"] += 1
+
+    def _mark_dirty(self):
+        """标记分片已落后于日志；距上次压缩超过 save_interval 时在后台压缩"""
+        self._dirty = True
+        if self._monotonic() - self._last_save_at >= self.save_interval:
+            self._compact_in_background()
+
+    def _compact_in_background(self):
+        """
+        后台压缩日志。
+
+        脏分片在当前线程序列化（保证与内存数据一致），写盘交给写盘线程；
+        压缩期间产生的新记录写入新日志，不受影响。
+        上一次压缩尚未写完时不等待，脏标记保留到下次调用。
+        """
+        if not self.writer.wait_idle(timeout=0):
+            return
+        self._wait_compaction()
+        if not self._dirty:
+            return
+        self.journal.rotate()
+        payloads, deleted = self._take_dirty_payloads()
+        self._on_snapshot_written(payloads)
+        self._submit_payloads(payloads, deleted)
+
+    def _wait_compaction(self):
+        """等待写盘线程空闲；此前写入失败时把全部文件重新标记为脏，未删除的旧分片留待下次"""
+        self.writer.flush()
+        in_flight, self._stale_in_flight = self._stale_in_flight, {}
+        if self._write_failed:
+            self._write_failed = False
+            self._stale_shards.update(in_flight)
+            self._dirty = True
+            self._manifest_dirty = True
+            self._meta_dirty = True
+            self._dirty_shards.update(c["id"] for c in self._data.get("courses", []) if "videos" in c)
@@ -0,0 +1,57 @@
+"""学习计划日历运算 — 周计划的累计时长与完成日期，按整周 + 余数闭式计算
+
+周计划 weekly_schedule 为周一到周日每天的计划小时数。任意日期区间的计划累计
+= 整周数 × 周合计 + 余下几天在「从起始星期开始的前缀和」上的取值，
+耗时与区间长度无关，替代逐日循环。
+"""
+
+import math
+from datetime import date
+
+
+def weekday_prefix_sums(schedule: list, first_weekday: int) -> list:
+    """
+    从 first_weekday 开始连续 r 天的计划累计（r = 0..7）。
+
+    Returns:
+        长度为 8 的列表，prefix[r] 为前 r 天的计划小时数之和
+    """
+    prefix = [0.0]
+    for k in range(7):
+        prefix.append(prefix[-1] + schedule[(first_weekday + k) % 7])
+    return prefix
+
+
+def planned_hours(schedule: list, start: date, end: date) -> float:
+    """start 到 end（含两端）的计划累计小时数，end 早于 start 时为 0"""
+    days = (end - start).days + 1
+    if days <= 0:
+        return 0.0
+    weeks, rest = divmod(days, 7)
+    prefix = weekday_prefix_sums(schedule, start.weekday())
+    return weeks * prefix[7] + prefix[rest]
+
+
+def finish_offset(schedule: list, first_weekday: int, needed_hours: float, max_days: int) -> int | None:
+    """
+    从某天（星期 first_weekday）起按计划学习，累计达到 needed_hours 的是第几天（0 表示当天）。
+
+    与逐日模拟的口径一致：第 k 天的累计含当天计划；周合计须为正。
+
+    Returns:
+        天数偏移；需要 max_days 天或更久时返回 None
+    """
+    if needed_hours <= 0:
+        return 0
+    prefix = weekday_prefix_sums(schedule, first_weekday)
+    weekly = prefix[7]
+    peak = max(prefix[1:])  # 计划可含负值，一周内的累计峰值不一定在周末
+    # 第一个可能达到目标的周：weeks × 周合计 + 周内峰值 ≥ needed_hours
+    weeks = max(0, math.ceil((needed_hours - peak) / weekly))
+    while weeks > 0 and (weeks - 1) * weekly + peak >= needed_hours:
+        weeks -= 1
+    while weeks * weekly + peak < needed_hours:
+        weeks += 1
+    rest = next(r for r in range(1, 8) if weeks * weekly + prefix[r] >= needed_hours)
+    offset = weeks * 7 + rest - 1
+    return offset if offset + 1 < max_days else None
@@ -0,0 +1,104 @@
+"""学习计划预览 — 不落盘地计算某个周计划下的余额、剩余天数与预计完成日期
+
+计划编辑弹窗拖动滑块时，每一次取值都要重新计算结果。课程侧的输入（剩余时长、
+累计学习时长、学习天数、今天）在编辑期间不变，打包成 PlanInputs 一次取出；
+evaluate() 只做常数次运算（计划累计与完成日期均为闭式，见 models/plan_calendar.py），
+不读写 DataManager，可以在每个滑块刻度上调用。
+
+DataManager 的 get_course_balance / calculate_remaining_days / estimate_finish_date
+也使用本模块的函数，两边结果一致。
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from models.plan_calendar import planned_hours, finish_offset
+
+# 预计完成日期的推算上限（天）
+MAX_FINISH_DAYS = 365 * 5
+
+
+@dataclass
+class PlanInputs:
+    """预览所需的课程侧输入（编辑计划期间不变）"""
+
+    remaining_sec: float = 0.0  # 剩余视频时长
+    studied_sec: float = 0.0    # daily_stats 合计
+    studied_days: int = 0       # daily_stats 记录天数
+    today: date = None
+
+
+@dataclass
+class PlanPreview:
+    """某个周计划下的结果"""
+
+    balance_minutes: float = 0.0
+    remaining_days: int = 0
+    finish_date: str = "--"  # "YYYY-MM-DD" / "--" / "已完成"，同 estimate_finish_date
+
+    @property
+    def balance_hours(self) -> float:
+        return self.balance_minutes / 60.0
+
+
+def balance(schedule: list, start_date_iso: str, studied_sec: float, today: date) -> tuple:
+    """
+    学习余额（= 实际累计 - 计划累计）。
+
+    Returns:
+        (balance_minutes, actual_total_minutes, plan_total_minutes)，
+        无开始日期、尚未开始或计划全为 0 时均为 0
+    """
+    if not start_date_iso:
+        return 0.0, 0.0, 0.0
+    try:
+        start_date = datetime.fromisoformat(start_date_iso).date()
+    except (ValueError, TypeError):
+        return 0.0, 0.0, 0.0
+    if today < start_date or sum(schedule) < 0.1:
+        return 0.0, 0.0, 0.0
+
+    plan_total_hours = planned_hours(schedule, start_date, today)
+    actual_total_hours = studied_sec / 3600.0
+    return (
+        (actual_total_hours - plan_total_hours) * 60.0,
+        actual_total_hours * 60.0,
+        plan_total_hours * 60.0,
+    )
+
+
+def remaining_days(schedule: list, remaining_sec: float, studied_sec: float, studied_days: int) -> int:
+    """完成剩余视频所需天数：优先历史平均速度，其次周计划，兜底每天 1 小时"""
+    if remaining_sec <= 0:
+        return 0
+    if studied_days:
+        avg_daily_sec = studied_sec / studied_days
+        if avg_daily_sec > 60:  # 平均每天至少 1 分钟才有效
+            return max(1, int(remaining_sec / avg_daily_sec + 0.5))
+    weekly_hours = sum(schedule)
+    if weekly_hours > 0.1:
+        return max(1, int(remaining_sec / (weekly_hours / 7.0 * 3600.0) + 0.5))
+    return max(1, int(remaining_sec / 3600.0 + 0.5))
+
+
+def finish_date(schedule: list, remaining_sec: float, today: date) -> str:
+    """按周计划推算的预计完成日期 "YYYY-MM-DD"，无计划或超过推算上限为 "--" """
+    remaining_hours = remaining_sec / 3600.0
+    if remaining_hours <= 0:
+        return "已完成"
+    if sum(schedule) < 0.01:
+        return "--"
+    offset = finish_offset(schedule, today.weekday(), remaining_hours, max_days=MAX_FINISH_DAYS)
+    if offset is None:
+        return "--"
+    return (today + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+def evaluate(schedule: list, start_date_iso: str, inputs: PlanInputs) -> PlanPreview:
+    """计算 (schedule, start_date_iso) 下的余额、剩余天数与预计完成日期"""
+    return PlanPreview(
+        balance_minutes=balance(schedule, start_date_iso, inputs.studied_sec, inputs.today)[0],
+        remaining_days=remaining_days(schedule, inputs.remaining_sec,
+                                      inputs.studied_sec, inputs.studied_days),
+        finish_date=finish_date(schedule, inputs.remaining_sec, inputs.today),
+    )
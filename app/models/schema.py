@@ -0,0 +1,127 @@
+"""数据结构版本 — 按版本号依次执行的一次性迁移，以及课程头信息的校验与校验和"""
+
+import zlib
+from datetime import date
+from typing import Callable
+
+from utils.paths import PathManager
+from utils.serialization import FORMAT_JSON_COMPACT, encode
+from utils.logger import setup_logger
+
+logger = setup_logger("Schema", PathManager.LOG_DIR)
+
+# 当前数据结构版本。新增迁移步骤时加一，并用 @migration(新版本号) 注册
+SCHEMA_VERSION = 1
+
+# 迁移步骤注册表：目标版本 → 迁移函数
+MIGRATIONS: dict[int, Callable] = {}
+
+
+def migration(version: int):
+    """注册把数据从 version - 1 升级到 version 的迁移步骤"""
+    def register(fn):
+        MIGRATIONS[version] = fn
+        return fn
+    return register
+
+
+def migrate(data: dict, from_version: int, load_videos: Callable[[dict], list]) -> int:
+    """
+    依次执行 from_version 之后的全部迁移步骤。
+
+    Args:
+        data: 完整数据字典（课程可能尚未加载视频列表）
+        from_version: 存储中记录的版本号
+        load_videos: 加载并返回课程视频列表的函数，需要改写视频的步骤通过它读取
+
+    Returns:
+        迁移后的版本号
+    """
+    version = from_version
+    for target in sorted(v for v in MIGRATIONS if v > from_version):
+        MIGRATIONS[target](data, load_videos)
+        logger.info(f"数据结构已从版本 {version} 升级到 {target}")
+        version = target
+    return version
+
+
+# ==================== 迁移步骤 ====================
+
+@migration(1)
+def _backfill_fields(data: dict, load_videos):
+    """补全早期版本缺失的课程字段（视频字段由 VideoTable.from_dicts 在读取分片时补齐）"""
+    for course in data.get("courses", []):
+        course.setdefault("daily_stats", {})
+        course.setdefault("weekly_schedule", [0.0] * 7)
+        course.setdefault("start_date", None)
+
+
+# ==================== 校验 ====================
+
+def headers_checksum(headers: list) -> int:
+    """课程头信息的 CRC32，保存清单时写入，加载时比对以跳过深度校验"""
+    return zlib.crc32(encode(headers, FORMAT_JSON_COMPACT))
+
+
+def validate_headers(data: dict) -> bool:
+    """
+    深度校验课程头信息并就地修复（用于手工编辑过或校验和不符的文件）。
+
+    Returns:
+        是否有修改
+    """
+    changed = False
+    valid_courses = []
+    for course in data.get("courses", []):
+        if not isinstance(course, dict) or not isinstance(course.get("id"), str):
+            logger.warning(f"已忽略缺少 id 的课程记录: {course!r:.80}")
+            changed = True
+            continue
+        changed |= _validate_course(course)
+        valid_courses.append(course)
+    data["courses"] = valid_courses
+    return changed
+
+
+def _validate_course(course: dict) -> bool:
+    changed = False
+
+    for key, default in (("name", ""), ("path", "")):
+        if not isinstance(course.get(key), str):
+            course[key] = default if course.get(key) is None else str(course[key])
+            changed = True
+
+    for key in ("total_videos", "total_duration"):
+        if not _is_number(course.get(key)) or course[key] < 0:
+            course[key] = 0
+            changed = True
+
+    schedule = course.get("weekly_schedule")
+    if not isinstance(schedule, list) or len(schedule) != 7 or not all(_is_number(h) for h in schedule):
+        fixed = [h if _is_number(h) else 0.0 for h in schedule] if isinstance(schedule, list) else []
+        course["weekly_schedule"] = (fixed + [0.0] * 7)[:7]
+        changed = True
+
+    start = course.get("start_date")
+    if start is not None:
+        try:
+            date.fromisoformat(start[:10])
+        except (TypeError, ValueError):
+            course["start_date"] = None
+            changed = True
+
+    stats = course.get("daily_stats")
+    if not isinstance(stats, dict):
+        course["daily_stats"] = {}
+        changed = True
+    else:
+        bad = [day for day, sec in stats.items() if not _is_number(sec)]
+        for day in bad:
+            del stats[day]
+        changed |= bool(bad)
+
+    return changed
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,307 @@
+"""SQLite 存储后端 — 可选的持久化实现，进度更新为单行 UPDATE，每次变更独立提交"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from utils.paths import PathManager
+from utils.logger import setup_logger
+from models.course_stats import VideoSummary
+from models.video_table import VideoTable, file_key, to_epoch
+
+logger = setup_logger("SqliteStore", PathManager.LOG_DIR)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id              TEXT PRIMARY KEY,
+    position        INTEGER NOT NULL,
+    name            TEXT NOT NULL,
+    path            TEXT NOT NULL,
+    added_at        TEXT,
+    total_videos    INTEGER NOT NULL DEFAULT 0,
+    total_duration  REAL NOT NULL DEFAULT 0,
+    start_date      TEXT,
+    weekly_schedule TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_courses_path ON courses(path);
+
+CREATE TABLE IF NOT EXISTS videos (
+    course_id        TEXT NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    position         INTEGER NOT NULL,
+    rel_path         TEXT NOT NULL,
+    duration         REAL NOT NULL DEFAULT 0,
+    watched_duration REAL NOT NULL DEFAULT 0,
+    completed        INTEGER NOT NULL DEFAULT 0,
+    last_watched     TEXT,
+    size             INTEGER,
+    mtime_ns         INTEGER,
+    PRIMARY KEY (course_id, rel_path)
+);
+CREATE INDEX IF NOT EXISTS idx_videos_course ON videos(course_id, position);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    course_id TEXT NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    day       TEXT NOT NULL,
+    seconds   REAL NOT NULL,
+    PRIMARY KEY (course_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS activity_log (
+    day   TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 在早期数据库上补建的列：列名 → 类型
+ADDED_VIDEO_COLUMNS = {"size": "INTEGER", "mtime_ns": "INTEGER"}
+
+
+class SqliteStore:
+    """
+    SQLite 存储（WAL 模式）。
+
+    与 JsonStore 提供相同的变更通知接口，DataManager 的公共方法不受后端影响。
+    每次变更都在独立事务中提交，无需延迟写回。
+    """
+
+    def __init__(self, db_file: Path):
+        """
+        Args:
+            db_file: 数据库文件路径（courses.db）
+        """
+        self.db_file = Path(db_file)
+        self.io_stats = {"saves": 0, "bytes_written": 0, "journal_records": 0, "journal_bytes": 0}
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        self.conn.commit()
+
+    # ==================== 导入 ====================
+
+    @classmethod
+    def import_json(cls, json_file: Path, db_file: Path, **json_options) -> "SqliteStore":
+        """
+        一次性把 JSON 存储导入到新的 SQLite 数据库。
+
+        经由 JsonStore 读取，分片布局的清单、课程分片、meta.json 与尚未压缩的进度日志都会导入
+        （旧版单文件同样适用），并沿用其数据结构版本。
+
+        Args:
+            json_options: 转发给 JsonStore 的参数（shard_dir、meta_file、shard_format）
+        """
+        from models.json_store import JsonStore
+
+        source = JsonStore(json_file, save_interval=0, max_resident=None, **json_options)
+        try:
+            data = source.load()
+        finally:
+            source.close()
+        store = cls(db_file)
+        store.save(data)
+        store.schema_version = source.schema_version or 0
+        logger.info(f"已从 {json_file} 导入 {len(data.get('courses', []))} 门课程到 {db_file}")
+        return store
+
+    # ==================== 加载/保存 ====================
+
+    def load(self) -> dict:
+        """把数据库内容组装为与 courses.json 相同结构的字典"""
+        courses = {}
+        for row in self.conn.execute(
+                "SELECT id, name, path, added_at, total_videos, total_duration, "
+                "start_date, weekly_schedule FROM courses ORDER BY position"):
+            courses[row[0]] = {
+                "id": row[0],
+                "name": row[1],
+                "path": row[2],
+                "added_at": row[3],
+                "total_videos": row[4],
+                "total_duration": row[5],
+                "start_date": row[6],
+                "weekly_schedule": json.loads(row[7]),
+                "daily_stats": {},
+                "videos": VideoTable(),
+            }
+        for course_id, rel_path, duration, watched, completed, last_watched, size, mtime in self.conn.execute(
+                "SELECT course_id, rel_path, duration, watched_duration, completed, last_watched, "
+                "size, mtime_ns FROM videos ORDER BY course_id, position"):
+            courses[course_id]["videos"].append(
+                rel_path, duration, watched, bool(completed), to_epoch(last_watched),
+                (size, mtime) if size is not None and mtime is not None else None)
+        for course_id, day, seconds in self.conn.execute(
+                "SELECT course_id, day, seconds FROM daily_stats ORDER BY day"):
+            courses[course_id]["daily_stats"][day] = seconds
+
+        data = {"courses": list(courses.values())}
+        activity = dict(self.conn.execute("SELECT day, count FROM activity_log ORDER BY day"))
+        if activity:
+            data["activity_log"] = activity
+        settings = {k: json.loads(v) for k, v in self.conn.execute("SELECT key, value FROM settings")}
+        if settings:
+            data["settings"] = settings
+        return data
+
+    def save(self, data: dict):
+        """用完整数据替换数据库内容（导入与数据迁移时使用）"""
+        with self.conn:
+            self.conn.execute("DELETE FROM courses")
+            self.conn.execute("DELETE FROM activity_log")
+            self.conn.execute("DELETE FROM settings")
+            for position, course in enumerate(data.get("courses", [])):
+                self._insert_course(course, position)
+            self.conn.executemany(
+                "INSERT INTO activity_log (day, count) VALUES (?, ?)",
+                data.get("activity_log", {}).items())
+            self.conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?)",
+                ((k, json.dumps(v, ensure_ascii=False)) for k, v in data.get("settings", {}).items()))
+        self.io_stats["saves"] += 1
+
+    @property
+    def is_dirty(self) -> bool:
+        return False
+
+    def flush(self, wait: bool = True):
+        """每次变更已提交，无需额外写回"""
+
+    def close(self):
+        self.conn.close()
+
+    # ==================== 按需加载 ====================
+
+    def load_videos(self, course: dict, evict: bool = True) -> VideoTable:
+        """视频列表随 load() 全部加载"""
+        return course["videos"]
+
+    # ==================== 数据结构版本 ====================
+
+    @property
+    def schema_version(self) -> int:
+        """数据结构版本，保存在 PRAGMA user_version 中"""
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    @schema_version.setter
+    def schema_version(self, version: int):
+        self.conn.execute(f"PRAGMA user_version = {int(version)}")
+        self.conn.commit()
+
+    @property
+    def headers_intact(self) -> bool:
+        """列类型由数据库约束，无需深度校验"""
+        return True
+
+    def video_summary(self, course: dict) -> VideoSummary:
+        return course["videos"].summary()
+
+    # ==================== 变更通知 ====================
+
+    def add_course(self, course: dict):
+        with self.conn:
+            position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM courses").fetchone()[0]
+            self._insert_course(course, position)
+
+    def update_course(self, course: dict):
+        """更新课程头信息（名称、计划、开始日期、总计）"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE courses SET name = ?, path = ?, total_videos = ?, total_duration = ?, "
+                "start_date = ?, weekly_schedule = ? WHERE id = ?",
+                (course["name"], course["path"], course.get("total_videos", 0),
+                 course.get("total_duration", 0), course.get("start_date"),
+                 json.dumps(course.get("weekly_schedule", [0.0] * 7)), course["id"]))
+
+    def replace_videos(self, course: dict):
+        """视频列表整体替换（重新同步课程文件夹）：在一个事务中重写该课程的视频行与总计"""
+        with self.conn:
+            self.conn.execute("DELETE FROM videos WHERE course_id = ?", (course["id"],))
+            self._insert_videos(course)
+            self.conn.execute(
+                "UPDATE courses SET total_videos = ?, total_duration = ? WHERE id = ?",
+                (course.get("total_videos", 0), course.get("total_duration", 0), course["id"]))
+
+    def update_durations(self, course: dict, indexes: list):
+        """视频时长补全：按位置批量 UPDATE 视频行并更新课程总时长"""
+        videos = course["videos"]
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE videos SET duration = ? WHERE course_id = ? AND position = ?",
+                ((videos.durations[i], course["id"], i) for i in indexes))
+            self.conn.execute("UPDATE courses SET total_duration = ? WHERE id = ?",
+                              (course.get("total_duration", 0), course["id"]))
+
+    def delete_course(self, course_id: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+
+    def set_setting(self, key: str, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value, ensure_ascii=False)))
+
+    def update_progress(self, course: dict, video: dict, day: str):
+        """视频进度变更：一行 UPDATE + 当日统计 UPSERT"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE videos SET watched_duration = ?, completed = ?, last_watched = ? "
+                "WHERE course_id = ? AND rel_path = ?",
+                (video.get("watched_duration", 0), int(video.get("completed", False)),
+                 video.get("last_watched"), course["id"], video["rel_path"]))
+            seconds = course.get("daily_stats", {}).get(day)
+            if seconds is not None:
+                self.conn.execute(
+                    "INSERT INTO daily_stats (course_id, day, seconds) VALUES (?, ?, ?) "
+                    "ON CONFLICT(course_id, day) DO UPDATE SET seconds = excluded.seconds",
+                    (course["id"], day, seconds))
+        self.io_stats["journal_records"] += 1
+
+    def log_activity(self, day: str, count: int):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO activity_log (day, count) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET count = excluded.count",
+                (day, count))
+
+    # ==================== 内部 ====================
+
+    def _insert_course(self, course: dict, position: int):
+        self.conn.execute(
+            "INSERT INTO courses (id, position, name, path, added_at, total_videos, "
+            "total_duration, start_date, weekly_schedule) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (course["id"], position, course["name"], course["path"], course.get("added_at"),
+             course.get("total_videos", 0), course.get("total_duration", 0),
+             course.get("start_date"), json.dumps(course.get("weekly_schedule", [0.0] * 7))))
+        self._insert_videos(course)
+        self.conn.executemany(
+            "INSERT INTO daily_stats (course_id, day, seconds) VALUES (?, ?, ?)",
+            ((course["id"], day, seconds) for day, seconds in course.get("daily_stats", {}).items()))
+
+    def _insert_videos(self, course: dict):
+        videos = course.get("videos", [])
+        if isinstance(videos, VideoTable):
+            keys = [videos.file_key(i) for i in range(len(videos))]
+        else:
+            keys = [file_key(v) for v in videos]
+        self.conn.executemany(
+            "INSERT INTO videos (course_id, position, rel_path, duration, watched_duration, "
+            "completed, last_watched, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((course["id"], i, v["rel_path"], v.get("duration", 0), v.get("watched_duration", 0),
+              int(v.get("completed", False)), v.get("last_watched"), *(key or (None, None)))
+             for i, (v, key) in enumerate(zip(videos, keys))))
+
+    def _add_missing_columns(self):
+        """早期数据库的 videos 表没有文件键列，补建为 NULL（未知）"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(videos)")}
+        for column, column_type in ADDED_VIDEO_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE videos ADD COLUMN {column} {column_type}")
@@ -0,0 +1,47 @@
+"""统计缓存 — 按版本键记忆课程统计与卡片数据
+
+每个条目以 (名称, 课程 ID) 定位，并保存计算时的版本键（课程版本号、今天的日期等）。
+读取时版本键相同即命中；课程变更（版本号递增）或跨日后版本键不同，自动重新计算。
+缓存的对象在调用方之间共享，只应读取。
+"""
+
+
+class StatsCache:
+    """带命中/未命中计数的版本键缓存"""
+
+    def __init__(self):
+        self._entries: dict[tuple, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, course_id, key: tuple, compute):
+        """
+        读取缓存值，版本键不符或不存在时调用 compute() 计算并保存。
+
+        Args:
+            name: 缓存项名称（"stats" / "card"）
+            course_id: 课程 ID，全局值传 None
+            key: 版本键
+            compute: 无参计算函数
+        """
+        entry = self._entries.get((name, course_id))
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        self._entries[(name, course_id)] = (key, value)
+        return value
+
+    def discard(self, course_id: str):
+        """删除某门课程的全部条目"""
+        for entry in [k for k in self._entries if k[1] == course_id]:
+            del self._entries[entry]
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def info(self) -> dict:
+        """命中统计 {"hits", "misses", "entries"}"""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
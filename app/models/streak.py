@@ -0,0 +1,59 @@
+"""连续学习天数 — 基于 activity_log 的增量状态机
+
+activity_log 为 {"YYYY-MM-DD": 完成视频数}，计数大于 0 的日期为活跃日。
+StreakTracker 只保存最近一段连续活跃日（结束日期与长度）和历史最长连续天数：
+加载时由 activity_log 重建一次，之后每记录一个活跃日 O(1) 更新；
+当前连续天数按「今天」计算，跨日后无需任何更新。
+"""
+
+from datetime import date, timedelta
+
+
+class StreakTracker:
+    """连续学习天数状态机"""
+
+    __slots__ = ("last_active", "run_length", "longest")
+
+    def __init__(self):
+        self.last_active: date | None = None  # 最近一个活跃日
+        self.run_length = 0                   # 截至 last_active 的连续活跃天数
+        self.longest = 0                      # 历史最长连续天数
+
+    @classmethod
+    def from_log(cls, activity_log: dict) -> "StreakTracker":
+        """由 activity_log 重建，无法解析的日期键被忽略"""
+        days = []
+        for key, count in activity_log.items():
+            if not count or count <= 0:
+                continue
+            try:
+                days.append(date.fromisoformat(key))
+            except (TypeError, ValueError):
+                continue
+        tracker = cls()
+        for day in sorted(days):
+            tracker.record(day)
+        return tracker
+
+    def record(self, day: date) -> bool:
+        """
+        记录一个活跃日。
+
+        Returns:
+            False 表示 day 早于最近活跃日（如系统时钟回拨），状态无法增量更新，需要重建
+        """
+        if self.last_active is not None and day <= self.last_active:
+            return day == self.last_active
+        if self.last_active is not None and day == self.last_active + timedelta(days=1):
+            self.run_length += 1
+        else:
+            self.run_length = 1
+        self.last_active = day
+        self.longest = max(self.longest, self.run_length)
+        return True
+
+    def current(self, today: date) -> int:
+        """截至 today 的连续天数：今天或昨天活跃时延续最近一段，否则为 0"""
+        if self.last_active is None or (today - self.last_active).days not in (0, 1):
+            return 0
+        return self.run_length
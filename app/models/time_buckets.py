@@ -0,0 +1,63 @@
+"""时间分桶 — 按日 / ISO 周 / 自然月划分日期区间（学习时长报表）
+
+buckets() 把查询区间切成若干桶，每个桶给出自然边界与落在查询区间内的部分。
+配合 DailyIndex 的前缀和，每个桶的合计 O(1)：查询代价与桶数成正比，与天数无关，
+前缀和随进度写入增量维护，不需要另存周表、月表。
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+GRANULARITIES = ("day", "week", "month")
+
+
+@dataclass
+class StudyBucket:
+    """一个时间桶的学习时长"""
+
+    start: date           # 桶的第一天（周一 / 每月 1 日）
+    end: date             # 桶的最后一天（周日 / 月末）
+    seconds: float = 0.0  # 查询区间内落在该桶的学习秒数
+
+    @property
+    def hours(self) -> float:
+        return self.seconds / 3600.0
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """day 所在桶的第一天"""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"未知的时间粒度: {granularity}")
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    """下一个桶的第一天"""
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(weeks=1)
+    if granularity == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    raise ValueError(f"未知的时间粒度: {granularity}")
+
+
+def buckets(start: date, end: date, granularity: str) -> list:
+    """
+    覆盖 start 到 end（含两端）的全部桶。
+
+    Returns:
+        [(桶第一天, 桶最后一天, 区间内首日, 区间内末日)]，首尾两个桶可能只有部分在区间内
+    """
+    result = []
+    first = bucket_start(start, granularity)
+    while first <= end:
+        following = next_bucket(first, granularity)
+        last = following - timedelta(days=1)
+        result.append((first, last, max(first, start), min(last, end)))
+        first = following
+    return result
@@ -0,0 +1,224 @@
+"""视频进度表 — 一门课程视频列表的紧凑内存表示（列式存储）
+
+每个视频原本是一个五键字典，5 万个视频时仅字典本身就占用数百字节/个，
+聚合统计也要逐个访问字典。VideoTable 按列保存：
+
+    rel_paths     list[str]        驻留（sys.intern）的相对路径
+    durations     array('d')       视频时长（秒）
+    watched       array('d')       已观看时长（秒）
+    completed     bytearray        完成位图，每个视频 1 bit
+    last_watched  array('d')       最近观看时间（Unix 秒，NaN 表示从未观看）
+    sizes         array('q')       扫描时的文件大小（字节，-1 表示未知）
+    mtimes        array('q')       扫描时的文件修改时间（纳秒，-1 表示未知）
+
+表按行下标访问返回只读的 VideoView（Mapping），键与原视频字典相同，
+VideoItemWidget 等只读取视频字典的代码无需修改；进度只能经由 set_progress() 修改。
+磁盘格式：to_dicts() 输出与原视频字典相同的结构（last_watched 为 ISO 字符串），
+文件键已知时额外带 size / mtime_ns，重新同步课程时据此跳过未变化的文件。
+"""
+
+import math
+import sys
+from array import array
+from itertools import compress
+from collections.abc import Mapping
+from datetime import datetime
+
+from models.course_stats import VideoSummary
+
+VIDEO_KEYS = ("rel_path", "duration", "watched_duration", "completed", "last_watched")
+
+_NEVER = math.nan
+
+# 完成位图的一个字节 → 8 个「未完成」标志字节，供 itertools.compress 按列筛选
+_PENDING_FLAGS = [bytes((b >> k & 1) ^ 1 for k in range(8)) for b in range(256)]
+
+
+def to_epoch(value) -> float:
+    """last_watched（ISO 字符串 / Unix 秒 / None）→ 整秒 Unix 时间，无效值返回 NaN"""
+    if value is None:
+        return _NEVER
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(math.floor(value)) if math.isfinite(value) else _NEVER
+    try:
+        return float(math.floor(datetime.fromisoformat(value).timestamp()))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return _NEVER
+
+
+def file_key(video: dict) -> tuple | None:
+    """视频字典中的文件键 (size, mtime_ns)，缺失或无效时为 None"""
+    size, mtime = video.get("size"), video.get("mtime_ns")
+    if isinstance(size, int) and isinstance(mtime, int) and size >= 0 and mtime >= 0:
+        return size, mtime
+    return None
+
+
+def from_epoch(seconds: float) -> str | None:
+    """Unix 秒 → 本地时间 ISO 字符串，NaN 返回 None"""
+    if math.isnan(seconds):
+        return None
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+class VideoTable:
+    """一门课程的视频列表（列式存储），行顺序即视频顺序"""
+
+    __slots__ = ("rel_paths", "durations", "watched", "completed", "last_watched", "sizes", "mtimes",
+                 "_index")
+
+    def __init__(self):
+        self.rel_paths: list[str] = []
+        self.durations = array("d")
+        self.watched = array("d")
+        self.completed = bytearray()
+        self.last_watched = array("d")
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self._index: dict[str, int] | None = None
+
+    # ==================== 构造/导出 ====================
+
+    @classmethod
+    def from_dicts(cls, videos) -> "VideoTable":
+        """由视频字典列表构造，缺失的进度字段取默认值（未观看、未完成），缺失的文件键为未知"""
+        table = cls()
+        for video in videos:
+            table.append(video["rel_path"], video.get("duration", 0),
+                         video.get("watched_duration", 0), video.get("completed", False),
+                         to_epoch(video.get("last_watched")), file_key(video))
+        return table
+
+    def to_dicts(self) -> list:
+        """导出为视频字典列表（保存分片时使用），文件键已知的视频带 size / mtime_ns"""
+        videos = []
+        for i, view in enumerate(self):
+            video = dict(view)
+            if self.sizes[i] >= 0:
+                video["size"] = self.sizes[i]
+                video["mtime_ns"] = self.mtimes[i]
+            videos.append(video)
+        return videos
+
+    def append(self, rel_path: str, duration: float = 0.0, watched: float = 0.0,
+               completed: bool = False, last_watched: float = _NEVER, key: tuple | None = None):
+        """在末尾追加一个视频；key 为扫描时的文件键 (size, mtime_ns)，None 表示未知"""
+        i = len(self.rel_paths)
+        rel_path = sys.intern(rel_path)
+        self.rel_paths.append(rel_path)
+        self.durations.append(duration or 0.0)
+        self.watched.append(watched or 0.0)
+        self.last_watched.append(last_watched)
+        size, mtime = key if key is not None else (-1, -1)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        if i % 8 == 0:
+            self.completed.append(0)
+        if completed:
+            self.completed[i >> 3] |= 1 << (i & 7)
+        if self._index is not None:
+            self._index.setdefault(rel_path, i)
+
+    # ==================== 访问 ====================
+
+    def __len__(self) -> int:
+        return len(self.rel_paths)
+
+    def __getitem__(self, i: int) -> "VideoView":
+        if i < 0:
+            i += len(self.rel_paths)
+        if not 0 <= i < len(self.rel_paths):
+            raise IndexError("视频下标越界")
+        return VideoView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.rel_paths)):
+            yield VideoView(self, i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, VideoTable):
+            other = other.to_dicts()
+        if not isinstance(other, list):
+            return NotImplemented
+        return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"<VideoTable {len(self)} videos>"
+
+    def index_of(self, rel_path: str) -> int | None:
+        """按相对路径查找行下标（首次调用时建立索引），找不到返回 None"""
+        if self._index is None:
+            self._index = {}
+            for i, rel in enumerate(self.rel_paths):
+                self._index.setdefault(rel, i)
+        return self._index.get(rel_path)
+
+    def is_completed(self, i: int) -> bool:
+        return bool(self.completed[i >> 3] >> (i & 7) & 1)
+
+    def file_key(self, i: int) -> tuple | None:
+        """第 i 个视频扫描时的文件键 (size, mtime_ns)，未知时为 None"""
+        if self.sizes[i] < 0:
+            return None
+        return self.sizes[i], self.mtimes[i]
+
+    # ==================== 修改 ====================
+
+    def set_progress(self, i: int, watched: float, completed: bool, last_watched: float):
+        """写入第 i 个视频的进度（last_watched 为 Unix 秒）"""
+        self.watched[i] = watched
+        if completed:
+            self.completed[i >> 3] |= 1 << (i & 7)
+        else:
+            self.completed[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+        self.last_watched[i] = to_epoch(last_watched)
+
+    # ==================== 聚合 ====================
+
+    def completed_count(self) -> int:
+        return int.from_bytes(self.completed, "little").bit_count()
+
+    def summary(self) -> VideoSummary:
+        """视频聚合值，逐列计算，不创建视频字典"""
+        pending = b"".join(_PENDING_FLAGS[b] for b in self.completed)
+        remaining = sum(duration - watched for duration, watched
+                        in compress(zip(self.durations, self.watched), pending) if duration > watched)
+        return VideoSummary(video_count=len(self.rel_paths),
+                            completed_videos=self.completed_count(),
+                            watched_sec=sum(self.watched),
+                            remaining_sec=remaining)
+
+
+class VideoView(Mapping):
+    """VideoTable 中一行的只读字典视图，读取的始终是表中的最新值"""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: VideoTable, i: int):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, key: str):
+        table, i = self._table, self._i
+        if key == "rel_path":
+            return table.rel_paths[i]
+        if key == "duration":
+            return table.durations[i]
+        if key == "watched_duration":
+            return table.watched[i]
+        if key == "completed":
+            return table.is_completed(i)
+        if key == "last_watched":
+            return from_epoch(table.last_watched[i])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(VIDEO_KEYS)
+
+    def __len__(self) -> int:
+        return len(VIDEO_KEYS)
+
+    def __repr__(self) -> str:
+        return f"VideoView({dict(self)!r})"
@@ -0,0 +1,56 @@
+"""时钟服务 — 在本地午夜发出 date_changed 信号，按日期缓存的数据据此失效"""
+
+from datetime import date
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from utils.clock import Clock, default_clock
+
+
+class ClockService(QObject):
+    """包装一个 Clock，定时器在每个本地午夜触发，日期变化时发出 date_changed"""
+
+    date_changed = Signal(object)  # 新的日期 (datetime.date)
+
+    # 定时器在午夜后多等一会儿再读时间，避免系统时钟误差导致提前触发
+    MIDNIGHT_MARGIN_MS = 1000
+    # QTimer 按单调时钟计时，系统休眠期间停走；定期重新检查，唤醒后最迟这么久发现日期变化
+    MAX_CHECK_INTERVAL_MS = 60_000
+
+    def __init__(self, clock: Clock = None, parent=None):
+        """
+        Args:
+            clock: 被包装的时钟，None 时使用默认时钟（与 DataManager 共用同一实例）
+        """
+        super().__init__(parent)
+        self.clock = clock or default_clock()
+        self._date = self.clock.today()  # 最近一次通知的日期
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.check_date)
+        self._schedule()
+
+    def today(self) -> date:
+        """今天的日期（缓存）"""
+        return self.clock.today()
+
+    def today_key(self) -> str:
+        """今天的日期键 "YYYY-MM-DD" """
+        return self.clock.today_key()
+
+    def check_date(self):
+        """
+        日期与上次通知的不同时发出 date_changed，之后重新安排下一个午夜。
+
+        时钟可能已被其他调用方在午夜后刷新过，因此与上次通知的日期比较，而不是看 refresh() 的返回值。
+        """
+        self.clock.refresh()
+        today = self.clock.today()
+        if today != self._date:
+            self._date = today
+            self.date_changed.emit(today)
+        self._schedule()
+
+    def _schedule(self):
+        ms = int(self.clock.seconds_until_midnight() * 1000) + self.MIDNIGHT_MARGIN_MS
+        self._timer.start(min(ms, self.MAX_CHECK_INTERVAL_MS))
@@ -0,0 +1,164 @@
+"""探测缓存 — 把视频时长按 (绝对路径, 文件大小, 修改时间) 保存在 SQLite 中
+
+重新添加已删除的课程或扫描有重叠的目录时，未变化的文件只需一次 stat 即可取得时长，
+不必再用 TinyTag 读取容器头。文件大小或修改时间（纳秒）变化后旧条目自然失效。
+
+条目数超过上限时按最近使用顺序淘汰（LRU）：每个条目记录最后一次命中或写入时的序号，
+淘汰序号最小的条目；条目数保存在内存中，写入时无需 COUNT(*) 全表扫描。
+连接可跨线程使用（扫描在 ScanThread 中进行），操作由锁串行化。
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+
+from utils.paths import PathManager
+from utils.logger import setup_logger
+
+logger = setup_logger("ProbeCache", PathManager.LOG_DIR)
+
+# 默认最多保存的条目数（每条约 100 字节）
+DEFAULT_MAX_ENTRIES = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    used     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_probes_used ON probes(used);
+"""
+
+
+class ProbeCache:
+    """(path, size, mtime_ns) → 时长 的持久化 LRU 缓存"""
+
+    def __init__(self, db_file: Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            db_file: 数据库文件路径（PathManager.PROBE_CACHE_DB）
+            max_entries: 条目数上限，超出时淘汰最久未使用的条目
+        """
+        self.db_file = Path(db_file)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._tick = self.conn.execute("SELECT COALESCE(MAX(used), 0) FROM probes").fetchone()[0]
+        self._count = self._count_rows()
+
+    def _count_rows(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+
+    # ==================== 查询 ====================
+
+    def get(self, path: str, size: int, mtime_ns: int) -> float | None:
+        """单个文件的缓存时长，未命中（或文件已变化）返回 None"""
+        return self.get_many([(path, size, mtime_ns)]).get(path)
+
+    def get_many(self, keys: list) -> dict:
+        """
+        批量查询，命中的条目标记为最近使用。
+
+        Args:
+            keys: [(path, size, mtime_ns)]
+
+        Returns:
+            {path: duration}，只含命中的文件
+        """
+        found = {}
+        with self._lock:
+            try:
+                for path, size, mtime_ns in keys:
+                    row = self.conn.execute(
+                        "SELECT duration FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                        (path, size, mtime_ns)).fetchone()
+                    if row is not None:
+                        found[path] = row[0]
+                if found:
+                    self._tick += 1
+                    self.conn.executemany("UPDATE probes SET used = ? WHERE path = ?",
+                                          [(self._tick, path) for path in found])
+                    self.conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"读取探测缓存失败: {e}")
+                found = {}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ==================== 写入 ====================
+
+    def put(self, path: str, size: int, mtime_ns: int, duration: float):
+        self.put_many([(path, size, mtime_ns, duration)])
+
+    def put_many(self, entries: list):
+        """
+        批量写入（同一路径的旧条目被替换），超出上限时淘汰最久未使用的条目。
+
+        Args:
+            entries: [(path, size, mtime_ns, duration)]
+        """
+        if not entries:
+            return
+        with self._lock:
+            try:
+                self._tick += 1
+                rows = [(size, mtime_ns, duration, self._tick, path)
+                        for path, size, mtime_ns, duration in entries]
+                # 先插入新路径（rowcount 即新增条数），再覆盖已有路径
+                inserted = self.conn.executemany(
+                    "INSERT OR IGNORE INTO probes (size, mtime_ns, duration, used, path) "
+                    "VALUES (?, ?, ?, ?, ?)", rows).rowcount
+                self.conn.executemany(
+                    "UPDATE probes SET size = ?, mtime_ns = ?, duration = ?, used = ? WHERE path = ?", rows)
+                self._count += inserted
+                excess = self._count - self.max_entries
+                if excess > 0:
+                    self._count -= self.conn.execute(
+                        "DELETE FROM probes WHERE path IN "
+                        "(SELECT path FROM probes ORDER BY used LIMIT ?)", (excess,)).rowcount
+                self.conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"写入探测缓存失败: {e}")
+                self.conn.rollback()
+                self._count = self._count_rows()
+
+    # ==================== 失效 ====================
+
+    def invalidate(self, path: str):
+        """删除单个文件的条目"""
+        with self._lock:
+            self._count -= self.conn.execute("DELETE FROM probes WHERE path = ?", (path,)).rowcount
+            self.conn.commit()
+
+    def invalidate_tree(self, root: str):
+        """删除某个目录下全部文件的条目（强制重新扫描该目录）"""
+        prefix = root.rstrip("/\\")
+        with self._lock:
+            for sep in ("/", "\\"):
+                # [prefix + sep, prefix + 下一个字符) 恰好是以 prefix + sep 开头的全部路径
+                self._count -= self.conn.execute(
+                    "DELETE FROM probes WHERE path >= ? AND path < ?",
+                    (prefix + sep, prefix + chr(ord(sep) + 1))).rowcount
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM probes")
+            self.conn.commit()
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
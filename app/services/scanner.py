@@ -1,88 +1,379 @@
-"""视频扫描器 — 递归扫描目录中的视频文件，获取时长等元数据"""
+"""视频扫描器 — 递归扫描目录中的视频文件，获取时长等元数据
+
+iter_scan() 是流式接口：用 os.scandir 遍历目录，边发现边分批产出视频条目，
+遍历结束后再分批产出时长，调用方无需等待整个扫描完成；scan_directory() 在其上汇总结果。
+
+TinyTag 是纯 Python 实现，逐个读取元数据时会与 GUI 线程争用 GIL。文件较多时
+按块分发到进程池并行读取（workers 默认取 CPU 核数），结果仍按遍历顺序排列。
+设置了 VideoScanner.probe_cache 时先按 (路径, 大小, 修改时间) 查缓存，只读取未命中的文件；
+重新同步课程时调用方另可传入课程中保存的文件键（known），未变化的文件即使没有缓存也不再读取。
+
+扫描可通过 CancelToken 协作式取消：遍历每个目录、读取每个文件之前检查取消标志，
+进程池中的工作进程同样在文件之间检查，取消后约 CANCEL_POLL_INTERVAL 秒内停止并释放工作进程。
+"""
 
 import os
 import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 
 from tinytag import TinyTag
 
 from utils.paths import PathManager
 from utils.logger import setup_logger
+from services.probe_cache import ProbeCache
 
 logger = setup_logger("VideoScanner", PathManager.LOG_DIR)
 
 # 支持的视频扩展名
 VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv', '.webm', '.m4v', '.ts', '.m2ts')
 
+# 并行读取时长的默认进程数（设置项 "scan_workers" 未设置时使用）
+DEFAULT_WORKERS = os.cpu_count() or 1
+# 文件数少于此值时串行读取：启动进程池的开销大于并行收益
+PARALLEL_MIN_FILES = 64
+# 每个任务读取的文件数：太小则进程间通信开销大，太大则进度更新不及时
+PROBE_CHUNK_SIZE = 16
+# 每个工作进程最多排队的任务数：限制超大目录树扫描时在途的任务与结果
+MAX_PENDING_CHUNKS_PER_WORKER = 2
+# iter_scan() 每批产出的条目数
+SCAN_BATCH_SIZE = 256
+# 并行读取时检查取消标志的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.1
+
+# ScanBatch.kind
+FOUND = "found"    # 新发现的视频
+PROBED = "probed"  # 已取得时长的视频
+
+
+@dataclass
+class ScanBatch:
+    """iter_scan() 产出的一批结果"""
+
+    kind: str    # FOUND / PROBED
+    items: list  # FOUND：[{"rel_path", "abs_path", "duration": 0.0, "size", "mtime_ns"}]，按遍历顺序
+                 # （无法 stat 的文件没有 size / mtime_ns）；PROBED：[(下标, 时长)]
+    done: int    # 截至本批已发现（FOUND）/ 已取得时长（PROBED）的视频数
+    total: int | None = None  # 视频总数；FOUND 阶段只在最后一批（遍历结束）给出，此前为 None
+
+
+class CancelToken:
+    """扫描的协作式取消标志，可在任意线程调用 cancel()"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+# 工作进程中的取消事件，由 _init_worker 在进程启动时设置
+_worker_cancel = None
+
+
+def _init_worker(cancel_event):
+    global _worker_cancel
+    _worker_cancel = cancel_event
+
+
+def _probe_chunk(paths: list) -> list:
+    """
+    在工作进程中读取一块文件的时长（模块级函数，可被 pickle；不访问探测缓存）。
+
+    取消事件被设置后不再读取剩余文件，返回的列表只含已读取的前若干个。
+    """
+    durations = []
+    for path in paths:
+        if _worker_cancel is not None and _worker_cancel.is_set():
+            break
+        durations.append(VideoScanner._read_duration(path))
+    return durations
+
+
+def _file_key(path: str) -> tuple | None:
+    """探测缓存的文件键 (size, mtime_ns)，无法 stat 时为 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _walk_videos(root: str, ignore: tuple, cancel: CancelToken = None) -> Iterator[tuple]:
+    """
+    os.scandir 深度优先遍历，顺序与 os.walk（自顶向下）一致：先本目录的文件，再依次进入子目录。
+
+    只保存待访问目录的栈，不保存整棵树的列表；不进入符号链接目录（同 os.walk 默认行为）。
+    名称匹配 ignore 中任一通配符的文件和目录被跳过；无法访问的目录记录警告后跳过；
+    cancel 被取消后不再进入下一个目录。
+
+    Yields:
+        (abs_path, key)：key 为文件键 (size, mtime_ns)，取自 DirEntry（Windows 上无需额外 stat），
+        无法 stat 时为 None
+    """
+    stack = [root]
+    while stack:
+        if cancel is not None and cancel.cancelled:
+            return
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"目录无法访问，已跳过: {e}")
+            continue
+        subdirs = []
+        for entry in entries:
+            if ignore and any(fnmatch(entry.name, pattern) for pattern in ignore):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                try:
+                    st = entry.stat()
+                    key = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    key = None
+                yield entry.path, key
+        stack.extend(reversed(subdirs))
+
 
 class VideoScanner:
     """视频文件扫描器"""
 
+    # 持久化探测缓存，由 main.py 注入；None 时每次都读取文件
+    probe_cache: ProbeCache | None = None
+
     @staticmethod
     def get_duration(file_path: str) -> float:
         """
         获取单个视频文件的时长（秒）。
 
-        使用 TinyTag 读取元数据，失败或超时返回 0。
+        先查探测缓存，未命中时使用 TinyTag 读取元数据并写入缓存，失败或超时返回 0。
         """
+        cache = VideoScanner.probe_cache
+        key = _file_key(file_path) if cache is not None else None
+        if key is not None:
+            duration = cache.get(file_path, *key)
+            if duration is not None:
+                return duration
+        duration = VideoScanner._read_duration(file_path)
+        if key is not None:
+            cache.put(file_path, *key, duration)
+        return duration
+
+    @staticmethod
+    def _read_duration(file_path: str) -> float:
+        """使用 TinyTag 读取时长，失败返回 0"""
         try:
             tag = TinyTag.get(file_path)
             return tag.duration if tag.duration else 0.0
         except Exception:
             return 0.0
 
+    @staticmethod
+    def iter_scan(root_path: str, ignore=(), workers: int = None, batch_size: int = SCAN_BATCH_SIZE,
+                  cancel: CancelToken = None, known: dict = None) -> Iterator[ScanBatch]:
+        """
+        流式扫描目录：先在遍历过程中分批产出 FOUND，遍历结束后分批产出 PROBED。
+
+        遍历结束时总会产出一个 total 为视频总数的 FOUND 批次（条目可能为空），
+        调用方据此得知视频列表已确定，无需等待第一批时长。
+
+        时长的获取方式同 scan_directory()（已知文件 → 探测缓存 → 串行或进程池读取）；
+        并行读取时在途任务数受 MAX_PENDING_CHUNKS_PER_WORKER 限制，PROBED 批次按完成顺序产出。
+        提前关闭生成器即停止扫描；cancel 被取消后生成器在下一个目录或文件之前结束，
+        此前产出的批次即部分结果。
+
+        Args:
+            root_path: 课程根目录路径
+            ignore: 要跳过的文件 / 目录名通配符，如 ("*.part", ".*")
+            workers: 并行读取的进程数，None 时为 DEFAULT_WORKERS，1 为串行
+            batch_size: FOUND 批次与缓存命中批次的条目数
+            cancel: 取消标志，None 时不可取消
+            known: 上次扫描的结果 {rel_path: (size, mtime_ns, duration)}（DataManager.get_video_file_keys），
+                   文件键相同的文件直接沿用其时长
+        """
+        root_path = os.path.abspath(root_path)
+        paths, keys, batch = [], [], []
+        unchanged = {}  # 下标 → 沿用的时长
+        for abs_path, key in _walk_videos(root_path, tuple(ignore), cancel=cancel):
+            rel_path = os.path.relpath(abs_path, root_path)
+            item = {"rel_path": rel_path, "abs_path": abs_path, "duration": 0.0}
+            if key is not None:
+                item["size"], item["mtime_ns"] = key
+                previous = known.get(rel_path) if known else None
+                if previous is not None and tuple(previous[:2]) == key:
+                    unchanged[len(paths)] = previous[2]
+            paths.append(abs_path)
+            keys.append(key)
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield ScanBatch(FOUND, batch, len(paths))
+                batch = []
+        if cancel is not None and cancel.cancelled:
+            if batch:
+                yield ScanBatch(FOUND, batch, len(paths))
+            logger.info(f"扫描已取消: {root_path}（已发现 {len(paths)} 个视频文件）")
+            return
+
+        total = len(paths)
+        yield ScanBatch(FOUND, batch, total, total)
+        logger.info(f"扫描 {root_path}: 发现 {total} 个视频文件")
+        done = 0
+        for results in VideoScanner._iter_probe(paths, keys, workers, batch_size, cancel, unchanged):
+            done += len(results)
+            yield ScanBatch(PROBED, results, done, total)
+        if cancel is not None and cancel.cancelled:
+            logger.info(f"扫描已取消: {root_path}（已读取 {done}/{total} 个时长）")
+
     @staticmethod
     def scan_directory(root_path: str,
-                        progress_callback: Callable[[int, int], None] = None) -> tuple:
+                        progress_callback: Callable[[int, int], None] = None,
+                        workers: int = None, cancel: CancelToken = None, known: dict = None) -> tuple:
         """
-        递归扫描目录中的视频文件。
+        递归扫描目录中的视频文件（汇总 iter_scan() 的全部批次）。
 
         扫描流程：
         1. 先遍历目录统计视频文件总数
-        2. 逐个获取时长，通过 progress_callback 报告进度
+        2. 获取时长：先沿用 known 中未变化文件的时长，再批量查探测缓存，
+           未命中的文件数达到 PARALLEL_MIN_FILES 且 workers > 1 时
+           由进程池并行读取，否则逐个读取；每取得一个文件的时长通过 progress_callback 报告进度
 
         Args:
             root_path: 课程根目录路径
-            progress_callback: 进度回调 (current, total)，在步骤 2 中调用
+            progress_callback: 进度回调 (current, total)，在步骤 2 中调用，current 从 1 递增到 total
+            workers: 并行读取的进程数，None 时为 DEFAULT_WORKERS，1 为串行
+            cancel: 取消标志；取消后返回部分结果（已发现的视频，未读取时长的为 0），
+                    调用方据 cancel.cancelled 决定丢弃或保留
+            known: 上次扫描的结果，见 iter_scan()
 
         Returns:
             (videos: list, stats: dict)
-            videos: [{"rel_path": ..., "abs_path": ..., "duration": ...}]
+            videos: [{"rel_path": ..., "abs_path": ..., "duration": ..., "size": ..., "mtime_ns": ...}]
             stats: {"total_videos": int, "total_duration": float}
         """
-        root_path = os.path.abspath(root_path)
-
-        # 步骤 1：收集所有视频文件路径
-        video_paths = []
-        try:
-            for root, dirs, files in os.walk(root_path):
-                for f in files:
-                    if f.lower().endswith(VIDEO_EXTENSIONS):
-                        video_paths.append(os.path.join(root, f))
-        except PermissionError as e:
-            logger.warning(f"目录访问权限不足: {e}")
-
-        total_count = len(video_paths)
-        logger.info(f"扫描 {root_path}: 发现 {total_count} 个视频文件")
-
-        # 步骤 2：逐个获取时长
         videos = []
+        for batch in VideoScanner.iter_scan(root_path, workers=workers, cancel=cancel, known=known):
+            if batch.kind == FOUND:
+                videos.extend(batch.items)
+                continue
+            current = batch.done - len(batch.items)
+            for i, duration in batch.items:
+                videos[i]["duration"] = duration
+                current += 1
+                if progress_callback:
+                    progress_callback(current, batch.total)
+
         total_duration = 0.0
+        for video in videos:
+            total_duration += video["duration"]
 
-        for idx, abs_path in enumerate(video_paths):
-            rel_path = os.path.relpath(abs_path, root_path)
-            duration = VideoScanner.get_duration(abs_path)
-            videos.append({
-                "rel_path": rel_path,
-                "abs_path": abs_path,
-                "duration": duration,
-            })
-            total_duration += duration
-
-            if progress_callback:
-                progress_callback(idx + 1, total_count)
-
-        stats = {"total_videos": total_count, "total_duration": total_duration}
-        logger.info(f"扫描完成: {total_count} 个视频, 总时长 {total_duration:.0f} 秒")
+        stats = {"total_videos": len(videos), "total_duration": total_duration}
+        logger.info(f"扫描完成: {len(videos)} 个视频, 总时长 {total_duration:.0f} 秒")
         return videos, stats
+
+    @staticmethod
+    def _iter_probe(paths: list, keys: list, workers: int, batch_size: int,
+                    cancel: CancelToken = None, unchanged: dict = None) -> Iterator[list]:
+        """
+        分批取得时长，产出 [(下标, 时长)]：先产出未变化的文件（unchanged：下标 → 时长）
+        与探测缓存命中的文件，再读取其余文件并写入缓存。
+        """
+        pending = list(range(len(paths)))
+        if unchanged:
+            found = sorted(unchanged.items())
+            for start in range(0, len(found), batch_size):
+                yield found[start:start + batch_size]
+            pending = [i for i in pending if i not in unchanged]
+            logger.info(f"未变化的文件 {len(unchanged)}/{len(paths)}")
+        cache = VideoScanner.probe_cache
+        if cache is not None and pending:
+            hits = cache.get_many([(paths[i], *keys[i]) for i in pending if keys[i]])
+            if hits:
+                found = [(i, hits[paths[i]]) for i in pending if paths[i] in hits]
+                for start in range(0, len(found), batch_size):
+                    yield found[start:start + batch_size]
+                pending = [i for i in pending if paths[i] not in hits]
+            logger.info(f"探测缓存命中 {len(hits)}/{len(paths)}")
+
+        workers = DEFAULT_WORKERS if workers is None else workers
+        if workers > 1 and len(pending) >= PARALLEL_MIN_FILES:
+            probed = VideoScanner._probe_parallel(paths, pending, workers, cancel)
+        else:
+            probed = VideoScanner._probe_serial(paths, pending, cancel)
+        for results in probed:
+            if cache is not None:
+                cache.put_many([(paths[i], *keys[i], duration) for i, duration in results if keys[i]])
+            yield results
+
+    @staticmethod
+    def _probe_serial(paths: list, indexes: list, cancel: CancelToken = None) -> Iterator[list]:
+        """逐个读取 paths 中 indexes 所指文件的时长，每个文件产出一批 [(下标, 时长)]"""
+        for i in indexes:
+            if cancel is not None and cancel.cancelled:
+                return
+            yield [(i, VideoScanner._read_duration(paths[i]))]
+
+    @staticmethod
+    def _probe_parallel(paths: list, indexes: list, workers: int,
+                        cancel: CancelToken = None) -> Iterator[list]:
+        """
+        按 PROBE_CHUNK_SIZE 分块并行读取时长，每完成一块产出一批 [(下标, 时长)]。
+
+        每个工作进程最多排队 MAX_PENDING_CHUNKS_PER_WORKER 块，完成一块再提交下一块；
+        进程池无法启动或中途崩溃时，未读取的文件退回串行读取。
+        可取消时每 CANCEL_POLL_INTERVAL 秒检查一次：取消后撤回排队的块，
+        并通过进程间事件让正在读取的工作进程在当前文件后停止，等待其退出后返回。
+        """
+        chunks = (indexes[start:start + PROBE_CHUNK_SIZE]
+                  for start in range(0, len(indexes), PROBE_CHUNK_SIZE))
+        probed = set()
+        pool_options = {}
+        stop_event = None
+        if cancel is not None:
+            context = multiprocessing.get_context()
+            stop_event = context.Event()
+            pool_options = {"mp_context": context, "initializer": _init_worker,
+                            "initargs": (stop_event,)}
+        try:
+            with ProcessPoolExecutor(max_workers=workers, **pool_options) as executor:
+                in_flight = {}
+                while True:
+                    while len(in_flight) < workers * MAX_PENDING_CHUNKS_PER_WORKER:
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            break
+                        in_flight[executor.submit(_probe_chunk, [paths[i] for i in chunk])] = chunk
+                    if not in_flight:
+                        break
+                    finished, _ = wait(in_flight, timeout=CANCEL_POLL_INTERVAL if cancel else None,
+                                       return_when=FIRST_COMPLETED)
+                    if cancel is not None and cancel.cancelled:
+                        stop_event.set()
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return
+                    for future in finished:
+                        chunk = in_flight.pop(future)
+                        results = list(zip(chunk, future.result()))
+                        probed.update(i for i, _ in results)
+                        yield results
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"并行读取时长失败，改为串行: {e}")
+            yield from VideoScanner._probe_serial(
+                paths, [i for i in indexes if i not in probed], cancel)
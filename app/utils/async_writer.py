@@ -0,0 +1,170 @@
+"""异步写盘服务 — 单个后台线程 + 有界队列，把原子写入移出 GUI 线程"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from utils.atomic_write import atomic_write_bytes, DURABILITY_NONE
+from utils.paths import PathManager
+from utils.logger import setup_logger
+
+logger = setup_logger("AsyncWriter", PathManager.LOG_DIR)
+
+
+class AsyncWriter:
+    """
+    异步原子写入器。
+
+    - submit() 把文件快照放入队列后立即返回，由后台线程调用 atomic_write_bytes 落盘
+    - 同一文件尚未写出的旧快照会被新快照原地替换（保持队列位置，只写最新内容）
+    - call() 在队列中插入一个回调，保证在此前提交的所有写入完成后执行
+    - 队列有界：待写文件数达到 max_pending 时 submit() 阻塞，形成背压
+    """
+
+    def __init__(self, max_pending: int = 64, durability: str = DURABILITY_NONE,
+                 name: str = "AsyncWriter"):
+        """
+        Args:
+            max_pending: 队列中最多容纳的待处理任务数
+            durability: 传给 atomic_write_bytes 的持久性级别
+            name: 后台线程名称
+        """
+        self.max_pending = max_pending
+        self.durability = durability
+        self.name = name
+        self._queue: OrderedDict = OrderedDict()
+        self._cv = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._seq = 0
+        self._failures_since_call = 0
+        self._thread: threading.Thread | None = None
+        self.last_error: Exception | None = None
+        self.stats = {"submitted": 0, "written": 0, "superseded": 0, "failed": 0, "bytes": 0}
+
+    # ==================== 提交 ====================
+
+    def submit(self, path: Path, payload: bytes | Callable[[], bytes]):
+        """
+        提交一次文件写入。
+
+        Args:
+            path: 目标文件
+            payload: 文件内容，或在后台线程中生成内容的无参函数（调用方须保证其引用的数据不再被修改）
+        """
+        key = ("file", str(Path(path)))
+        with self._cv:
+            self._check_open()
+            self.stats["submitted"] += 1
+            if key in self._queue:
+                self._queue[key] = (Path(path), payload)
+                self.stats["superseded"] += 1
+                return
+            self._wait_for_room()
+            self._queue[key] = (Path(path), payload)
+            self._ensure_thread()
+            self._cv.notify_all()
+
+    def call(self, fn: Callable[[], None], on_failure: Callable[[], None] = None):
+        """
+        在此前提交的写入全部完成后，于后台线程执行 fn。
+
+        若自上一个回调以来有写入失败，则改为执行 on_failure（未提供时跳过）。
+        """
+        with self._cv:
+            self._check_open()
+            self._seq += 1
+            self._wait_for_room()
+            self._queue[("call", self._seq)] = (fn, on_failure)
+            self._ensure_thread()
+            self._cv.notify_all()
+
+    # ==================== 等待与关闭 ====================
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """等待队列清空且没有正在执行的任务，超时返回 False"""
+        with self._cv:
+            return self._cv.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def flush(self):
+        """阻塞直到此前提交的全部写入完成"""
+        self.wait_idle()
+
+    @property
+    def pending(self) -> int:
+        """队列中尚未处理的任务数"""
+        with self._cv:
+            return len(self._queue)
+
+    def close(self):
+        """写完剩余任务后停止后台线程"""
+        self.flush()
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # ==================== 后台线程 ====================
+
+    def _run(self):
+        while True:
+            with self._cv:
+                self._cv.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                key, task = self._queue.popitem(last=False)
+                self._busy = True
+                self._cv.notify_all()
+            try:
+                if key[0] == "file":
+                    self._write(*task)
+                else:
+                    self._invoke(*task)
+            finally:
+                with self._cv:
+                    self._busy = False
+                    self._cv.notify_all()
+
+    def _write(self, path: Path, payload):
+        try:
+            data = payload() if callable(payload) else payload
+            atomic_write_bytes(path, data, durability=self.durability)
+        except Exception as e:
+            self._failures_since_call += 1
+            self.stats["failed"] += 1
+            self.last_error = e
+            logger.error(f"写入失败 {path}: {e}")
+            return
+        self.stats["written"] += 1
+        self.stats["bytes"] += len(data)
+
+    def _invoke(self, fn, on_failure):
+        failed = self._failures_since_call > 0
+        self._failures_since_call = 0
+        target = on_failure if failed else fn
+        if target is None:
+            return
+        try:
+            target()
+        except Exception as e:
+            self.last_error = e
+            logger.error(f"写盘回调失败: {e}")
+
+    # ==================== 内部 ====================
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError(f"{self.name} 已关闭")
+
+    def _wait_for_room(self):
+        """队列已满时等待（调用方须持有 self._cv）"""
+        self._cv.wait_for(lambda: len(self._queue) < self.max_pending)
+
+    def _ensure_thread(self):
+        """首次提交时启动后台线程（调用方须持有 self._cv）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
@@ -5,8 +5,11 @@ import os
 import tempfile
 from pathlib import Path
 
+from utils.serialization import FORMAT_JSON, CodecError, encode, decode, format_for_path
 
-def atomic_write_json(filepath: Path, data, indent: int = 4, ensure_ascii: bool = False):
+
+def atomic_write_json(filepath: Path, data, indent: int = 4, ensure_ascii: bool = False,
+                      fmt: str = None):
     """
     原子写入 JSON 文件。
 
@@ -14,6 +17,41 @@ def atomic_write_json(filepath: Path, data, indent: int = 4, ensure_ascii: bool
     1. 在目标文件同目录创建临时文件
     2. 将 JSON 写入临时文件
     3. 调用 os.replace 原子替换（Windows 上也保证原子性）
+
+    Args:
+        fmt: 序列化格式（见 utils.serialization）；None 时按扩展名推断，
+             默认为按 indent/ensure_ascii 缩进的 JSON
+    """
+    fmt = fmt or format_for_path(filepath)
+    if fmt == FORMAT_JSON:
+        payload = encode_json(data, indent=indent, ensure_ascii=ensure_ascii)
+    else:
+        payload = encode(data, fmt)
+    atomic_write_bytes(filepath, payload)
+
+
+def encode_json(data, indent: int = 4, ensure_ascii: bool = False) -> bytes:
+    """按 atomic_write_json 的格式序列化为 UTF-8 字节"""
+    return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii).encode('utf-8')
+
+
+# 持久性级别
+DURABILITY_NONE = "none"   # 仅 os.replace，依赖操作系统回写
+DURABILITY_FILE = "file"   # 替换前 fsync 临时文件
+DURABILITY_DIR = "dir"     # 额外 fsync 所在目录，保证改名本身落盘（Windows 上等同 file）
+
+
+def atomic_write_bytes(filepath: Path, payload: bytes, durability: str = DURABILITY_NONE):
+    """
+    原子写入已序列化的内容。
+
+    序列化与写盘分离后，调用方可以在持有数据的线程上生成一致的快照，
+    再把纯字节交给其他线程落盘。
+
+    Args:
+        filepath: 目标文件
+        payload: 文件内容
+        durability: DURABILITY_NONE / DURABILITY_FILE / DURABILITY_DIR
     """
     filepath = Path(filepath)
     filepath.parent.mkdir(parents=True, exist_ok=True)
@@ -26,9 +64,14 @@ def atomic_write_json(filepath: Path, data, indent: int = 4, ensure_ascii: bool
     )
 
     try:
-        with os.fdopen(tmp_fd, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
+        with os.fdopen(tmp_fd, 'wb') as f:
+            f.write(payload)
+            if durability != DURABILITY_NONE:
+                f.flush()
+                os.fsync(f.fileno())
         os.replace(tmp_path, str(filepath))
+        if durability == DURABILITY_DIR:
+            _fsync_dir(filepath.parent)
     except Exception:
         # 清理临时文件
         if os.path.exists(tmp_path):
@@ -39,12 +82,25 @@ def atomic_write_json(filepath: Path, data, indent: int = 4, ensure_ascii: bool
         raise
 
 
+def _fsync_dir(directory: Path):
+    """fsync 目录项（Windows 不支持打开目录，跳过）"""
+    if os.name == 'nt':
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
 def safe_read_json(filepath: Path, default=None):
     """
-    安全读取 JSON 文件。
+    安全读取 JSON 文件（也可读取 atomic_write_json 写出的其他格式，按文件头识别）。
 
     - 文件不存在 → 返回 default
-    - JSON 损坏 → 备份原文件为 .bak，返回 default
+    - 内容损坏 → 备份原文件为 .bak，返回 default
+    - 格式需要的库未安装 → 抛出 CodecUnavailableError，不备份也不返回 default
+      （否则调用方会以空数据启动，下次保存时覆盖原文件）
     - 正常 → 返回解析后的数据
     """
     if default is None:
@@ -56,9 +112,8 @@ def safe_read_json(filepath: Path, default=None):
         return default
 
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return decode(filepath.read_bytes())
+    except (json.JSONDecodeError, UnicodeDecodeError, CodecError) as e:
         # 备份损坏文件
         backup_path = filepath.with_suffix(filepath.suffix + '.bak')
         try:
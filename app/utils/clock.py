@@ -0,0 +1,111 @@
+"""时钟 — 可注入的当前时间来源，缓存「今天」的日期与日期键
+
+DataManager 等模块通过 Clock 取当前时间，不再直接调用 datetime.now() / date.today()：
+- today() / today_key() 缓存到本地午夜，期间只把 time.time() 与缓存的午夜时间戳比较一次
+- 比较用墙上时钟而非单调时钟：系统休眠期间单调时钟会停走，唤醒后仍会停留在前一天
+- 跨过午夜后首次访问自动刷新；Qt 界面另由 services/clock_service.py 在午夜发出信号
+- 测试中用 FixedClock 替换默认时钟（见 tests/conftest.py 的 frozen_clock）
+"""
+
+import time
+from datetime import date, datetime, timedelta
+
+DATE_KEY_FORMAT = "%Y-%m-%d"
+
+
+class Clock:
+    """系统时钟，缓存今天的日期直到本地午夜"""
+
+    def __init__(self, now=datetime.now, epoch=time.time):
+        """
+        Args:
+            now: 返回本地当前时间的函数
+            epoch: 返回 Unix 时间戳的函数，用于判断缓存是否已过午夜
+        """
+        self._now = now
+        self._epoch = epoch
+        self._today: date | None = None
+        self._today_key = ""
+        self._starts_at = float("inf")    # 今天本地零点的时间戳
+        self._expires_at = float("-inf")  # 下一个本地午夜的时间戳
+
+    def now(self) -> datetime:
+        """本地当前时间"""
+        return self._now()
+
+    def today(self) -> date:
+        """今天的日期（缓存）"""
+        if not self._starts_at <= self._epoch() < self._expires_at:
+            self.refresh()
+        return self._today
+
+    def today_key(self) -> str:
+        """今天的日期键 "YYYY-MM-DD"（daily_stats / activity_log 的键）"""
+        if not self._starts_at <= self._epoch() < self._expires_at:
+            self.refresh()
+        return self._today_key
+
+    def refresh(self) -> bool:
+        """
+        重新读取当前时间并更新缓存。
+
+        Returns:
+            日期是否与缓存的不同（首次读取也算）
+        """
+        now = self.now()
+        changed = now.date() != self._today
+        self._today = now.date()
+        self._today_key = self._today.strftime(DATE_KEY_FORMAT)
+        # 墙上时钟被往回拨过零点时同样刷新
+        self._starts_at = _local_midnight(self._today)
+        self._expires_at = _local_midnight(self._today + timedelta(days=1))
+        return changed
+
+    def seconds_until_midnight(self, now: datetime = None) -> float:
+        """距下一个本地午夜的秒数（按时间戳相减，夏令时切换日同样准确）"""
+        now = now or self.now()
+        return _local_midnight(now.date() + timedelta(days=1)) - now.timestamp()
+
+
+class FixedClock(Clock):
+    """停在指定时刻的时钟，可手动拨动（测试、基准测试使用）"""
+
+    def __init__(self, now: datetime):
+        super().__init__(now=lambda: self._fixed, epoch=lambda: self._fixed.timestamp())
+        self._fixed = now
+        self.refresh()
+
+    def set(self, now: datetime) -> bool:
+        """拨到指定时刻，返回日期是否变化"""
+        self._fixed = now
+        return self.refresh()
+
+    def advance(self, **delta) -> bool:
+        """向后拨动（参数同 timedelta），返回日期是否变化"""
+        return self.set(self._fixed + timedelta(**delta))
+
+    def today(self) -> date:
+        return self._today
+
+    def today_key(self) -> str:
+        return self._today_key
+
+
+def _local_midnight(day: date) -> float:
+    """某日本地零点的 Unix 时间戳（mktime 按本地时区与当日是否夏令时换算）"""
+    return time.mktime((day.year, day.month, day.day, 0, 0, 0, 0, 0, -1))
+
+
+_default = Clock()
+
+
+def default_clock() -> Clock:
+    """未显式注入时钟时使用的进程级默认时钟"""
+    return _default
+
+
+def set_default_clock(clock: Clock) -> Clock:
+    """替换默认时钟，返回原来的时钟"""
+    global _default
+    previous, _default = _default, clock
+    return previous
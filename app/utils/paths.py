@@ -11,6 +11,10 @@ class PathManager:
     BASE_DIR = Path(__file__).resolve().parent.parent.parent
     DATA_DIR = BASE_DIR / "data"
     COURSES_JSON = DATA_DIR / "courses.json"
+    COURSES_DB = DATA_DIR / "courses.db"
+    COURSES_DIR = DATA_DIR / "courses"       # 每门课程一个分片文件 <id>.json
+    META_JSON = DATA_DIR / "meta.json"       # activity_log、settings 等全局数据
+    PROBE_CACHE_DB = DATA_DIR / "probe_cache.db"  # 视频时长探测缓存
     LOG_DIR = BASE_DIR / "logs"
 
     @classmethod
@@ -0,0 +1,113 @@
+"""序列化格式 — 可插拔的编解码器，读取时按文件头自动识别格式"""
+
+import json
+from pathlib import Path
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+
+# 格式名称
+FORMAT_JSON = "json"                  # 缩进 4 格，便于手工查看与编辑
+FORMAT_JSON_COMPACT = "json-compact"  # 无空白的紧凑 JSON（安装 orjson 时由其编码）
+FORMAT_MSGPACK = "msgpack"            # 二进制，需要安装 msgpack
+
+# 二进制文件头：JSON 文本不可能以该字节序列开头，据此区分格式
+MSGPACK_HEADER = b"\x00CFMP\x01"
+
+# 扩展名 → 格式（未显式指定格式时的写入默认值）
+SUFFIX_FORMATS = {".msgpack": FORMAT_MSGPACK}
+
+
+class CodecError(ValueError):
+    """内容无法按识别出的格式解码"""
+
+
+class CodecUnavailableError(RuntimeError):
+    """文件格式需要的库未安装；文件本身未必损坏，调用方不应把它当作损坏处理"""
+
+
+# ==================== 编码 ====================
+
+def encode(data, fmt: str = FORMAT_JSON) -> bytes:
+    """
+    按指定格式序列化为字节。
+
+    FORMAT_MSGPACK 在未安装 msgpack 时回退为紧凑 JSON，读取端按文件头识别，不受影响。
+    """
+    if fmt == FORMAT_JSON:
+        return json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8')
+    if fmt == FORMAT_MSGPACK and MSGPACK_AVAILABLE:
+        return MSGPACK_HEADER + msgpack.packb(data, use_bin_type=True)
+    if fmt in (FORMAT_JSON_COMPACT, FORMAT_MSGPACK):
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    raise ValueError(f"未知的序列化格式: {fmt}")
+
+
+def format_for_path(filepath: Path, default: str = FORMAT_JSON) -> str:
+    """按扩展名推断写入格式"""
+    return SUFFIX_FORMATS.get(Path(filepath).suffix.lower(), default)
+
+
+def suffix_for_format(fmt: str) -> str:
+    """按格式实际写出的内容选择扩展名（msgpack 未安装时 encode 回退为紧凑 JSON，扩展名随之为 .json）"""
+    if fmt == FORMAT_MSGPACK and not MSGPACK_AVAILABLE:
+        return ".json"
+    for suffix, suffix_fmt in SUFFIX_FORMATS.items():
+        if suffix_fmt == fmt:
+            return suffix
+    return ".json"
+
+
+# ==================== 解码 ====================
+
+def detect_format(raw: bytes) -> str:
+    """按文件头识别格式（紧凑与缩进 JSON 同属 FORMAT_JSON）"""
+    if raw.startswith(MSGPACK_HEADER):
+        return FORMAT_MSGPACK
+    return FORMAT_JSON
+
+
+def decode(raw: bytes):
+    """
+    自动识别格式并反序列化。
+
+    Raises:
+        CodecError: 二进制内容损坏
+        CodecUnavailableError: 需要的库未安装
+        json.JSONDecodeError / UnicodeDecodeError: JSON 内容损坏
+    """
+    if detect_format(raw) == FORMAT_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise CodecUnavailableError("文件为 msgpack 格式，但未安装 msgpack")
+        try:
+            return msgpack.unpackb(raw[len(MSGPACK_HEADER):], raw=False, strict_map_key=False)
+        except Exception as e:
+            raise CodecError(f"msgpack 解码失败: {e}") from e
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # orjson 不接受 NaN 等标准库能写出的内容，交给标准库判定
+    return json.loads(raw.decode('utf-8'))
+
+
+def available_formats() -> list[str]:
+    """当前环境可真正使用的格式"""
+    formats = [FORMAT_JSON, FORMAT_JSON_COMPACT]
+    if MSGPACK_AVAILABLE:
+        formats.append(FORMAT_MSGPACK)
+    return formats
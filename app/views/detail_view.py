@@ -357,19 +357,16 @@ class DetailPlayerView(QWidget):
 
         self.player_controls.update_time(time, length)
 
-        # 上报进度
+        # 上报进度（current_video 是只读视图，由 DataManager 更新后即可读到最新值）
         if length > 0 and self.current_video:
             watched_sec = int(time / 1000)
-            completed = time > 0.9 * length
-            self.current_video["watched_duration"] = watched_sec
-            if completed:
-                self.current_video["completed"] = True
+            completed = self.current_video.get("completed", False) or time > 0.9 * length
 
             self.progress_updated.emit(
                 self.course_data["id"],
                 self.current_video["rel_path"],
                 watched_sec,
-                self.current_video.get("completed", False),
+                completed,
             )
 
             w = self.video_widgets.get(self.current_video["rel_path"])
@@ -1,6 +1,7 @@
 """首页视图 — 课程库概览：仪表盘 + 课程卡片网格"""
 
 import os
+import time
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QScrollArea,
@@ -11,24 +12,64 @@ from PySide6.QtCore import Qt, Signal, QThread
 from views.widgets.course_card import CourseCard
 from views.widgets.home_dashboard import HomeDashboard
 from services.theme_service import theme_service
-from services.scanner import VideoScanner
+from services.scanner import VideoScanner, CancelToken, FOUND
+
+# 扫描期间刷新课程卡片的最小间隔（秒）
+SCAN_REFRESH_INTERVAL = 1.0
 
 
 class ScanThread(QThread):
-    """异步扫描线程"""
+    """
+    异步扫描线程，逐批转发 VideoScanner.iter_scan() 的结果：
+
+    found → 遍历中已发现的视频数；discovered → 遍历一结束即发出，全部视频（时长为 0）；
+    probed → 一批时长 [(下标, 时长)]；finished → 扫描结束，含时长的完整结果。
+    cancel() 请求协作式取消，扫描在约 100 毫秒内停止，finished 仍会发出（部分结果）。
+    """
     finished = Signal(str, str, list, dict)  # name, path, videos, stats
     progress = Signal(int, int)               # current, total
+    found = Signal(int)                       # 已发现的视频数
+    discovered = Signal(str, str, list)       # name, path, videos
+    probed = Signal(list)                     # [(index, duration)]
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, workers: int = None, ignore=()):
+        """
+        Args:
+            workers: 并行读取时长的进程数（设置项 "scan_workers"），None 时为 CPU 核数
+            ignore: 要跳过的文件 / 目录名通配符（设置项 "scan_ignore"）
+        """
         super().__init__()
         self.path = path
+        self.workers = workers
+        self.ignore = tuple(ignore or ())
+        self.cancel_token = CancelToken()
+
+    def cancel(self):
+        """请求取消扫描（可在 GUI 线程调用）"""
+        self.cancel_token.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_token.cancelled
 
     def run(self):
         name = os.path.basename(self.path)
-        videos, stats = VideoScanner.scan_directory(
-            self.path,
-            progress_callback=lambda cur, tot: self.progress.emit(cur, tot)
-        )
+        videos = []
+        for batch in VideoScanner.iter_scan(self.path, ignore=self.ignore, workers=self.workers,
+                                            cancel=self.cancel_token):
+            if batch.kind == FOUND:
+                videos.extend(batch.items)
+                self.found.emit(batch.done)
+                if batch.total:  # 遍历结束
+                    # 发出副本：此后本线程会写入时长，不与接收方共享同一批字典
+                    self.discovered.emit(name, self.path, [dict(v) for v in videos])
+                continue
+            for i, duration in batch.items:
+                videos[i]["duration"] = duration
+            self.probed.emit(batch.items)
+            self.progress.emit(batch.done, batch.total)
+
+        stats = {"total_videos": len(videos),
+                 "total_duration": sum(v["duration"] for v in videos)}
         self.finished.emit(name, self.path, videos, stats)
 
 
@@ -139,29 +180,64 @@ class HomeView(QWidget):
             QMessageBox.warning(self, "提示", "该课程已添加到列表中")
             return
 
-        # 异步扫描
-        self._scan_thread = ScanThread(folder)
+        # 异步扫描：遍历结束即创建课程，时长随后逐批补全
+        self._scan_course_id = None
+        self._scan_refreshed_at = 0.0
+        self._scan_thread = ScanThread(
+            folder, workers=self.controller.data_manager.get_setting("scan_workers"),
+            ignore=self.controller.data_manager.get_setting("scan_ignore", []))
+        self._scan_thread.discovered.connect(self._on_scan_discovered)
+        self._scan_thread.probed.connect(self._on_scan_probed)
         self._scan_thread.finished.connect(self._on_scan_finished)
 
         # 进度对话框
         self._progress_dialog = QProgressDialog("正在扫描课程视频...", "取消", 0, 0, self)
         self._progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
-        self._progress_dialog.canceled.connect(self._scan_thread.terminate)
+        self._progress_dialog.canceled.connect(self._scan_thread.cancel)
         self._scan_thread.finished.connect(self._progress_dialog.close)
+        self._scan_thread.found.connect(
+            lambda count: self._progress_dialog.setLabelText(
+                f"正在查找课程视频... (已发现 {count} 个)"
+            )
+        )
         self._scan_thread.progress.connect(
             lambda cur, tot: self._progress_dialog.setLabelText(
-                f"正在扫描课程视频... ({cur}/{tot})"
+                f"正在读取视频时长... ({cur}/{tot})"
             )
         )
         self._scan_thread.start()
 
+    def _on_scan_discovered(self, name: str, path: str, videos: list):
+        """遍历结束 → 立即创建课程（时长暂为 0）并显示卡片"""
+        course = self.controller.data_manager.add_course(
+            name, path, videos, {"total_videos": len(videos), "total_duration": 0.0})
+        self._scan_course_id = course["id"]
+        self.refresh_list()
+        self._scan_refreshed_at = time.monotonic()
+
+    def _on_scan_probed(self, durations: list):
+        """一批时长 → 写入课程，按 SCAN_REFRESH_INTERVAL 节流刷新卡片"""
+        if self._scan_course_id is None:
+            return
+        self.controller.update_video_durations(self._scan_course_id, durations)
+        if time.monotonic() - self._scan_refreshed_at >= SCAN_REFRESH_INTERVAL:
+            self.refresh_list()
+            self._scan_refreshed_at = time.monotonic()
+
     def _on_scan_finished(self, name: str, path: str, videos: list, stats: dict):
-        """扫描完成回调"""
-        if stats["total_videos"] == 0:
+        """扫描完成回调；取消的扫描丢弃已创建的课程"""
+        if self._scan_thread.is_cancelled():
+            if self._scan_course_id is not None:
+                self.controller.delete_course(self._scan_course_id)
+                self._scan_course_id = None
+                self.refresh_list()
+            return
+
+        if self._scan_course_id is None:
             QMessageBox.warning(self, "提示", "未在该文件夹中找到视频文件")
             return
 
-        self.controller.data_manager.add_course(name, path, videos, stats)
+        self.controller.data_manager.flush(wait=False)
         self.refresh_list()
 
     # ==================== 列表刷新 ====================
@@ -226,34 +302,32 @@ class HomeView(QWidget):
         active = 0
         total_videos = 0
         completed_videos = 0
-        today_seconds = 0.0
         today_plan_seconds = 0.0
         streak_days = 0
 
-        from datetime import date
-        today_str = date.today().strftime("%Y-%m-%d")
+        today = self.controller.today()
 
         for course in courses:
+            # 视频聚合值来自清单，无需加载视频列表
+            summary = self.controller.get_video_summary(course["id"])
+
             # 进行中
-            all_completed = all(v.get("completed", False) for v in course.get("videos", []))
-            if not all_completed:
+            if summary.completed_videos < summary.video_count:
                 active += 1
 
             # 视频进度
-            videos = course.get("videos", [])
-            total_videos += len(videos)
-            completed_videos += sum(1 for v in videos if v.get("completed", False))
-
-            # 今日学习
-            daily = course.get("daily_stats", {})
-            today_seconds += daily.get(today_str, 0.0)
+            total_videos += summary.video_count
+            completed_videos += summary.completed_videos
 
             # 今日计划
             schedule = course.get("weekly_schedule", [0.0] * 7)
-            wd = date.today().weekday()
+            wd = today.weekday()
             if wd < len(schedule):
                 today_plan_seconds += schedule[wd] * 3600.0
 
+        # 今日学习（全部课程合计）
+        today_seconds = self.controller.get_global_daily_index().day_seconds(today)
+
         # 连续天数（取全部课程的全局 activity_log）
         streak_days = self.controller.data_manager._calculate_streak()
 
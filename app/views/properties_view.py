@@ -10,6 +10,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QDate, Signal, QPoint
 from PySide6.QtGui import QFont
 
+from models.plan_preview import PlanInputs, evaluate as evaluate_plan
 from services.theme_service import theme_service as theme_manager
 from utils.fonts import get_font
 from views.widgets.ela_date_picker import ElaDatePicker
@@ -315,6 +316,7 @@ class PlanEditDialog(QDialog):
     包含原学习计划卡片的所有编辑功能：
     - 开始日期选择器
     - 双页签：整体调节（预设 + 组滑块）/ 每日微调（7 个独立滑块）
+    - 实时预览：每次调整即按 plan_inputs 估算预计完成、剩余天数与余额（不落盘）
     - 取消 / 确认更改 按钮
     """
     PRESETS: list[tuple[str, float]] = [
@@ -328,7 +330,8 @@ class PlanEditDialog(QDialog):
     PAGE_GROUP = 0
     PAGE_DAILY = 1
 
-    def __init__(self, schedule: list, start_date_iso: str, parent=None):
+    def __init__(self, schedule: list, start_date_iso: str, parent=None,
+                 plan_inputs: PlanInputs = None):
         super().__init__(parent)
         self.setWindowTitle("更改学习计划")
         self.setModal(True)
@@ -337,6 +340,7 @@ class PlanEditDialog(QDialog):
 
         self._updating = False
         self._start_date_iso = start_date_iso
+        self._plan_inputs = plan_inputs  # None 时不显示预览
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(28, 22, 28, 22)
@@ -531,6 +535,13 @@ class PlanEditDialog(QDialog):
         self.stack.setCurrentIndex(self.PAGE_GROUP)
         main_layout.addWidget(self.stack, 1)
 
+        # ---- 实时预览 ----
+        self.preview_label = QLabel("")
+        self.preview_label.setFont(get_font("Medium", 11))
+        self.preview_label.setObjectName("planPreview")
+        self.preview_label.setVisible(plan_inputs is not None)
+        main_layout.addWidget(self.preview_label)
+
         # ---- 底部按钮 ----
         btn_row = QHBoxLayout()
         btn_row.setSpacing(12)
@@ -600,6 +611,7 @@ class PlanEditDialog(QDialog):
         if self._updating:
             return
         self._start_date_iso = qdate.toString(Qt.DateFormat.ISODate)
+        self._update_preview()
 
     # ==================== 预设 ====================
 
@@ -673,6 +685,7 @@ class PlanEditDialog(QDialog):
             hours = slider.value() / 6.0
             label.setText(f"{int(hours)}h" if hours == int(hours) else f"{hours:.1f}h")
         self._update_group_labels()
+        self._update_preview()
 
     def _update_group_labels(self):
         """刷新组滑块的值标签"""
@@ -681,6 +694,21 @@ class PlanEditDialog(QDialog):
         self.weekday_value_label.setText(f"{wd:.1f} 小时/天")
         self.weekend_value_label.setText(f"{we:.1f} 小时/天")
 
+    def _update_preview(self):
+        """按当前滑块与日期估算结果（纯计算，不写入课程）"""
+        if self._plan_inputs is None:
+            return
+        schedule, start_date_iso = self.get_plan()
+        preview = evaluate_plan(schedule, start_date_iso, self._plan_inputs)
+        if preview.finish_date == "已完成":
+            self.preview_label.setText("🎉 所有视频已学完")
+            return
+        parts = [f"📅 预计完成 {preview.finish_date}", f"剩余约 {preview.remaining_days} 天"]
+        if start_date_iso and sum(schedule) >= 0.1:
+            sign = "+" if preview.balance_hours >= 0 else ""
+            parts.append(f"余额 {sign}{preview.balance_hours:.1f}h")
+        self.preview_label.setText(" · ".join(parts))
+
     # ==================== 主题 ====================
 
     def _apply_theme(self, theme: dict):
@@ -718,6 +746,10 @@ class PlanEditDialog(QDialog):
                 color: {theme['text_sec']}; background: transparent; border: none;
                 font-size: 10px; font-style: italic;
             }}
+            QLabel#planPreview {{
+                color: {theme['text_main']}; background: transparent; border: none;
+                font-size: 11px;
+            }}
             #planStack {{ background: transparent; border: none; }}
         """)
 
@@ -843,6 +875,7 @@ class StudyPlanCard(QWidget):
         self._balance_hours: float = 0.0
         self._is_completed: bool = False
         self._estimated_finish: str = "--"
+        self._plan_inputs: PlanInputs | None = None  # 编辑弹窗实时预览的输入
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(24, 20, 24, 22)
@@ -984,6 +1017,10 @@ class StudyPlanCard(QWidget):
         """返回 (schedule_list[7], start_date_iso)"""
         return (list(self._schedule), self._start_date_iso)
 
+    def set_plan_inputs(self, plan_inputs: PlanInputs):
+        """设置编辑弹窗实时预览所需的课程侧输入（MainController.get_plan_inputs）"""
+        self._plan_inputs = plan_inputs
+
     def set_data(self, schedule: list, start_date_iso: str,
                  balance_hours: float = 0.0, is_completed: bool = False,
                  estimated_finish: str = "--"):
@@ -1026,7 +1063,8 @@ class StudyPlanCard(QWidget):
 
     def _on_change_clicked(self):
         """打开更改学习计划弹窗"""
-        dialog = PlanEditDialog(self._schedule, self._start_date_iso, self)
+        dialog = PlanEditDialog(self._schedule, self._start_date_iso, self,
+                                plan_inputs=self._plan_inputs)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_schedule, new_date = dialog.get_plan()
             self.plan_changed.emit(new_schedule, new_date)
@@ -1297,6 +1335,7 @@ class PropertiesView(QWidget):
                 is_completed,
                 data.estimated_finish_str,
             )
+            self.study_plan.set_plan_inputs(self.controller.get_plan_inputs(self._course_id))
             self.study_plan.blockSignals(False)
 
             # 时间线（纯可视化，无需 blockSignals）
@@ -12,11 +12,14 @@ from services.theme_service import theme_service
 class HomeHeatMapWidget(QWidget):
     """聚合所有课程每日学习时长的年度热力图（GitHub 贡献图风格）"""
 
+    COLS = 27  # 最多 27 周 ≈ 6 个月
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumHeight(130)
 
-        self._all_daily_stats = {}  # {date_str: total_seconds}
+        self._start_date = date.today()
+        self._day_seconds = []      # 网格起始日至今天每天的学习秒数（全部课程合计）
         self._target_hours = 1.0    # 基准目标（用于颜色分级）
 
         layout = QVBoxLayout(self)
@@ -39,15 +42,26 @@ class HomeHeatMapWidget(QWidget):
             }}
         """)
 
-    def set_data(self, all_daily_stats: dict, target_hours: float = 1.0):
+    @classmethod
+    def grid_range(cls, today: date) -> tuple:
+        """网格覆盖的日期范围 (起始日, today)：从最后一个周日开始，往前推 COLS 周"""
+        end_sunday = today - timedelta(days=today.weekday() + 1)  # 上周日
+        if today.weekday() == 6:
+            end_sunday = today
+        return end_sunday - timedelta(weeks=cls.COLS - 1), today
+
+    def set_data(self, day_seconds, start_date: date, target_hours: float = 1.0):
         """
         设置热力图数据。
 
         Args:
-            all_daily_stats: 聚合后的每日统计 {date_str: total_seconds}
+            day_seconds: grid_range(today) 范围内每天的学习秒数
+                         （MainController.get_global_daily_totals，最后一项为今天）
+            start_date: 网格起始日，即 grid_range(today)[0]
             target_hours: 基准目标（小时/天），用于颜色分级
         """
-        self._all_daily_stats = all_daily_stats
+        self._day_seconds = day_seconds
+        self._start_date = start_date
         self._target_hours = max(target_hours, 0.1)
         self.update()
 
@@ -70,7 +84,7 @@ class HomeHeatMapWidget(QWidget):
         cell_size = 12
         cell_gap = 3
         step = cell_size + cell_gap
-        cols = 27  # 最多 27 周 ≈ 6 个月
+        cols = self.COLS
         rows = 7   # 周一~周日
 
         start_x = 24
@@ -84,12 +98,8 @@ class HomeHeatMapWidget(QWidget):
         c4 = QColor(theme["accent"])
 
         # ---- 生成日期网格 ----
-        today = date.today()
-        # 从最后一个周日开始，往前推 cols 周
-        end_sunday = today - timedelta(days=today.weekday() + 1)  # 上周日
-        if today.weekday() == 6:
-            end_sunday = today
-        start_date = end_sunday - timedelta(weeks=cols - 1)
+        start_date = self._start_date
+        day_seconds = self._day_seconds
 
         # 月份标签位置
         month_positions = {}  # col -> month_label
@@ -122,11 +132,11 @@ class HomeHeatMapWidget(QWidget):
             week_start = start_date + timedelta(weeks=col)
             for row in range(rows):
                 d = week_start + timedelta(days=row)
-                if d > today:
+                i = (d - start_date).days
+                if i >= len(day_seconds):  # 今天之后
                     continue
 
-                d_str = d.strftime("%Y-%m-%d")
-                secs = self._all_daily_stats.get(d_str, 0)
+                secs = day_seconds[i]
                 hours = secs / 3600.0
 
                 x = start_x + col * step
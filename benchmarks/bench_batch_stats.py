@@ -0,0 +1,78 @@
+"""批量统计基准 — 逐门课程计算卡片数据与 NumPy 批量计算的耗时对比
+
+两条路径都在统计缓存为空时计算（相当于跨日后的第一次首页刷新）。
+
+用法：
+    python benchmarks/bench_batch_stats.py
+"""
+
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from bench_lookups import use_data_dir  # noqa: E402
+from models import batch_stats  # noqa: E402
+
+LIBRARY_SIZES = [50, 500, 5000]
+VIDEOS_PER_COURSE = 20
+REPEAT = 5
+
+
+def build(n_courses: int):
+    """构造带计划和学习记录的课程库，返回重新加载后的 DataManager"""
+    from models.data_manager import DataManager
+    from models.video_table import VideoTable
+    rng = random.Random(n_courses)
+    dm = DataManager()
+    for c in range(n_courses):
+        table = VideoTable.from_dicts({"rel_path": f"{i:03d}.mp4", "duration": 600.0}
+                                      for i in range(VIDEOS_PER_COURSE))
+        for i in range(rng.randrange(VIDEOS_PER_COURSE)):
+            table.set_progress(i, 600.0, True, None)
+        dm.data["courses"].append({
+            "id": f"course-{c}", "name": f"课程 {c}", "path": f"/library/{c}",
+            "added_at": None, "total_videos": VIDEOS_PER_COURSE,
+            "total_duration": 600.0 * VIDEOS_PER_COURSE,
+            "start_date": f"2026-0{rng.randrange(1, 6)}-01",
+            "weekly_schedule": [rng.choice([0.0, 0.5, 1.0, 2.0]) for _ in range(7)],
+            "daily_stats": {f"2026-05-{d:02d}": rng.randrange(600, 7200) for d in range(1, 29, 3)},
+            "videos": table,
+        })
+    dm._save_data()
+    dm.close()
+    return DataManager(save_interval=3600)
+
+
+def per_call_ms(dm, fn) -> float:
+    elapsed = 0.0
+    for _ in range(REPEAT):
+        dm.stats_cache.clear()
+        start = time.perf_counter()
+        fn()
+        elapsed += time.perf_counter() - start
+    return elapsed / REPEAT * 1000
+
+
+def main():
+    logging.disable(logging.INFO)
+    if not batch_stats.NUMPY_AVAILABLE:
+        print("未安装 NumPy，批量路径回退为逐门课程计算")
+    print(f"{'课程数':<8}{'逐门(ms)':>10}{'批量(ms)':>10}{'加速比':>8}")
+    for n_courses in LIBRARY_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            use_data_dir(Path(tmp))
+            dm = build(n_courses)
+            assert dm.compute_all_card_data() == dm.get_course_card_data()
+            per_course = per_call_ms(dm, dm.get_course_card_data)
+            batch = per_call_ms(dm, dm.compute_all_card_data)
+            print(f"{n_courses:<8}{per_course:>10.2f}{batch:>10.2f}{per_course / batch:>8.1f}")
+            dm.close()
+
+
+if __name__ == "__main__":
+    main()
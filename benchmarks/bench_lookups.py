@@ -0,0 +1,80 @@
+"""查找基准 — 课程 ID、课程路径、视频 rel_path 的查找耗时与课程库大小无关
+
+用法：
+    python benchmarks/bench_lookups.py
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from utils.paths import PathManager  # noqa: E402
+
+LIBRARY_SIZES = [(10, 100), (100, 1000), (1000, 1000)]  # (课程数, 每门课程视频数)
+ITERATIONS = 20_000
+
+
+def use_data_dir(root: Path):
+    """把 PathManager 指向临时目录"""
+    PathManager.DATA_DIR = root / "data"
+    PathManager.LOG_DIR = root / "logs"
+    PathManager.COURSES_JSON = root / "data" / "courses.json"
+    PathManager.COURSES_DB = root / "data" / "courses.db"
+    PathManager.COURSES_DIR = root / "data" / "courses"
+    PathManager.META_JSON = root / "data" / "meta.json"
+
+
+def build(n_courses: int, n_videos: int):
+    """直接构造数据并一次性保存，返回重新加载后的 DataManager"""
+    from models.data_manager import DataManager
+    from models.video_table import VideoTable
+    dm = DataManager()
+    for c in range(n_courses):
+        dm.data["courses"].append({
+            "id": f"course-{c}", "name": f"课程 {c}", "path": f"/library/{c}",
+            "added_at": None, "total_videos": n_videos, "total_duration": 600.0 * n_videos,
+            "start_date": None, "weekly_schedule": [1.0] * 7, "daily_stats": {},
+            "videos": VideoTable.from_dicts({"rel_path": f"{i:05d}.mp4", "duration": 600.0}
+                                            for i in range(n_videos)),
+        })
+    dm._save_data()
+    dm.close()
+    return DataManager(save_interval=3600)
+
+
+def per_call_us(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'课程×视频':<14}{'按ID(µs)':>10}{'按路径(µs)':>12}{'进度更新(µs)':>14}{'线性扫描(µs)':>14}")
+    for n_courses, n_videos in LIBRARY_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            use_data_dir(Path(tmp))
+            dm = build(n_courses, n_videos)
+            last_id = f"course-{n_courses - 1}"
+            last_rel = f"{n_videos - 1:05d}.mp4"
+            dm.get_course_by_id(last_id)  # 预先加载视频列表
+
+            by_id = per_call_us(lambda: dm._find_course(last_id))
+            by_path = per_call_us(lambda: dm.find_course_by_path(f"/library/{n_courses - 1}"))
+            progress = per_call_us(lambda: dm.update_video_progress(last_id, last_rel, 1.0, False))
+            # 原字典布局下的线性扫描，作为对照
+            courses = [{"id": c["id"], "videos": c["videos"].to_dicts() if "videos" in c else []}
+                       for c in dm.get_courses()]
+            linear = per_call_us(lambda: next(
+                v for c in courses if c["id"] == last_id for v in c["videos"] if v["rel_path"] == last_rel))
+            print(f"{n_courses}×{n_videos:<10}{by_id:>10.2f}{by_path:>12.2f}{progress:>14.2f}{linear:>14.2f}")
+            dm.close()
+
+
+if __name__ == "__main__":
+    main()
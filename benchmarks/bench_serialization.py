@@ -0,0 +1,79 @@
+"""序列化格式基准 — 比较各格式在 1 万 / 10 万个视频时的保存、加载耗时与文件大小
+
+用法：
+    python benchmarks/bench_serialization.py [视频数 ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+import utils.serialization as serialization  # noqa: E402
+from utils.atomic_write import atomic_write_bytes, safe_read_json  # noqa: E402
+
+REPEAT = 3
+
+
+def make_course(n_videos: int) -> dict:
+    """构造一个含 n_videos 个视频的课程分片"""
+    return {
+        "daily_stats": {f"2026-{m:02d}-{d:02d}": 1800.0 for m in range(1, 13) for d in range(1, 29)},
+        "videos": [{
+            "rel_path": f"第{i // 100:03d}章/{i:06d} 课程视频.mp4",
+            "duration": 600.0 + i % 300,
+            "watched_duration": float(i % 600),
+            "completed": i % 3 == 0,
+            "last_watched": "2026-06-20T12:00:00" if i % 2 else None,
+        } for i in range(n_videos)],
+    }
+
+
+def best_of(fn) -> float:
+    """多次运行取最短耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def variants() -> list[tuple[str, str, bool]]:
+    """(显示名, 格式, 是否使用 orjson)"""
+    result = [("json (indent=4)", serialization.FORMAT_JSON, False),
+              ("json-compact stdlib", serialization.FORMAT_JSON_COMPACT, False)]
+    if serialization.ORJSON_AVAILABLE:
+        result.append(("json-compact orjson", serialization.FORMAT_JSON_COMPACT, True))
+    if serialization.MSGPACK_AVAILABLE:
+        result.append(("msgpack", serialization.FORMAT_MSGPACK, False))
+    return result
+
+
+def run(n_videos: int, directory: Path):
+    data = make_course(n_videos)
+    orjson_available = serialization.ORJSON_AVAILABLE
+    print(f"\n{n_videos} 个视频")
+    print(f"{'格式':<22}{'大小(KB)':>10}{'保存(ms)':>10}{'加载(ms)':>10}")
+    for label, fmt, use_orjson in variants():
+        serialization.ORJSON_AVAILABLE = use_orjson
+        path = directory / f"bench-{n_videos}.dat"
+        save_ms = best_of(lambda: atomic_write_bytes(path, serialization.encode(data, fmt)))
+        load_ms = best_of(lambda: safe_read_json(path))
+        assert safe_read_json(path) == data
+        size_kb = path.stat().st_size / 1024
+        print(f"{label:<22}{size_kb:>10.0f}{save_ms:>10.1f}{load_ms:>10.1f}")
+    serialization.ORJSON_AVAILABLE = orjson_available
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            run(n, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
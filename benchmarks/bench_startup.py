@@ -0,0 +1,71 @@
+"""启动基准 — 比较一次性加载全部视频与两级按需加载的启动耗时和常驻内存
+
+用法：
+    python benchmarks/bench_startup.py [课程数] [每门课程视频数]
+"""
+
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from utils.paths import PathManager  # noqa: E402
+
+
+def use_data_dir(root: Path):
+    """把 PathManager 指向临时目录"""
+    PathManager.DATA_DIR = root / "data"
+    PathManager.LOG_DIR = root / "logs"
+    PathManager.COURSES_JSON = root / "data" / "courses.json"
+    PathManager.COURSES_DB = root / "data" / "courses.db"
+    PathManager.COURSES_DIR = root / "data" / "courses"
+    PathManager.META_JSON = root / "data" / "meta.json"
+
+
+def build_library(n_courses: int, n_videos: int):
+    from models.data_manager import DataManager
+    dm = DataManager()
+    for c in range(n_courses):
+        videos = [{"rel_path": f"第{i // 50:02d}章/{i:05d}.mp4", "abs_path": "", "duration": 600.0}
+                  for i in range(n_videos)]
+        course = dm.add_course(f"课程 {c}", f"/library/{c}", videos,
+                               {"total_videos": n_videos, "total_duration": 600.0 * n_videos})
+        for i in range(0, n_videos, 3):
+            dm.update_video_progress(course["id"], videos[i]["rel_path"], 600.0, True)
+    dm.close()
+
+
+def measure(label: str, **kwargs):
+    from models.data_manager import DataManager
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    dm = DataManager(**kwargs)
+    dm.get_course_card_data()  # 首页首次绘制所需的数据
+    elapsed = (time.perf_counter() - start) * 1000
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16}{elapsed:>10.1f}{current / 1024 / 1024:>12.1f}{dm.io_stats['shards_loaded']:>10}")
+    dm.close()
+
+
+def main():
+    n_courses = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_videos = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        use_data_dir(Path(tmp))
+        import logging
+        logging.disable(logging.INFO)
+        build_library(n_courses, n_videos)
+        print(f"{n_courses} 门课程 × {n_videos} 个视频")
+        print(f"{'模式':<14}{'启动(ms)':>10}{'常驻(MB)':>10}{'读取分片':>8}")
+        measure("全部加载", resident_courses=None)
+        measure("按需加载")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""视频进度表基准 — 比较视频字典列表与 VideoTable 的内存占用和聚合耗时
+
+用法：
+    python benchmarks/bench_video_table.py [视频数]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from utils.serialization import FORMAT_JSON_COMPACT, decode, encode  # noqa: E402
+from models.course_stats import VideoSummary  # noqa: E402
+from models.video_table import VideoTable  # noqa: E402
+
+
+def make_videos(n: int) -> list:
+    """模拟解码后的分片：三分之一已看完、三分之一看了一半、其余未观看"""
+    base = datetime(2026, 6, 1, 20, 0)
+    videos = []
+    for i in range(n):
+        watched = (600.0, 300.0, 0.0)[i % 3]
+        videos.append({
+            "rel_path": f"第{i // 50:03d}章/{i:06d}.mp4",
+            "duration": 600.0,
+            "watched_duration": watched,
+            "completed": i % 3 == 0,
+            "last_watched": (base + timedelta(minutes=i)).isoformat() if watched else None,
+        })
+    return videos
+
+
+def measure_memory(build) -> tuple:
+    """返回 (对象, 构建后新增的内存字节数)"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def per_call_ms(fn, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    shard = encode(make_videos(n), FORMAT_JSON_COMPACT)
+    # 两种布局都从同一份分片解码，只统计解码完成后仍常驻的内存
+    videos, dict_bytes = measure_memory(lambda: decode(shard))
+    table, table_bytes = measure_memory(lambda: VideoTable.from_dicts(decode(shard)))
+
+    print(f"{n} 个视频")
+    print(f"{'布局':<12}{'内存(MB)':>10}{'字节/视频':>10}{'聚合(ms)':>10}")
+    for label, size, summarize in (
+            ("视频字典", dict_bytes, lambda: VideoSummary.from_videos(videos)),
+            ("VideoTable", table_bytes, table.summary)):
+        print(f"{label:<12}{size / 1024 / 1024:>10.1f}{size / n:>10.0f}{per_call_ms(summarize):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
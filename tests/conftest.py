@@ -24,6 +24,10 @@ def tmp_data_dir(tmp_path, monkeypatch):
     """临时数据目录，mock PathManager 使其指向 tmp_path"""
     from utils.paths import PathManager
     monkeypatch.setattr(PathManager, "COURSES_JSON", tmp_path / "data" / "courses.json")
+    monkeypatch.setattr(PathManager, "COURSES_DB", tmp_path / "data" / "courses.db")
+    monkeypatch.setattr(PathManager, "COURSES_DIR", tmp_path / "data" / "courses")
+    monkeypatch.setattr(PathManager, "META_JSON", tmp_path / "data" / "meta.json")
+    monkeypatch.setattr(PathManager, "PROBE_CACHE_DB", tmp_path / "data" / "probe_cache.db")
     monkeypatch.setattr(PathManager, "DATA_DIR", tmp_path / "data")
     monkeypatch.setattr(PathManager, "LOG_DIR", tmp_path / "logs")
     yield tmp_path
@@ -39,31 +43,56 @@ def tmp_courses_json(tmp_data_dir):
     return courses_json
 
 
-# ---- 时间冻结 ----
+# ---- 测试数据 ----
 
 @pytest.fixture
-def frozen_datetime_now(monkeypatch):
-    """冻结 datetime.now() 到 2026-06-20 12:00:00"""
-    from datetime import datetime
+def make_course():
+    """
+    课程工厂：make_course(dm, name="A", n_videos=1, duration=600.0) → 新课程。
+
+    视频为 v0.mp4 … v{n-1}.mp4，课程路径为 "/<name>"；学习记录用 study_history 补充。
+    """
+    def factory(dm, name="A", n_videos=1, duration=600.0):
+        path = f"/{name}"
+        videos = [{"rel_path": f"v{i}.mp4", "abs_path": f"{path}/v{i}.mp4", "duration": duration}
+                  for i in range(n_videos)]
+        course = dm.add_course(name, path, videos,
+                               {"total_videos": n_videos, "total_duration": duration * n_videos})
+        return course
+    return factory
 
-    class FrozenDateTime(datetime):
-        @classmethod
-        def now(cls, tz=None):
-            return cls(2026, 6, 20, 12, 0, 0)
 
-    monkeypatch.setattr("models.data_manager.datetime", FrozenDateTime)
-    yield FrozenDateTime
+@pytest.fixture
+def study_history(frozen_clock):
+    """
+    学习记录：study_history(dm, course_id, {"YYYY-MM-DD": 秒数}, rel_path="v0.mp4")。
+
+    按日期顺序把时钟拨到当天中午，经由 update_video_progress 在 rel_path 上继续观看对应秒数，
+    daily_stats、每日索引、聚合值与存储都走正常的维护路径；结束后时钟拨回原处。
+    """
+    from datetime import date, datetime, time
+
+    def seed(dm, course_id, history, rel_path="v0.mp4"):
+        now = frozen_clock.now()
+        videos = dm.get_course_by_id(course_id)["videos"]
+        watched = videos.watched[videos.index_of(rel_path)]
+        for day, seconds in sorted(history.items()):
+            frozen_clock.set(datetime.combine(date.fromisoformat(day), time(12)))
+            watched += seconds
+            dm.update_video_progress(course_id, rel_path, watched, False)
+        frozen_clock.set(now)
+    return seed
 
 
-@pytest.fixture
-def frozen_date_today(monkeypatch):
-    """冻结 date.today() 到 2026-06-20"""
-    from datetime import date
+# ---- 时间冻结 ----
 
-    class FrozenDate(date):
-        @classmethod
-        def today(cls):
-            return cls(2026, 6, 20)
+@pytest.fixture
+def frozen_clock():
+    """把默认时钟替换为停在 2026-06-20 12:00:00 的 FixedClock，可用 set()/advance() 拨动"""
+    from datetime import datetime
+    from utils.clock import FixedClock, set_default_clock
 
-    monkeypatch.setattr("models.data_manager.date", FrozenDate)
-    yield FrozenDate
+    clock = FixedClock(datetime(2026, 6, 20, 12, 0, 0))
+    previous = set_default_clock(clock)
+    yield clock
+    set_default_clock(previous)
@@ -0,0 +1,181 @@
+"""测试 app/utils/async_writer.py — 后台写盘线程，使用 tmp_path"""
+
+import json
+import os
+import threading
+
+import pytest
+from utils.async_writer import AsyncWriter
+from utils.atomic_write import DURABILITY_FILE, DURABILITY_DIR
+
+
+def _block(writer):
+    """让写盘线程阻塞在一个回调上，返回用于放行的 Event"""
+    started = threading.Event()
+    gate = threading.Event()
+    writer.call(lambda: (started.set(), gate.wait()))
+    assert started.wait(5)
+    return gate
+
+
+class TestSubmit:
+    """submit() / flush() 测试"""
+
+    def test_write_roundtrip(self, tmp_path):
+        writer = AsyncWriter()
+        writer.submit(tmp_path / "a.json", b'{"v": 1}')
+        writer.flush()
+        assert json.loads((tmp_path / "a.json").read_bytes()) == {"v": 1}
+        assert writer.stats["written"] == 1
+        assert writer.stats["bytes"] == 8
+        writer.close()
+
+    def test_callable_payload_runs_on_writer_thread(self, tmp_path):
+        writer = AsyncWriter()
+        threads = []
+
+        def payload():
+            threads.append(threading.current_thread().name)
+            return b"x"
+
+        writer.submit(tmp_path / "a.bin", payload)
+        writer.flush()
+        assert threads == ["AsyncWriter"]
+        writer.close()
+
+    def test_newer_snapshot_supersedes_queued(self, tmp_path):
+        writer = AsyncWriter()
+        gate = _block(writer)  # 后续提交留在队列中
+        for i in range(5):
+            writer.submit(tmp_path / "a.json", str(i).encode())
+        assert writer.pending == 1
+        gate.set()
+        writer.flush()
+        assert (tmp_path / "a.json").read_bytes() == b"4"
+        assert writer.stats["written"] == 1
+        assert writer.stats["superseded"] == 4
+        writer.close()
+
+    def test_superseded_keeps_queue_position(self, tmp_path):
+        writer = AsyncWriter()
+        gate = _block(writer)
+        order = []
+        writer.submit(tmp_path / "a", lambda: order.append("a") or b"a")
+        writer.submit(tmp_path / "b", lambda: order.append("b") or b"b")
+        writer.submit(tmp_path / "a", lambda: order.append("a2") or b"a2")
+        gate.set()
+        writer.flush()
+        assert order == ["a2", "b"]
+        writer.close()
+
+
+class TestCall:
+    """call() 屏障测试"""
+
+    def test_call_runs_after_previous_writes(self, tmp_path):
+        writer = AsyncWriter()
+        seen = []
+        writer.submit(tmp_path / "a.json", b"1")
+        writer.call(lambda: seen.append((tmp_path / "a.json").exists()))
+        writer.flush()
+        assert seen == [True]
+        writer.close()
+
+    def test_on_failure_runs_instead_of_fn(self, tmp_path):
+        writer = AsyncWriter()
+        blocker = tmp_path / "file"
+        blocker.write_text("x")
+        calls = []
+        writer.submit(blocker / "a.json", b"1")  # 父路径是文件，写入失败
+        writer.call(lambda: calls.append("ok"), on_failure=lambda: calls.append("failed"))
+        writer.call(lambda: calls.append("ok"), on_failure=lambda: calls.append("failed"))
+        writer.flush()
+        assert calls == ["failed", "ok"]
+        assert writer.stats["failed"] == 1
+        assert writer.last_error is not None
+        writer.close()
+
+    def test_callback_exception_does_not_stop_thread(self, tmp_path):
+        writer = AsyncWriter()
+        writer.call(lambda: 1 / 0)
+        writer.submit(tmp_path / "a.json", b"1")
+        writer.flush()
+        assert (tmp_path / "a.json").exists()
+        assert isinstance(writer.last_error, ZeroDivisionError)
+        writer.close()
+
+
+class TestBackpressureAndShutdown:
+    """有界队列、wait_idle、close 测试"""
+
+    def test_wait_idle_timeout(self, tmp_path):
+        writer = AsyncWriter()
+        gate = _block(writer)
+        assert writer.wait_idle(timeout=0.05) is False
+        gate.set()
+        assert writer.wait_idle(timeout=5) is True
+        writer.close()
+
+    def test_submit_blocks_when_queue_full(self, tmp_path):
+        writer = AsyncWriter(max_pending=2)
+        gate = _block(writer)
+        writer.submit(tmp_path / "a", b"a")
+        writer.submit(tmp_path / "b", b"b")
+        done = threading.Event()
+
+        def producer():
+            writer.submit(tmp_path / "c", b"c")
+            done.set()
+
+        t = threading.Thread(target=producer)
+        t.start()
+        assert not done.wait(0.05)
+        gate.set()
+        assert done.wait(5)
+        t.join()
+        writer.flush()
+        assert (tmp_path / "c").read_bytes() == b"c"
+        writer.close()
+
+    def test_close_drains_queue(self, tmp_path):
+        writer = AsyncWriter()
+        for i in range(10):
+            writer.submit(tmp_path / f"{i}.bin", b"x")
+        writer.close()
+        assert len(list(tmp_path.glob("*.bin"))) == 10
+
+    def test_submit_after_close_raises(self, tmp_path):
+        writer = AsyncWriter()
+        writer.close()
+        with pytest.raises(RuntimeError):
+            writer.submit(tmp_path / "a", b"a")
+
+    def test_close_without_submit(self):
+        AsyncWriter().close()
+
+
+class TestDurability:
+    """持久性级别测试"""
+
+    def test_fsync_file(self, tmp_path, mocker):
+        spy = mocker.spy(os, "fsync")
+        writer = AsyncWriter(durability=DURABILITY_FILE)
+        writer.submit(tmp_path / "a", b"a")
+        writer.close()
+        assert spy.call_count == 1
+
+    @pytest.mark.skipif(os.name == "nt", reason="Windows 不支持 fsync 目录")
+    def test_fsync_dir(self, tmp_path, mocker):
+        spy = mocker.spy(os, "fsync")
+        writer = AsyncWriter(durability=DURABILITY_DIR)
+        writer.submit(tmp_path / "a", b"a")
+        writer.close()
+        assert spy.call_count == 2
+        assert (tmp_path / "a").read_bytes() == b"a"
+
+    def test_default_does_not_fsync(self, tmp_path, mocker):
+        spy = mocker.spy(os, "fsync")
+        writer = AsyncWriter()
+        writer.submit(tmp_path / "a", b"a")
+        writer.close()
+        assert spy.call_count == 0
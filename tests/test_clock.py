@@ -0,0 +1,104 @@
+"""测试 app/utils/clock.py — 今天日期的缓存与午夜刷新，纯函数"""
+
+from datetime import date, datetime
+
+import pytest
+
+from utils.clock import Clock, FixedClock, default_clock, set_default_clock
+
+
+class FakeTime:
+    """可手动拨动的本地时间"""
+
+    def __init__(self, now: datetime):
+        self.current = now
+        self.now_calls = 0
+
+    def now(self):
+        self.now_calls += 1
+        return self.current
+
+    def epoch(self):
+        return self.current.timestamp()
+
+    def advance(self, seconds: float):
+        from datetime import timedelta
+        self.current += timedelta(seconds=seconds)
+
+
+class TestClock:
+    """Clock 测试"""
+
+    def test_today_cached_until_midnight(self):
+        t = FakeTime(datetime(2026, 6, 20, 23, 0, 0))
+        clock = Clock(now=t.now, epoch=t.epoch)
+        assert clock.today() == date(2026, 6, 20)
+        assert clock.today_key() == "2026-06-20"
+        calls = t.now_calls
+        t.advance(3599)
+        assert clock.today_key() == "2026-06-20"
+        assert t.now_calls == calls
+
+    def test_rolls_over_after_midnight(self):
+        t = FakeTime(datetime(2026, 6, 20, 23, 0, 0))
+        clock = Clock(now=t.now, epoch=t.epoch)
+        clock.today()
+        t.advance(3600)
+        assert clock.today() == date(2026, 6, 21)
+        assert clock.today_key() == "2026-06-21"
+
+    def test_refresh_reports_change(self):
+        t = FakeTime(datetime(2026, 6, 20, 12, 0, 0))
+        clock = Clock(now=t.now, epoch=t.epoch)
+        assert clock.refresh()
+        assert not clock.refresh()
+
+    def test_rolls_over_after_suspend(self):
+        """休眠期间单调时钟停走，唤醒后按墙上时钟仍能发现日期变化"""
+        t = FakeTime(datetime(2026, 6, 20, 22, 0, 0))
+        clock = Clock(now=t.now, epoch=t.epoch)
+        clock.today()
+        t.advance(10 * 3600)  # 只有墙上时钟前进
+        assert clock.today_key() == "2026-06-21"
+
+    def test_wall_clock_set_back(self):
+        t = FakeTime(datetime(2026, 6, 21, 0, 30, 0))
+        clock = Clock(now=t.now, epoch=t.epoch)
+        clock.today()
+        t.advance(-3600)
+        assert clock.today() == date(2026, 6, 20)
+
+    def test_seconds_until_midnight_on_dst_change(self, monkeypatch):
+        """夏令时切换日的午夜倒计时按实际经过的秒数计算"""
+        import time
+        if not hasattr(time, "tzset"):
+            pytest.skip("需要 time.tzset")
+        monkeypatch.setenv("TZ", "Europe/Berlin")
+        time.tzset()
+        try:
+            # 2026-03-29 02:00 → 03:00，当天只有 23 小时
+            assert Clock().seconds_until_midnight(datetime(2026, 3, 29, 0, 0, 0)) == 23 * 3600
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+
+    def test_seconds_until_midnight(self):
+        assert Clock().seconds_until_midnight(datetime(2026, 6, 20, 23, 59, 30)) == 30.0
+
+
+class TestFixedClock:
+    """FixedClock 与默认时钟测试"""
+
+    def test_set_and_advance(self):
+        clock = FixedClock(datetime(2026, 6, 20, 12, 0, 0))
+        assert clock.today() == date(2026, 6, 20)
+        assert not clock.advance(hours=11)
+        assert clock.advance(hours=1)
+        assert clock.today_key() == "2026-06-21"
+        assert clock.now() == datetime(2026, 6, 21, 0, 0, 0)
+
+    def test_default_clock_replaceable(self, frozen_clock):
+        assert default_clock() is frozen_clock
+        previous = set_default_clock(Clock())
+        assert previous is frozen_clock
+        set_default_clock(previous)
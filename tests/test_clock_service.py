@@ -0,0 +1,33 @@
+"""测试 app/services/clock_service.py — 需要 QApplication"""
+
+from datetime import date, datetime
+
+from services.clock_service import ClockService
+from utils.clock import FixedClock
+
+
+class TestClockService:
+    """ClockService 测试"""
+
+    def test_emits_once_per_new_day(self, qapp):
+        clock = FixedClock(datetime(2026, 6, 20, 23, 59, 0))
+        service = ClockService(clock)
+        received = []
+        service.date_changed.connect(received.append)
+
+        service.check_date()
+        clock.advance(minutes=2)
+        service.check_date()
+        service.check_date()
+        assert received == [date(2026, 6, 21)]
+
+    def test_timer_targets_next_midnight(self, qapp):
+        service = ClockService(FixedClock(datetime(2026, 6, 20, 23, 59, 30)))
+        assert service._timer.isActive()
+        assert service._timer.interval() == 30 * 1000 + ClockService.MIDNIGHT_MARGIN_MS
+        assert service.today_key() == "2026-06-20"
+
+    def test_timer_rechecks_periodically(self, qapp):
+        """定时器在系统休眠期间停走，距午夜较远时也定期检查"""
+        service = ClockService(FixedClock(datetime(2026, 6, 20, 12, 0, 0)))
+        assert service._timer.interval() == ClockService.MAX_CHECK_INTERVAL_MS
@@ -158,3 +158,26 @@ class TestDashboardData:
         dash2 = DashboardData()
         dash1.daily_stats["2026-06-20"] = 3600
         assert "2026-06-20" not in dash2.daily_stats
+
+
+class TestCourseAggregates:
+    """CourseAggregates 增量更新测试"""
+
+    def test_from_summary(self):
+        from models.course_stats import CourseAggregates, VideoSummary
+        summary = VideoSummary(video_count=2, completed_videos=1, watched_sec=700.0, remaining_sec=500.0)
+        assert CourseAggregates.from_summary(summary).video_summary() == summary
+
+    def test_apply_video_change(self):
+        from models.course_stats import CourseAggregates
+        agg = CourseAggregates(video_count=1, remaining_sec=600.0)
+        agg.apply_video_change(600.0, 0.0, False, 200.0, False)
+        assert (agg.watched_sec, agg.remaining_sec, agg.completed_videos) == (200.0, 400.0, 0)
+        agg.apply_video_change(600.0, 200.0, False, 550.0, True)
+        assert (agg.watched_sec, agg.remaining_sec, agg.completed_videos) == (550.0, 0.0, 1)
+
+    def test_watched_past_duration_has_no_negative_remaining(self):
+        from models.course_stats import CourseAggregates
+        agg = CourseAggregates(video_count=1, remaining_sec=600.0)
+        agg.apply_video_change(600.0, 0.0, False, 700.0, False)
+        assert agg.remaining_sec == 0.0
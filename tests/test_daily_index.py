@@ -0,0 +1,105 @@
+"""测试 app/models/daily_index.py — 每日学习索引的区间查询与增量更新，纯内存"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from models.daily_index import DailyIndex
+
+
+STATS = {"2026-06-01": 600.0, "2026-06-03": 1200.0, "2026-06-20": 300.0}
+
+
+class TestBuild:
+    """from_stats() 测试"""
+
+    def test_empty(self):
+        index = DailyIndex.from_stats({})
+        assert index.total == 0.0
+        assert index.day_count == 0
+        assert index.between(date(2026, 1, 1), date(2026, 12, 31)) == 0.0
+
+    def test_multiple_stats_are_summed_per_day(self):
+        index = DailyIndex.from_stats(STATS, {"2026-06-03": 100.0, "2026-06-05": 50.0})
+        assert index.day_seconds(date(2026, 6, 3)) == 1300.0
+        assert index.day_count == 4
+        assert index.total == 2250.0
+
+    def test_invalid_keys_ignored(self):
+        index = DailyIndex.from_stats({"昨天": 60.0, "2026-06-01": 60.0})
+        assert index.total == 60.0
+        assert index.day_count == 1
+
+
+class TestQuery:
+    """between() / last_days() / values() 测试"""
+
+    def test_between_inclusive(self):
+        index = DailyIndex.from_stats(STATS)
+        assert index.between(date(2026, 6, 1), date(2026, 6, 3)) == 1800.0
+        assert index.between(date(2026, 6, 2), date(2026, 6, 19)) == 1200.0
+        assert index.between("2026-05-01", "2026-07-01") == 2100.0
+
+    def test_range_outside_records(self):
+        index = DailyIndex.from_stats(STATS)
+        assert index.between(date(2026, 7, 1), date(2026, 7, 31)) == 0.0
+        assert index.between(date(2026, 6, 5), date(2026, 6, 4)) == 0.0
+
+    def test_last_days(self):
+        index = DailyIndex.from_stats(STATS)
+        assert index.last_days(1, date(2026, 6, 20)) == 300.0
+        assert index.last_days(20, date(2026, 6, 20)) == 2100.0
+        assert index.last_days(0, date(2026, 6, 20)) == 0.0
+
+    def test_values_pads_with_zero(self):
+        index = DailyIndex.from_stats(STATS)
+        values = index.values(date(2026, 5, 30), date(2026, 6, 4))
+        assert values == [0.0, 0.0, 600.0, 0.0, 1200.0, 0.0]
+        assert index.values(date(2026, 7, 1), date(2026, 7, 2)) == [0.0, 0.0]
+
+    def test_window_is_compact_array(self):
+        index = DailyIndex.from_stats(STATS)
+        window = index.window(date(2026, 5, 30), date(2026, 6, 4))
+        assert window.typecode == "d"
+        assert list(window) == [0.0, 0.0, 600.0, 0.0, 1200.0, 0.0]
+        assert len(index.window(date(2026, 6, 5), date(2026, 6, 4))) == 0
+        assert list(DailyIndex().window(date(2026, 6, 1), date(2026, 6, 2))) == [0.0, 0.0]
+
+
+class TestAdd:
+    """add() 增量更新测试"""
+
+    def test_append_today(self):
+        index = DailyIndex.from_stats(STATS)
+        index.add(date(2026, 6, 22), 100.0)
+        index.add("2026-06-22", 50.0)
+        assert index.day_seconds(date(2026, 6, 22)) == 150.0
+        assert index.day_count == 4
+        assert index.total == 2250.0
+
+    def test_add_before_origin(self):
+        index = DailyIndex.from_stats(STATS)
+        index.add(date(2026, 5, 30), 10.0)
+        assert index.between(date(2026, 5, 1), date(2026, 6, 1)) == 610.0
+        assert index.matches(DailyIndex.from_stats({**STATS, "2026-05-30": 10.0}))
+
+    def test_add_to_empty(self):
+        index = DailyIndex()
+        index.add(date(2026, 6, 20), 60.0)
+        assert index.last_days(7, date(2026, 6, 20)) == 60.0
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_rebuild_and_dict_sums(self, seed):
+        rng = random.Random(seed)
+        stats = {}
+        index = DailyIndex()
+        base = date(2026, 1, 1)
+        for _ in range(100):
+            day = (base + timedelta(days=rng.randrange(200))).isoformat()
+            seconds = float(rng.randrange(1, 3600))
+            stats[day] = stats.get(day, 0.0) + seconds
+            index.add(day, seconds)
+        assert index.matches(DailyIndex.from_stats(stats))
+        lo, hi = sorted(base + timedelta(days=rng.randrange(220)) for _ in range(2))
+        expected = sum(v for k, v in stats.items() if lo <= date.fromisoformat(k) <= hi)
+        assert index.between(lo, hi) == pytest.approx(expected)
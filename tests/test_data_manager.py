@@ -1,29 +1,18 @@
 """测试 app/models/data_manager.py — 核心业务逻辑，需要 mock 时间和文件系统"""
 
 import json
+import random
+import threading
+from datetime import date, timedelta
 from unittest.mock import ANY
 
 import pytest
 
 
 @pytest.fixture
-def frozen_time(monkeypatch):
-    """冻结 datetime.now() 和 date.today()"""
-    from datetime import datetime, date
-
-    class FrozenDateTime(datetime):
-        @classmethod
-        def now(cls, tz=None):
-            return cls(2026, 6, 20, 12, 0, 0)
-
-    class FrozenDate(date):
-        @classmethod
-        def today(cls):
-            return cls(2026, 6, 20)
-
-    monkeypatch.setattr("models.data_manager.datetime", FrozenDateTime)
-    monkeypatch.setattr("models.data_manager.date", FrozenDate)
-    return FrozenDateTime, FrozenDate
+def frozen_time(frozen_clock):
+    """冻结时间到 2026-06-20 12:00:00（默认时钟替换为 FixedClock）"""
+    return frozen_clock
 
 
 @pytest.fixture
@@ -374,3 +363,1025 @@ class TestStreak:
         course = dm.add_course("NoAct", "/na", [], {"total_videos": 0, "total_duration": 0})
         stats = dm.calculate_course_stats(course["id"])
         assert stats.streak_days == 0
+
+    def test_rebuilt_from_log_at_load(self, tmp_data_dir, frozen_time):
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        dm = DataManager()
+        dm.data["activity_log"] = {"2026-06-01": 1, "2026-06-02": 2, "2026-06-03": 1,
+                                   "2026-06-18": 1, "2026-06-19": 3}
+        dm._save_data()
+        dm.close()
+        dm2 = DataManager()
+        assert dm2._calculate_streak() == 2
+        assert dm2.get_longest_streak() == 3
+
+    def test_completion_extends_streak(self, dm):
+        course = dm.add_course("S", "/s", [{"rel_path": "v.mp4", "abs_path": "", "duration": 60.0},
+                                           {"rel_path": "w.mp4", "abs_path": "", "duration": 60.0}],
+                               {"total_videos": 2, "total_duration": 120.0})
+        dm.data.setdefault("activity_log", {})["2026-06-19"] = 1
+        dm._streak.record(date(2026, 6, 19))
+        dm.update_video_progress(course["id"], "v.mp4", 60.0, True)
+        dm.update_video_progress(course["id"], "w.mp4", 60.0, True)
+        assert dm._calculate_streak() == 2
+        assert dm.get_longest_streak() == 2
+
+
+class FakeMonotonic:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def _hold_writer(mocker):
+    """让写盘线程在第一次写文件时停住，返回 (已开始, 放行) 两个 Event"""
+    import utils.async_writer as async_writer
+    real = async_writer.atomic_write_bytes
+    started, release = threading.Event(), threading.Event()
+
+    def held(path, payload, durability):
+        started.set()
+        release.wait(5)
+        real(path, payload, durability=durability)
+
+    mocker.patch.object(async_writer, "atomic_write_bytes", side_effect=held)
+    return started, release
+
+
+def _returns_promptly(fn) -> bool:
+    """在另一线程调用 fn，1 秒内返回则为 True"""
+    thread = threading.Thread(target=fn, daemon=True)
+    thread.start()
+    thread.join(1)
+    return not thread.is_alive()
+
+
+def _simulate_playback(dm, clock, course_id, seconds: int):
+    """
+    模拟播放：每秒上报一次进度（与 DetailPlayerView._update_ui 一致）。
+
+    两次上报之间写盘线程有一整秒写完上一次压缩，这里等它空闲以保持计数确定。
+    """
+    for sec in range(1, seconds + 1):
+        clock.advance(1.0)
+        dm.update_video_progress(course_id, "v.mp4", watched_duration=float(sec), completed=False)
+        dm.store.writer.wait_idle()
+
+
+class TestSavePolicy:
+    """播放进度延迟写回（write-behind）测试"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeMonotonic()
+
+    def _make(self, clock, save_interval):
+        from models.data_manager import DataManager
+        dm = DataManager(save_interval=save_interval, monotonic=clock)
+        course = dm.add_course("Play", "/play",
+                               [{"rel_path": "v.mp4", "abs_path": "/play/v.mp4", "duration": 3600.0}],
+                               {"total_videos": 1, "total_duration": 3600.0})
+        dm.io_stats.update(saves=0, bytes_written=0)
+        return dm, course["id"]
+
+    def test_progress_marks_dirty_without_saving(self, tmp_data_dir, tmp_courses_json, frozen_time, clock):
+        dm, cid = self._make(clock, save_interval=5.0)
+        clock.advance(1.0)
+        dm.update_video_progress(cid, "v.mp4", 1.0, False)
+        assert dm.is_dirty
+        assert dm.io_stats["saves"] == 0
+
+    def test_saves_at_most_every_interval(self, tmp_data_dir, tmp_courses_json, frozen_time, clock):
+        dm, cid = self._make(clock, save_interval=5.0)
+        _simulate_playback(dm, clock, cid, 60)
+        assert dm.io_stats["saves"] == 12
+
+    def test_bytes_per_minute_lower_than_immediate(self, tmp_data_dir, tmp_courses_json, frozen_time, clock):
+        eager, eager_id = self._make(clock, save_interval=0)
+        _simulate_playback(eager, clock, eager_id, 60)
+        assert eager.io_stats["saves"] == 60
+        eager_bytes = eager.io_stats["bytes_written"]
+        eager.delete_course(eager_id)
+
+        lazy, lazy_id = self._make(clock, save_interval=5.0)
+        _simulate_playback(lazy, clock, lazy_id, 60)
+
+        assert lazy.io_stats["bytes_written"] * 4 < eager_bytes
+
+    def test_flush_writes_pending_progress(self, tmp_data_dir, tmp_courses_json, frozen_time, clock):
+        dm, cid = self._make(clock, save_interval=5.0)
+        clock.advance(1.0)
+        dm.update_video_progress(cid, "v.mp4", 42.0, False)
+        dm.flush()
+        assert not dm.is_dirty
+
+        from utils.paths import PathManager
+        shard = json.loads((PathManager.COURSES_DIR / f"{cid}.json").read_text(encoding="utf-8"))
+        assert shard["videos"][0]["watched_duration"] == 42.0
+
+    def test_flush_when_clean_is_noop(self, tmp_data_dir, tmp_courses_json, frozen_time, clock):
+        dm, _ = self._make(clock, save_interval=5.0)
+        dm.flush()
+        assert dm.io_stats["saves"] == 0
+
+    def test_structural_change_saves_immediately(self, tmp_data_dir, tmp_courses_json, frozen_time, clock):
+        dm, cid = self._make(clock, save_interval=5.0)
+        dm.update_course_name(cid, "Renamed")
+        assert dm.io_stats["saves"] == 1
+        assert not dm.is_dirty
+
+
+class TestProgressJournal:
+    """进度日志（WAL）集成测试"""
+
+    def test_progress_recovered_after_crash(self, tmp_data_dir, tmp_courses_json, frozen_time, make_course):
+        """未压缩快照就「崩溃」，重启时从日志恢复进度"""
+        from models.data_manager import DataManager
+        dm = DataManager(save_interval=3600)
+        cid = make_course(dm, "Journal")["id"]
+        dm.update_video_progress(cid, "v0.mp4", 200.0, False)
+        dm.update_video_progress(cid, "v0.mp4", 600.0, True)
+        assert dm.is_dirty
+
+        dm2 = DataManager()
+        course = dm2.get_course_by_id(cid)
+        assert course["videos"][0]["watched_duration"] == 600.0
+        assert course["videos"][0]["completed"] is True
+        assert course["daily_stats"]["2026-06-20"] == 600.0
+        assert dm2.get_activity_log() == {"2026-06-20": 1}
+
+    def test_journal_bytes_independent_of_library_size(self, tmp_data_dir, tmp_courses_json, frozen_time,
+                                                       make_course):
+        from models.data_manager import DataManager
+        sizes = []
+        for n_videos in (1, 500):
+            dm = DataManager(save_interval=3600)
+            cid = make_course(dm, "Journal", n_videos)["id"]
+            before = dm.io_stats["journal_bytes"]
+            dm.update_video_progress(cid, "v0.mp4", 10.0, False)
+            sizes.append(dm.io_stats["journal_bytes"] - before)
+            dm.delete_course(cid)
+        assert sizes[0] == sizes[1]
+
+    def test_flush_compacts_journal(self, tmp_data_dir, tmp_courses_json, frozen_time, make_course):
+        from models.data_manager import DataManager
+        dm = DataManager(save_interval=3600)
+        cid = make_course(dm, "Journal")["id"]
+        dm.update_video_progress(cid, "v0.mp4", 100.0, False)
+        dm.flush()
+
+        assert dm.store.journal.read_records() == []
+        dm2 = DataManager()
+        assert not dm2.is_dirty
+        assert dm2.get_course_by_id(cid)["videos"][0]["watched_duration"] == 100.0
+
+    def test_background_compaction(self, tmp_data_dir, tmp_courses_json, frozen_time, make_course):
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        clock = FakeMonotonic()
+        dm = DataManager(save_interval=60, monotonic=clock)
+        cid = make_course(dm, "Journal")["id"]
+        clock.advance(61)
+        dm.update_video_progress(cid, "v0.mp4", 100.0, False)
+        dm.flush()  # 等待后台压缩结束
+
+        shard = json.loads((PathManager.COURSES_DIR / f"{cid}.json").read_text(encoding="utf-8"))
+        assert shard["videos"][0]["watched_duration"] == 100.0
+        assert dm.store.journal.read_records() == []
+
+    def test_flush_without_wait_does_not_block(self, tmp_data_dir, tmp_courses_json, frozen_time, mocker,
+                                               make_course):
+        """定时保存只把快照交给写盘线程；上一次压缩未写完时跳过，脏数据留待下次"""
+        from models.data_manager import DataManager
+        dm = DataManager(save_interval=3600)
+        cid = make_course(dm, "Journal")["id"]
+        started, release = _hold_writer(mocker)
+        dm.update_video_progress(cid, "v0.mp4", 100.0, False)
+        assert _returns_promptly(lambda: dm.flush(wait=False))
+        assert started.wait(1)
+
+        dm.update_video_progress(cid, "v0.mp4", 200.0, False)
+        assert _returns_promptly(lambda: dm.flush(wait=False))
+        assert dm.is_dirty
+
+        release.set()
+        dm.store.writer.wait_idle()
+        dm.flush(wait=False)
+        dm.store.writer.wait_idle()
+        assert not dm.is_dirty
+        assert dm.store.journal.read_records() == []
+        assert DataManager().get_course_by_id(cid)["videos"][0]["watched_duration"] == 200.0
+
+    def test_failed_background_write_keeps_journal(self, tmp_data_dir, tmp_courses_json, frozen_time, mocker,
+                                                   make_course):
+        """后台写盘失败时日志段保留，下次写盘重新写出全部文件"""
+        from models.data_manager import DataManager
+        import utils.async_writer as async_writer
+        clock = FakeMonotonic()
+        dm = DataManager(save_interval=60, monotonic=clock)
+        cid = make_course(dm, "Journal")["id"]
+        failing = mocker.patch.object(async_writer, "atomic_write_bytes", side_effect=OSError("disk full"))
+        clock.advance(61)
+        dm.update_video_progress(cid, "v0.mp4", 100.0, False)
+        dm.store.writer.flush()
+        assert len(dm.store.journal.read_records()) == 1
+
+        mocker.stop(failing)
+        dm.flush()
+        assert dm.store.journal.read_records() == []
+        assert DataManager().get_course_by_id(cid)["videos"][0]["watched_duration"] == 100.0
+
+
+class TestSqliteBackend:
+    """DataManager 在 SQLite 后端下的行为与 JSON 后端一致"""
+
+    @pytest.fixture
+    def sdm(self, tmp_data_dir, frozen_time):
+        from models.data_manager import DataManager
+        dm = DataManager(backend="sqlite")
+        yield dm
+        dm.close()
+
+    def test_selected_backend(self, sdm):
+        from models.sqlite_store import SqliteStore
+        assert isinstance(sdm.store, SqliteStore)
+        assert sdm.data == {"courses": []}
+
+    def test_progress_persists(self, sdm):
+        course = sdm.add_course("Sql", "/sql",
+                                [{"rel_path": "v.mp4", "abs_path": "/sql/v.mp4", "duration": 600.0}],
+                                {"total_videos": 1, "total_duration": 600.0})
+        sdm.update_video_progress(course["id"], "v.mp4", 600.0, True)
+        sdm.set_weekly_schedule(course["id"], [1.0] * 7, "2026-06-15")
+        sdm.set_setting("theme", "light")
+
+        from models.data_manager import DataManager
+        dm2 = DataManager()  # courses.db 已存在 → 自动选择 SQLite
+        reloaded = dm2.get_course_by_id(course["id"])
+        assert reloaded["videos"][0]["completed"] is True
+        assert reloaded["daily_stats"] == {"2026-06-20": 600.0}
+        assert reloaded["weekly_schedule"] == [1.0] * 7
+        assert dm2.get_activity_log() == {"2026-06-20": 1}
+        assert dm2.get_setting("theme") == "light"
+        dm2.close()
+
+    def test_auto_import_from_json(self, tmp_data_dir, frozen_time):
+        from models.data_manager import DataManager
+        json_dm = DataManager(backend="json")
+        cid = json_dm.add_course("Imported", "/imp", [], {"total_videos": 0, "total_duration": 0})["id"]
+        json_dm.close()
+
+        sdm = DataManager(backend="sqlite")
+        assert sdm.get_course_by_id(cid)["name"] == "Imported"
+        sdm.close()
+
+    def test_auto_import_from_sharded_json(self, tmp_data_dir, frozen_time):
+        """分片、meta.json 与未压缩的进度日志都被导入"""
+        from models.data_manager import DataManager
+        videos = [{"rel_path": f"v{i}.mp4", "abs_path": "", "duration": 600.0} for i in range(2)]
+        json_dm = DataManager(backend="json")
+        cid = json_dm.add_course("Sharded", "/s", videos, {"total_videos": 2, "total_duration": 1200.0})["id"]
+        json_dm.update_video_progress(cid, "v0.mp4", 600.0, True)
+        json_dm.set_setting("theme", "light")
+        json_dm.close()
+        json_dm = DataManager(backend="json", save_interval=3600)
+        json_dm.update_video_progress(cid, "v1.mp4", 120.0, False)  # 仅在进度日志中
+
+        sdm = DataManager(backend="sqlite")
+        course = sdm.get_course_by_id(cid)
+        assert [v["watched_duration"] for v in course["videos"]] == [600.0, 120.0]
+        assert course["videos"][0]["completed"] is True
+        assert course["daily_stats"] == {"2026-06-20": 720.0}
+        assert sdm.get_activity_log() == {"2026-06-20": 1}
+        assert sdm.get_setting("theme") == "light"
+        assert sdm.verify_aggregates() == []
+        sdm.close()
+        json_dm.close()
+
+    def test_unknown_backend(self, tmp_data_dir):
+        from models.data_manager import DataManager
+        with pytest.raises(ValueError):
+            DataManager(backend="xml")
+
+
+class TestShardedLayout:
+    """清单 + 课程分片布局测试"""
+
+    def test_manifest_has_headers_only(self, dm, make_course):
+        from utils.paths import PathManager
+        course = make_course(dm, "A")
+        manifest = json.loads(PathManager.COURSES_JSON.read_text(encoding="utf-8"))
+        assert manifest["layout"] == "sharded"
+        assert manifest["courses"][0]["name"] == "A"
+        assert "videos" not in manifest["courses"][0]
+        shard = json.loads((PathManager.COURSES_DIR / f"{course['id']}.json").read_text(encoding="utf-8"))
+        assert shard["videos"][0]["rel_path"] == "v0.mp4"
+
+    def test_progress_rewrites_only_one_shard(self, dm, make_course):
+        """进度变更只重写目标分片和清单（daily_stats 与视频聚合值在清单中）"""
+        from utils.paths import PathManager
+        courses = [make_course(dm, f"C{i}") for i in range(30)]
+        target = courses[7]["id"]
+        files_before = dm.io_stats["files_written"]
+        bytes_before = dm.io_stats["bytes_written"]
+
+        dm.update_video_progress(target, "v0.mp4", 120.0, False)
+        dm.flush()
+
+        assert dm.io_stats["files_written"] - files_before == 2
+        shard_size = (PathManager.COURSES_DIR / f"{target}.json").stat().st_size
+        manifest_size = PathManager.COURSES_JSON.stat().st_size
+        assert dm.io_stats["bytes_written"] - bytes_before == shard_size + manifest_size
+
+    def test_completion_also_writes_meta(self, dm, make_course):
+        from utils.paths import PathManager
+        course = make_course(dm, "M")
+        files_before = dm.io_stats["files_written"]
+        dm.update_video_progress(course["id"], "v0.mp4", 600.0, True)
+        dm.flush()
+        assert dm.io_stats["files_written"] - files_before == 3
+        meta = json.loads(PathManager.META_JSON.read_text(encoding="utf-8"))
+        assert meta["activity_log"] == {"2026-06-20": 1}
+
+    def test_shards_are_compact_by_default(self, dm, make_course):
+        """分片为紧凑格式，清单与 meta.json 保持缩进便于手工编辑"""
+        from utils.paths import PathManager
+        course = make_course(dm, "S")
+        dm.set_setting("theme", "dark")
+        assert b"\n" not in (PathManager.COURSES_DIR / f"{course['id']}.json").read_bytes()
+        assert b"\n" in PathManager.COURSES_JSON.read_bytes()
+        assert b"\n" in PathManager.META_JSON.read_bytes()
+
+    def test_msgpack_shards_use_msgpack_suffix(self, dm, monkeypatch, make_course):
+        """msgpack 分片扩展名为 .msgpack，清单仍为缩进 JSON；切换格式后旧分片在重写时删除"""
+        import utils.serialization as serialization
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        fake = type("FakeMsgpack", (), {
+            "packb": staticmethod(lambda data, **kwargs: json.dumps(data).encode()),
+            "unpackb": staticmethod(lambda packed, **kwargs: json.loads(packed)),
+        })
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", True)
+        monkeypatch.setattr(serialization, "msgpack", fake)
+        course = make_course(dm, "P")
+        dm.close()
+        old_shard = PathManager.COURSES_DIR / f"{course['id']}.json"
+        new_shard = PathManager.COURSES_DIR / f"{course['id']}.msgpack"
+
+        packed = DataManager(shard_format="msgpack")
+        assert packed.get_course_by_id(course["id"])["videos"][0]["duration"] == 600.0
+        packed.update_video_progress(course["id"], "v0.mp4", 120.0, False)
+        packed.close()
+        assert new_shard.read_bytes().startswith(serialization.MSGPACK_HEADER)
+        assert not old_shard.exists()
+        assert json.loads(PathManager.COURSES_JSON.read_text(encoding="utf-8"))["layout"] == "sharded"
+        assert b"\n" in PathManager.COURSES_JSON.read_bytes()
+
+        assert DataManager().get_course_by_id(course["id"])["videos"][0]["watched_duration"] == 120.0
+
+    def test_changing_shard_format_keeps_loading(self, dm, make_course):
+        from models.data_manager import DataManager
+        course = make_course(dm, "F")
+        dm.update_video_progress(course["id"], "v0.mp4", 120.0, False)
+        dm.close()
+
+        pretty = DataManager(shard_format="json")
+        assert pretty.get_course_by_id(course["id"])["videos"][0]["watched_duration"] == 120.0
+        pretty.update_video_progress(course["id"], "v0.mp4", 240.0, False)
+        pretty.close()
+        assert DataManager().get_course_by_id(course["id"])["videos"][0]["watched_duration"] == 240.0
+
+    def test_msgpack_manifest_without_msgpack_fails_loudly(self, dm, monkeypatch, make_course):
+        """缺少解码库不是文件损坏：启动失败，清单保持原样"""
+        import utils.serialization as serialization
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        from utils.serialization import MSGPACK_HEADER, CodecUnavailableError
+        make_course(dm, "M")
+        dm.close()
+        raw = MSGPACK_HEADER + b"\x81\xa6layout\xa7sharded"
+        PathManager.COURSES_JSON.write_bytes(raw)
+
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", False)
+        with pytest.raises(CodecUnavailableError):
+            DataManager()
+        assert PathManager.COURSES_JSON.read_bytes() == raw
+        assert not PathManager.COURSES_JSON.with_suffix(".json.bak").exists()
+
+    def test_delete_removes_shard(self, dm, make_course):
+        from utils.paths import PathManager
+        course = make_course(dm, "D")
+        dm.delete_course(course["id"])
+        assert not (PathManager.COURSES_DIR / f"{course['id']}.json").exists()
+
+    def test_legacy_single_file_migrates(self, tmp_data_dir, frozen_time):
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        legacy = {
+            "courses": [{
+                "id": "legacy", "name": "Legacy", "path": "/legacy", "added_at": "2026-01-01",
+                "total_videos": 1, "total_duration": 100, "start_date": None,
+                "weekly_schedule": [0.0] * 7, "daily_stats": {"2026-06-19": 50.0},
+                "videos": [{"rel_path": "v.mp4", "duration": 100, "watched_duration": 50,
+                            "completed": False, "last_watched": None}],
+            }],
+            "activity_log": {"2026-06-19": 1},
+            "settings": {"theme": "light"},
+        }
+        PathManager.COURSES_JSON.parent.mkdir(parents=True, exist_ok=True)
+        PathManager.COURSES_JSON.write_text(json.dumps(legacy), encoding="utf-8")
+
+        DataManager()
+        assert (PathManager.DATA_DIR / "courses.legacy.json").exists()
+        assert json.loads(PathManager.COURSES_JSON.read_text(encoding="utf-8"))["layout"] == "sharded"
+
+        dm2 = DataManager()
+        assert dm2.get_course_by_id("legacy") == legacy["courses"][0]
+        assert dm2.data == legacy
+
+
+class TestLazyLoading:
+    """两级加载：启动只读清单，视频列表按需加载并受 LRU 上限约束"""
+
+    def _library(self, make_course, n_courses=5, n_videos=3):
+        """已保存的课程库：第一门课程看完 v0、看了 v1 的一部分"""
+        from models.data_manager import DataManager
+        dm = DataManager()
+        ids = [make_course(dm, f"C{i}", n_videos)["id"] for i in range(n_courses)]
+        dm.update_video_progress(ids[0], "v0.mp4", 600.0, True)
+        dm.update_video_progress(ids[0], "v1.mp4", 120.0, False)
+        dm.close()
+        return ids
+
+    def test_startup_reads_no_shards(self, tmp_data_dir, frozen_time, make_course):
+        from models.data_manager import DataManager
+        self._library(make_course)
+        dm = DataManager()
+        assert dm.io_stats["shards_loaded"] == 0
+        assert all("videos" not in c for c in dm.get_courses())
+
+    def test_card_data_matches_eager_load(self, tmp_data_dir, frozen_time, make_course):
+        from models.data_manager import DataManager
+        ids = self._library(make_course)
+        lazy = DataManager()
+        eager = DataManager(resident_courses=None)
+        assert all("videos" in c for c in eager.get_courses())
+        assert lazy.get_course_card_data() == eager.get_course_card_data()
+        assert lazy.get_dashboard_data(ids[0]) == eager.get_dashboard_data(ids[0])
+        assert lazy.io_stats["shards_loaded"] == 0
+
+    def test_open_course_loads_videos(self, tmp_data_dir, frozen_time, make_course):
+        from models.data_manager import DataManager
+        ids = self._library(make_course)
+        dm = DataManager()
+        course = dm.get_course_by_id(ids[0])
+        assert course["videos"][0]["completed"] is True
+        assert dm.store.is_resident(ids[0])
+        assert dm.io_stats["shards_loaded"] == 1
+
+    def test_lru_evicts_least_recently_opened(self, tmp_data_dir, frozen_time, make_course):
+        from models.data_manager import DataManager
+        ids = self._library(make_course)
+        dm = DataManager(resident_courses=2)
+        for cid in ids[:3]:
+            dm.get_course_by_id(cid)
+        assert not dm.store.is_resident(ids[0])
+        assert "videos" not in dm._find_course(ids[0])
+        assert dm.get_video_summary(ids[0]).completed_videos == 1
+
+    def test_dirty_course_not_evicted(self, tmp_data_dir, frozen_time, make_course):
+        from models.data_manager import DataManager
+        ids = self._library(make_course)
+        dm = DataManager(save_interval=3600, resident_courses=1)
+        dm.update_video_progress(ids[1], "v0.mp4", 300.0, False)
+        dm.get_course_by_id(ids[2])
+        assert dm.store.is_resident(ids[1])
+
+        dm.flush()
+        dm.get_course_by_id(ids[3])
+        assert not dm.store.is_resident(ids[1])
+        assert DataManager().get_course_by_id(ids[1])["videos"][0]["watched_duration"] == 300.0
+
+    def test_eviction_does_not_wait_for_writer(self, tmp_data_dir, frozen_time, mocker, make_course):
+        """写盘线程忙时不释放视频列表（也不等待），空闲后下次打开课程再释放"""
+        from models.data_manager import DataManager
+        ids = self._library(make_course)
+        dm = DataManager(save_interval=3600, resident_courses=1)
+        started, release = _hold_writer(mocker)
+        dm.update_video_progress(ids[1], "v0.mp4", 300.0, False)
+        dm.flush(wait=False)
+        assert started.wait(1)
+
+        assert _returns_promptly(lambda: dm.get_course_by_id(ids[2]))
+        assert dm.store.is_resident(ids[1])
+
+        release.set()
+        dm.store.writer.wait_idle()
+        dm.get_course_by_id(ids[3])
+        assert not dm.store.is_resident(ids[1])
+        assert not dm.store.is_resident(ids[2])
+
+    def test_previous_shard_layout_upgrades(self, tmp_data_dir, frozen_time):
+        """daily_stats 存放在分片中的旧版分片布局自动迁入清单"""
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        header = {"id": "old", "name": "Old", "path": "/old", "added_at": "2026-01-01",
+                  "total_videos": 1, "total_duration": 100, "start_date": None,
+                  "weekly_schedule": [0.0] * 7}
+        shard = {"daily_stats": {"2026-06-20": 40.0},
+                 "videos": [{"rel_path": "v.mp4", "duration": 100, "watched_duration": 40,
+                             "completed": False, "last_watched": None}]}
+        PathManager.COURSES_DIR.mkdir(parents=True, exist_ok=True)
+        PathManager.COURSES_JSON.write_text(json.dumps({"layout": "sharded", "courses": [header]}))
+        (PathManager.COURSES_DIR / "old.json").write_text(json.dumps(shard))
+
+        DataManager().close()
+        manifest = json.loads(PathManager.COURSES_JSON.read_text(encoding="utf-8"))
+        assert manifest["courses"][0]["daily_stats"] == {"2026-06-20": 40.0}
+        assert "daily_stats" not in json.loads((PathManager.COURSES_DIR / "old.json").read_text())
+
+        dm = DataManager()
+        assert dm.get_today_progress("old") == 40.0
+        assert dm.get_video_summary("old").watched_sec == 40
+
+
+class TestIndexes:
+    """ID / 路径 / rel_path 索引在增删、重新加载、释放视频列表后保持一致"""
+
+    def test_lookup_by_id_and_path(self, dm, make_course):
+        a = make_course(dm, "A", 3)
+        b = make_course(dm, "B", 3)
+        assert dm.get_course_by_id(b["id"]) is b
+        assert dm.find_course_by_path("/A") is a
+        assert dm.find_course_by_path("/none") is None
+
+    def test_delete_removes_from_indexes(self, dm, make_course):
+        a = make_course(dm, "A", 3)
+        dm.delete_course(a["id"])
+        assert dm.get_course_by_id(a["id"]) is None
+        assert dm.find_course_by_path("/A") is None
+        dm.update_video_progress(a["id"], "v0.mp4", 10.0, False)  # 不应抛异常
+
+    def test_indexes_rebuilt_on_reload(self, dm, make_course):
+        from models.data_manager import DataManager
+        a = make_course(dm, "A", 3)
+        dm2 = DataManager()
+        assert dm2.find_course_by_path("/A")["id"] == a["id"]
+        dm2.update_video_progress(a["id"], "v2.mp4", 100.0, False)
+        assert dm2.get_course_by_id(a["id"])["videos"][2]["watched_duration"] == 100.0
+
+    def test_video_index_follows_reloaded_list(self, tmp_data_dir, tmp_courses_json, frozen_time,
+                                               make_course):
+        """视频列表被 LRU 释放并重新加载后，索引指向新的视频字典"""
+        from models.data_manager import DataManager
+        dm = DataManager(resident_courses=1)
+        a = make_course(dm, "A", 3)
+        b = make_course(dm, "B", 3)
+        dm.update_video_progress(a["id"], "v0.mp4", 100.0, False)
+        dm.flush()
+        dm.get_course_by_id(b["id"])
+        assert "videos" not in dm._find_course(a["id"])
+
+        dm.update_video_progress(a["id"], "v0.mp4", 200.0, False)
+        course = dm.get_course_by_id(a["id"])
+        assert course["videos"][0]["watched_duration"] == 200.0
+        assert dm.get_today_progress(a["id"]) == 200.0
+
+    def test_unknown_rel_path_is_ignored(self, dm, make_course):
+        a = make_course(dm, "A", 3)
+        dm.update_video_progress(a["id"], "missing.mp4", 100.0, True)
+        assert dm.get_today_progress(a["id"]) == 0.0
+        assert dm.get_activity_log() == {}
+
+
+class TestSchemaVersion:
+    """数据结构版本：迁移只执行一次，干净的文件启动时不做逐视频工作"""
+
+    def test_manifest_stamped_with_version(self, dm, make_course):
+        from models.schema import SCHEMA_VERSION
+        from utils.paths import PathManager
+        make_course(dm, "V")
+        manifest = json.loads(PathManager.COURSES_JSON.read_text(encoding="utf-8"))
+        assert manifest["schema_version"] == SCHEMA_VERSION
+        assert isinstance(manifest["checksum"], int)
+
+    def test_clean_startup_skips_migration(self, dm, mocker, make_course):
+        from models.data_manager import DataManager
+        make_course(dm, "V")
+        dm.close()
+        migrate = mocker.patch("models.data_manager.migrate")
+        validate = mocker.patch("models.data_manager.validate_headers")
+        dm2 = DataManager()
+        migrate.assert_not_called()
+        validate.assert_not_called()
+        assert dm2.io_stats["shards_loaded"] == 0
+        assert dm2.io_stats["saves"] == 0
+
+    def test_old_version_migrates_once(self, tmp_data_dir, frozen_time):
+        """无版本号的分片清单：只补全课程头信息，视频字段在读取分片时补齐"""
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        header = {"id": "old", "name": "Old", "path": "/old", "total_videos": 1,
+                  "total_duration": 100, "daily_stats": {}}
+        PathManager.COURSES_DIR.mkdir(parents=True, exist_ok=True)
+        PathManager.COURSES_JSON.write_text(json.dumps({"layout": "sharded", "courses": [header]}))
+        (PathManager.COURSES_DIR / "old.json").write_text(json.dumps({"videos": [{"rel_path": "v.mp4", "duration": 100}]}))
+
+        dm = DataManager()
+        assert dm.io_stats["shards_loaded"] == 0
+        assert dm.get_course_by_id("old")["weekly_schedule"] == [0.0] * 7
+        dm.close()
+
+        dm2 = DataManager()
+        assert dm2.io_stats["shards_loaded"] == 0
+        assert dm2.get_course_by_id("old")["videos"][0]["completed"] is False
+
+    def test_hand_edited_manifest_is_validated(self, dm, make_course):
+        """手工编辑导致校验和不符时深度校验并修复"""
+        from models.data_manager import DataManager
+        from utils.paths import PathManager
+        course = make_course(dm, "V")
+        dm.close()
+        manifest = json.loads(PathManager.COURSES_JSON.read_text(encoding="utf-8"))
+        manifest["courses"][0]["weekly_schedule"] = "每天一小时"
+        PathManager.COURSES_JSON.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+
+        dm2 = DataManager()
+        assert dm2.get_course_by_id(course["id"])["weekly_schedule"] == [0.0] * 7
+        assert dm2.get_today_plan_seconds(course["id"]) == 0.0
+
+    def test_sqlite_version_in_user_version(self, tmp_data_dir, frozen_time):
+        from models.data_manager import DataManager
+        from models.schema import SCHEMA_VERSION
+        dm = DataManager(backend="sqlite")
+        assert dm.store.schema_version == SCHEMA_VERSION
+        dm.close()
+
+
+class TestAggregates:
+    """运行聚合值：随每次变更按差值维护，与从头计算的结果一致"""
+
+    def test_progress_updates_by_delta(self, dm, make_course):
+        course = make_course(dm, "A", 4)
+        assert dm.get_video_summary(course["id"]).remaining_sec == 2400.0
+        dm.update_video_progress(course["id"], "v0.mp4", 300.0, False)
+        dm.update_video_progress(course["id"], "v0.mp4", 200.0, False)  # 回退不减少
+        dm.update_video_progress(course["id"], "v1.mp4", 590.0, True)
+        summary = dm.get_video_summary(course["id"])
+        assert summary.watched_sec == 890.0
+        assert summary.completed_videos == 1
+        assert summary.remaining_sec == 1500.0
+        assert dm.get_studied_seconds(course["id"], date(2026, 6, 20), date(2026, 6, 20)) == 890.0
+        assert dm.verify_aggregates() == []
+
+    def test_stats_do_not_rescan_videos(self, dm, monkeypatch, make_course):
+        from models.video_table import VideoTable
+        course = make_course(dm, "A", 4)
+        dm.update_video_progress(course["id"], "v0.mp4", 300.0, False)
+        monkeypatch.setattr(VideoTable, "summary", lambda self: pytest.fail("重新扫描了视频列表"))
+        dm.calculate_course_stats(course["id"])
+        dm.get_dashboard_data(course["id"])
+        dm.calculate_remaining_days(course["id"])
+
+    def test_checker_detects_drift(self, dm, make_course):
+        course = make_course(dm, "A", 4)
+        dm.get_video_summary(course["id"])
+        dm._aggregates[course["id"]].watched_sec += 1.0
+        assert dm.verify_aggregates() == [course["id"]]
+
+    def test_consistent_after_eviction_and_reload(self, tmp_data_dir, frozen_time, make_course):
+        from models.data_manager import DataManager
+        dm = DataManager(save_interval=0, resident_courses=1)
+        first = make_course(dm, "A", 4)
+        dm.update_video_progress(first["id"], "v2.mp4", 600.0, True)
+        second = dm.add_course("B", "/b", [], {"total_videos": 0, "total_duration": 0})
+        dm.get_course_by_id(second["id"])
+        assert not dm.store.is_resident(first["id"])
+        dm.update_video_progress(first["id"], "v3.mp4", 120.0, False)
+        assert dm.verify_aggregates() == []
+        dm.close()
+
+        dm2 = DataManager()
+        assert dm2.get_video_summary(first["id"]) == dm.get_video_summary(first["id"])
+        assert dm2.verify_aggregates() == []
+
+    def test_delete_drops_aggregates(self, dm, make_course):
+        course = make_course(dm, "A", 4)
+        dm.get_video_summary(course["id"])
+        dm.delete_course(course["id"])
+        assert course["id"] not in dm._aggregates
+
+    def test_daily_indexes_follow_progress(self, dm, make_course, study_history):
+        first = make_course(dm, "A", 4, duration=1200.0)
+        second = dm.add_course("B", "/b", [{"rel_path": "v.mp4", "abs_path": "", "duration": 600.0}],
+                               {"total_videos": 1, "total_duration": 600.0})
+        study_history(dm, first["id"], {"2026-06-19": 1000.0}, rel_path="v1.mp4")
+        today = date(2026, 6, 20)
+        assert dm.get_global_daily_index().total == 1000.0
+        dm.update_video_progress(first["id"], "v0.mp4", 300.0, False)
+        dm.update_video_progress(second["id"], "v.mp4", 200.0, False)
+        assert dm.get_global_daily_index().day_seconds(today) == 500.0
+        assert dm.get_studied_seconds(first["id"], date(2026, 6, 19), today) == 1300.0
+        assert dm.verify_aggregates() == []
+
+        dm.delete_course(first["id"])
+        assert dm.get_global_daily_index().total == 200.0
+
+    def test_global_daily_totals_window(self, dm, make_course, study_history):
+        first = make_course(dm, "A", 4, duration=1200.0)
+        study_history(dm, first["id"], {"2026-06-18": 1000.0}, rel_path="v1.mp4")
+        index = dm.get_global_daily_index()
+        dm.update_video_progress(first["id"], "v0.mp4", 300.0, False)
+        totals = dm.get_global_daily_totals(date(2026, 6, 17), date(2026, 6, 21))
+        assert list(totals) == [0.0, 1000.0, 0.0, 300.0, 0.0]
+        assert dm.get_global_daily_index() is index  # 增量维护，未重建
+
+
+class TestResync:
+    """重新扫描后同步视频列表：进度保留，只有变化时写盘"""
+
+    VIDEOS = [{"rel_path": f"v{i}.mp4", "abs_path": f"/A/v{i}.mp4", "duration": 600.0} for i in range(4)]
+
+    def _add(self, dm, make_course):
+        """4 个视频的课程：v1 已完成，v2 看了 200 秒"""
+        course = make_course(dm, "A", 4)
+        dm.update_video_progress(course["id"], "v1.mp4", 600.0, True)
+        dm.update_video_progress(course["id"], "v2.mp4", 200.0, False)
+        return course
+
+    def _rescan(self):
+        videos = [dict(v) for v in self.VIDEOS if v["rel_path"] != "v0.mp4"]
+        videos[1]["duration"] = 900.0  # v2 被重新编码
+        videos.append({"rel_path": "v9.mp4", "abs_path": "", "duration": 300.0})
+        return videos
+
+    @pytest.mark.parametrize("backend", ["json", "sqlite"])
+    def test_applies_diff_and_keeps_progress(self, tmp_data_dir, frozen_time, backend, make_course):
+        from models.data_manager import DataManager
+        dm = DataManager(backend=backend)
+        course = self._add(dm, make_course)
+        changes = dm.resync_course(course["id"], self._rescan())
+        assert changes == {"added": 1, "removed": 1, "updated": 1}
+        assert dm.verify_aggregates() == []
+        summary = dm.get_video_summary(course["id"])
+        assert (summary.video_count, summary.completed_videos, summary.watched_sec) == (4, 1, 800.0)
+        assert summary.remaining_sec == 600.0 + 700.0 + 300.0
+        dm.close()
+
+        reloaded = DataManager(backend=backend).get_course_by_id(course["id"])
+        assert [v["rel_path"] for v in reloaded["videos"]] == ["v1.mp4", "v2.mp4", "v3.mp4", "v9.mp4"]
+        assert reloaded["videos"][0]["completed"] is True
+        assert reloaded["videos"][1]["watched_duration"] == 200.0
+        assert reloaded["videos"][1]["duration"] == 900.0
+        assert (reloaded["total_videos"], reloaded["total_duration"]) == (4, 2400.0)
+        assert reloaded["daily_stats"] == {"2026-06-20": 800.0}
+
+    def test_unchanged_folder_does_not_save(self, dm, make_course):
+        course = self._add(dm, make_course)
+        dm.flush()
+        saves = dm.store.io_stats["saves"]
+        assert dm.resync_course(course["id"], [dict(v) for v in self.VIDEOS]) == {
+            "added": 0, "removed": 0, "updated": 0}
+        assert dm.store.io_stats["saves"] == saves
+
+    @pytest.mark.parametrize("backend", ["json", "sqlite"])
+    def test_file_keys_saved_with_course(self, tmp_data_dir, frozen_time, backend):
+        """扫描时的大小与修改时间随课程保存；时长为 0 的视频不算已知"""
+        from models.data_manager import DataManager
+        dm = DataManager(backend=backend)
+        videos = [dict(v, size=100 + i, mtime_ns=7) for i, v in enumerate(self.VIDEOS)]
+        videos[3]["duration"] = 0.0
+        course = dm.add_course("A", "/A", videos, {"total_videos": 4, "total_duration": 1800.0})
+        dm.close()
+
+        known = DataManager(backend=backend).get_video_file_keys(course["id"])
+        assert known == {"v0.mp4": (100, 7, 600.0), "v1.mp4": (101, 7, 600.0), "v2.mp4": (102, 7, 600.0)}
+
+    def test_changed_file_keys_are_saved(self, dm):
+        """时长相同但文件键变化（如文件被触碰）：不计入变化，但保存新的文件键"""
+        course = dm.add_course("A", "/A", [dict(v, size=1, mtime_ns=1) for v in self.VIDEOS],
+                               {"total_videos": 4, "total_duration": 2400.0})
+        dm.update_video_progress(course["id"], "v1.mp4", 600.0, True)
+        rescanned = [dict(v, size=1, mtime_ns=2) for v in self.VIDEOS]
+        assert dm.resync_course(course["id"], rescanned) == {"added": 0, "removed": 0, "updated": 0}
+        assert dm.get_video_file_keys(course["id"])["v1.mp4"] == (1, 2, 600.0)
+        assert dm.get_course_by_id(course["id"])["videos"][1]["completed"] is True
+
+    def test_invalidates_cached_stats(self, dm, make_course):
+        course = self._add(dm, make_course)
+        assert dm.get_course_card_data()[0].total_sec == 2400.0
+        added = {"rel_path": "extra.mp4", "abs_path": "", "duration": 300.0}
+        dm.resync_course(course["id"], [dict(v) for v in self.VIDEOS] + [added])
+        assert dm.get_course_card_data()[0].total_sec == 2700.0
+
+
+class TestUpdateDurations:
+    """流式扫描：先以时长 0 创建课程，再逐批补全时长"""
+
+    @pytest.mark.parametrize("backend", ["json", "sqlite"])
+    def test_fills_durations_and_totals(self, tmp_data_dir, frozen_time, backend, make_course):
+        from models.data_manager import DataManager
+        dm = DataManager(backend=backend)
+        course = make_course(dm, "A", 3, duration=0.0)
+        dm.update_video_progress(course["id"], "v0.mp4", 100.0, False)
+        assert dm.get_course_card_data()[0].total_sec == 0.0
+
+        dm.update_video_durations(course["id"], [(2, 300.0), (0, 600.0)])
+        dm.update_video_durations(course["id"], [(1, 450.0)])
+        assert dm.verify_aggregates() == []
+        assert dm.get_course_card_data()[0].total_sec == 1350.0
+        assert dm.get_video_summary(course["id"]).remaining_sec == 500.0 + 450.0 + 300.0
+        dm.close()
+
+        reloaded = DataManager(backend=backend).get_course_by_id(course["id"])
+        assert [v["duration"] for v in reloaded["videos"]] == [600.0, 450.0, 300.0]
+        assert reloaded["total_duration"] == 1350.0
+        assert reloaded["videos"][0]["watched_duration"] == 100.0
+
+    def test_unchanged_durations_are_noop(self, dm, make_course):
+        course = make_course(dm, "A", 3, duration=0.0)
+        dm.update_video_durations(course["id"], [(0, 0.0)])
+        dm.update_video_durations("missing", [(0, 60.0)])
+        assert course["total_duration"] == 0.0
+
+
+class TestPlanPreview:
+    """计划预览：与保存后重新计算的结果一致，且不修改课程"""
+
+    def test_preview_matches_saved_plan(self, dm, study_history):
+        videos = [{"rel_path": f"v{i}.mp4", "abs_path": "", "duration": 3600.0} for i in range(5)]
+        course = dm.add_course("A", "/a", videos, {"total_videos": 5, "total_duration": 18000.0})
+        study_history(dm, course["id"], {"2026-06-19": 1800.0}, rel_path="v1.mp4")
+        dm.update_video_progress(course["id"], "v0.mp4", 3600.0, True)
+        schedule, start = [1.5, 1.0, 1.0, 1.0, 0.5, 3.0, 2.0], "2026-06-10"
+
+        preview = dm.preview_plan(course["id"], schedule, start)
+        assert course["weekly_schedule"] == [0.0] * 7
+        assert course.get("start_date") != start
+
+        dm.set_weekly_schedule(course["id"], schedule, start)
+        assert preview.balance_minutes == dm.get_course_balance(course["id"])[0]
+        assert preview.remaining_days == dm.calculate_remaining_days(course["id"])
+        assert preview.finish_date == dm.estimate_finish_date(course["id"])
+
+    def test_unknown_course(self, dm):
+        preview = dm.preview_plan("missing", [1.0] * 7, "2026-06-01")
+        assert preview.finish_date == "已完成"
+        assert preview.remaining_days == 0
+
+
+class TestStudyTime:
+    """按日 / 周 / 月分桶的学习时长报表"""
+
+    def test_weekly_across_courses(self, dm, make_course, study_history):
+        a = make_course(dm, "A", duration=3600.0)
+        b = make_course(dm, "B", duration=3600.0)
+        study_history(dm, a["id"], {"2026-06-01": 600.0, "2026-06-07": 300.0, "2026-06-08": 100.0})
+        study_history(dm, b["id"], {"2026-06-03": 1200.0})
+        report = dm.study_time(granularity="week", start=date(2026, 6, 1), end=date(2026, 6, 14))
+        assert [(r.start, r.seconds) for r in report] == [
+            (date(2026, 6, 1), 2100.0), (date(2026, 6, 8), 100.0)]
+        only_b = dm.study_time([b["id"], "missing"], "week", date(2026, 6, 1), date(2026, 6, 14))
+        assert [r.seconds for r in only_b] == [1200.0, 0.0]
+        assert dm.study_time([a["id"]], "month")[0].seconds == 1000.0
+
+    def test_defaults_span_history_to_today(self, dm, make_course, study_history):
+        course = make_course(dm, "A")
+        study_history(dm, course["id"], {"2026-04-30": 600.0})
+        report = dm.study_time(granularity="month")
+        assert [r.start for r in report] == [date(2026, 4, 1), date(2026, 5, 1), date(2026, 6, 1)]
+        assert report[-1].end == date(2026, 6, 30)
+
+    def test_matches_daily_stats_scan(self, dm, make_course, study_history):
+        rng = random.Random(19)
+        courses = []
+        for n in range(3):
+            stats = {}
+            for _ in range(80):
+                day = date(2025, 1, 1) + timedelta(days=rng.randrange(500))
+                stats[day.isoformat()] = float(rng.randrange(1, 4000))
+            course = make_course(dm, f"C{n}", duration=sum(stats.values()))
+            study_history(dm, course["id"], stats)
+            courses.append(course)
+        start, end = date(2025, 2, 11), date(2026, 3, 9)
+        for granularity in ("day", "week", "month"):
+            for scope in (courses, courses[1:2]):
+                report = dm.study_time([c["id"] for c in scope], granularity, start, end)
+                assert report[0].start <= start and report[-1].end >= end
+                for bucket in report:
+                    lo, hi = max(bucket.start, start).isoformat(), min(bucket.end, end).isoformat()
+                    expected = sum(v for c in scope for k, v in c["daily_stats"].items() if lo <= k <= hi)
+                    assert bucket.seconds == pytest.approx(expected)
+        assert sum(r.seconds for r in dm.study_time(None, "week", start, end)) == pytest.approx(
+            sum(r.seconds for r in dm.study_time(None, "day", start, end)))
+
+class TestStatsCache:
+    """统计缓存：课程未变更且未跨日时复用 CourseStats / CourseCardData"""
+
+    def _library(self, dm, make_course, n=3):
+        return [make_course(dm, f"C{i}")["id"] for i in range(n)]
+
+    def test_second_refresh_is_all_hits(self, dm, make_course):
+        self._library(dm, make_course)
+        first = dm.get_course_card_data()
+        before = dm.stats_cache_info
+        assert dm.get_course_card_data() == first
+        assert dm.stats_cache_info["misses"] == before["misses"]
+        assert dm.stats_cache_info["hits"] == before["hits"] + 3
+
+    def test_mutation_invalidates_only_that_course(self, dm, make_course):
+        ids = self._library(dm, make_course)
+        dm.get_course_card_data()
+        dm.update_video_progress(ids[1], "v0.mp4", 300.0, False)
+        misses = dm.stats_cache_info["misses"]
+        cards = dm.get_course_card_data()
+        assert cards[1].watched_sec == 300.0
+        assert dm.stats_cache_info["misses"] == misses + 2  # 卡片 + 课程统计
+
+    def test_rename_and_schedule_invalidate(self, dm, make_course):
+        ids = self._library(dm, make_course, 1)
+        dm.get_course_card_data()
+        dm.update_course_name(ids[0], "新名称")
+        assert dm.get_course_card_data()[0].course_name == "新名称"
+        dm.set_weekly_schedule(ids[0], [1.0] * 7, "2026-06-20")
+        assert dm.calculate_course_stats(ids[0]).today_plan_sec == 3600.0
+
+    def test_completion_refreshes_streak_everywhere(self, dm, make_course):
+        ids = self._library(dm, make_course, 2)
+        assert dm.calculate_course_stats(ids[0]).streak_days == 0
+        dm.update_video_progress(ids[1], "v0.mp4", 600.0, True)
+        assert dm.calculate_course_stats(ids[0]).streak_days == 1
+
+    def test_day_rollover_invalidates(self, dm, frozen_time, make_course):
+        from datetime import datetime
+        ids = self._library(dm, make_course, 1)
+        dm.set_weekly_schedule(ids[0], [1.0] * 6 + [2.0], "2026-06-01")
+        assert dm.calculate_course_stats(ids[0]).today_plan_sec == 3600.0  # 周六
+
+        assert frozen_time.set(datetime(2026, 6, 21, 9, 0, 0))
+        assert dm.calculate_course_stats(ids[0]).today_plan_sec == 7200.0
+
+    def test_date_change_clears_cache(self, dm, make_course):
+        self._library(dm, make_course, 2)
+        dm.get_course_card_data()
+        dm.on_date_changed()
+        assert dm.stats_cache_info["entries"] == 0
+
+    def test_delete_discards_entries(self, dm, make_course):
+        ids = self._library(dm, make_course, 2)
+        dm.get_course_card_data()
+        dm.delete_course(ids[0])
+        assert [c.course_id for c in dm.get_course_card_data()] == [ids[1]]
+        assert dm.stats_cache_info["entries"] == 2  # 剩余课程的卡片与统计
+
+
+class TestBatchCardData:
+    """批量卡片数据：向量化结果与逐门课程计算完全相同"""
+
+    def _random_library(self, dm, study_history, seed, n=60):
+        import random
+        rng = random.Random(seed)
+        for c in range(n):
+            videos = [{"rel_path": f"v{j}.mp4", "abs_path": "", "duration": float(rng.randrange(60, 3600))}
+                      for j in range(rng.randrange(0, 6))]
+            history = {f"2026-05-{day + 10:02d}": float(rng.randrange(1, 7200))
+                       for day in range(rng.randrange(0, 5))}
+            listed = list(videos)
+            if history:  # 历史学习记在单独的视频上，不影响下面的随机进度
+                listed.append({"rel_path": "history.mp4", "abs_path": "", "duration": sum(history.values())})
+            total = sum(v["duration"] for v in listed)
+            course = dm.add_course(f"C{c}", f"/c{c}", listed,
+                                   {"total_videos": len(listed), "total_duration": total})
+            if rng.random() < 0.8:
+                schedule = [rng.choice([0.0, 0.0, 0.5, 1.0, 2.5]) for _ in range(7)]
+                start = rng.choice([None, "2025-01-01", "2026-06-01", "2026-06-20", "2026-07-01", "无效日期"])
+                dm.set_weekly_schedule(course["id"], schedule, start)
+            if history:
+                study_history(dm, course["id"], history, rel_path="history.mp4")
+            for v in videos:
+                if rng.random() < 0.6:
+                    watched = rng.choice([v["duration"], rng.uniform(0, v["duration"])])
+                    dm.update_video_progress(course["id"], v["rel_path"], watched, watched == v["duration"])
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_per_course_path(self, dm, study_history, seed):
+        pytest.importorskip("numpy")
+        self._random_library(dm, study_history, seed)
+        assert dm.compute_all_card_data() == dm.get_course_card_data()
+
+    def test_empty_library(self, dm):
+        assert dm.compute_all_card_data() == []
+
+    def test_falls_back_without_numpy(self, dm, study_history, monkeypatch):
+        from models import batch_stats
+        self._random_library(dm, study_history, 0, n=5)
+        monkeypatch.setattr(batch_stats, "NUMPY_AVAILABLE", False)
+        assert dm.compute_all_card_data() == dm.get_course_card_data()
@@ -0,0 +1,145 @@
+"""测试 app/models/journal.py — 追加式进度日志，使用 tmp_path"""
+
+import os
+
+from models.journal import ProgressJournal, video_record, activity_record, apply_record
+from models.video_table import VideoTable
+
+
+def _data():
+    return {
+        "courses": [{
+            "id": "c1",
+            "daily_stats": {},
+            "videos": VideoTable.from_dicts([{"rel_path": "v.mp4", "duration": 600.0, "watched_duration": 0,
+                                              "completed": False, "last_watched": None}]),
+        }]
+    }
+
+
+def _video(watched=120.0, completed=False):
+    return {"rel_path": "v.mp4", "watched_duration": watched, "completed": completed,
+            "last_watched": "2026-06-20T12:00:00"}
+
+
+class TestAppend:
+    """append() 测试"""
+
+    def test_append_creates_file(self, tmp_path):
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(activity_record("2026-06-20", 1))
+        journal.close()
+        assert (tmp_path / "courses.journal").exists()
+        assert len(journal.read_records()) == 1
+
+    def test_append_is_one_compact_line(self, tmp_path):
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        size = journal.append(video_record("c1", _video(), "2026-06-20", 120.0))
+        journal.close()
+        raw = (tmp_path / "courses.journal").read_bytes()
+        assert raw.count(b"\n") == 1
+        assert b" " not in raw
+        assert size == len(raw)
+
+    def test_append_visible_without_close(self, tmp_path):
+        """每条记录立即刷新到操作系统，进程崩溃不丢失"""
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(activity_record("2026-06-20", 1))
+        reader = ProgressJournal(tmp_path / "courses.journal")
+        assert reader.read_records() == [activity_record("2026-06-20", 1)]
+        journal.close()
+
+    def test_fsync_follows_durability(self, tmp_path, mocker):
+        """默认只刷新到操作系统；要求持久性时每条记录 fsync"""
+        fsync = mocker.patch.object(os, "fsync")
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(activity_record("2026-06-20", 1))
+        journal.close()
+        fsync.assert_not_called()
+
+        journal = ProgressJournal(tmp_path / "courses.journal", durability="file")
+        journal.append(activity_record("2026-06-20", 2))
+        journal.append(activity_record("2026-06-20", 3))
+        journal.close()
+        assert fsync.call_count == 2
+
+
+def _replay(journal, data):
+    """按 JsonStore 的方式逐条应用日志记录，返回成功应用的记录数"""
+    return sum(apply_record(data, record) for record in journal.read_records())
+
+
+class TestReplay:
+    """read_records() / apply_record() 测试"""
+
+    def test_replay_applies_video_record(self, tmp_path):
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(video_record("c1", _video(300.0, True), "2026-06-20", 300.0))
+        journal.close()
+
+        data = _data()
+        assert _replay(journal, data) == 1
+        video = data["courses"][0]["videos"][0]
+        assert video["watched_duration"] == 300.0
+        assert video["completed"] is True
+        assert data["courses"][0]["daily_stats"] == {"2026-06-20": 300.0}
+
+    def test_replay_is_idempotent(self, tmp_path):
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(video_record("c1", _video(), "2026-06-20", 120.0))
+        journal.append(activity_record("2026-06-20", 2))
+        journal.close()
+
+        data = _data()
+        _replay(journal, data)
+        _replay(journal, data)
+        assert data["courses"][0]["daily_stats"]["2026-06-20"] == 120.0
+        assert data["activity_log"] == {"2026-06-20": 2}
+
+    def test_truncated_last_line_is_skipped(self, tmp_path):
+        path = tmp_path / "courses.journal"
+        journal = ProgressJournal(path)
+        journal.append(activity_record("2026-06-20", 1))
+        journal.close()
+        with open(path, "ab") as f:
+            f.write(b'{"op":"activity","da')
+
+        assert ProgressJournal(path).read_records() == [activity_record("2026-06-20", 1)]
+
+    def test_unknown_course_is_ignored(self):
+        record = video_record("missing", _video(), "2026-06-20", 120.0)
+        assert apply_record(_data(), record) is False
+
+    def test_missing_day_seconds_keeps_daily_stats(self):
+        data = _data()
+        apply_record(data, video_record("c1", _video(0.0), "2026-06-20", None))
+        assert data["courses"][0]["daily_stats"] == {}
+
+
+class TestRotate:
+    """rotate() / discard_rotated() 测试"""
+
+    def test_rotate_moves_records_to_segment(self, tmp_path):
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(activity_record("2026-06-19", 1))
+        segment = journal.rotate()
+        journal.append(activity_record("2026-06-20", 1))
+        journal.close()
+
+        assert segment.exists()
+        assert [r["day"] for r in journal.read_records()] == ["2026-06-19", "2026-06-20"]
+
+    def test_rotate_empty_returns_none(self, tmp_path):
+        assert ProgressJournal(tmp_path / "courses.journal").rotate() is None
+
+    def test_failed_compaction_segment_is_merged(self, tmp_path):
+        """上次压缩未完成时，新的 rotate 把当前日志追加到旧段之后"""
+        journal = ProgressJournal(tmp_path / "courses.journal")
+        journal.append(activity_record("2026-06-18", 1))
+        journal.rotate()
+        journal.append(activity_record("2026-06-19", 1))
+        journal.rotate()
+
+        assert [r["day"] for r in journal.read_records()] == ["2026-06-18", "2026-06-19"]
+        journal.discard_rotated()
+        assert journal.read_records() == []
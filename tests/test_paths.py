@@ -31,6 +31,14 @@ class TestPathManager:
         assert PathManager.COURSES_JSON.parent == PathManager.DATA_DIR
         assert PathManager.COURSES_JSON.name == "courses.json"
 
+    def test_courses_db_in_data_dir(self):
+        assert PathManager.COURSES_DB.parent == PathManager.DATA_DIR
+        assert PathManager.COURSES_DB.name == "courses.db"
+
+    def test_shard_paths_in_data_dir(self):
+        assert PathManager.COURSES_DIR.parent == PathManager.DATA_DIR
+        assert PathManager.META_JSON.parent == PathManager.DATA_DIR
+
     def test_get_data_file_path(self):
         result = PathManager.get_data_file_path("test.db")
         assert result == PathManager.DATA_DIR / "test.db"
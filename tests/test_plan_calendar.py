@@ -0,0 +1,92 @@
+"""测试 app/models/plan_calendar.py — 闭式计划运算与逐日模拟等价，纯函数"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from models.plan_calendar import weekday_prefix_sums, planned_hours, finish_offset
+
+
+def _loop_planned(schedule, start, end):
+    """原 get_course_balance 的逐日累加"""
+    total = 0.0
+    curr = start
+    while curr <= end:
+        total += schedule[curr.weekday()]
+        curr += timedelta(days=1)
+    return total
+
+
+def _loop_finish(schedule, today, needed, max_days):
+    """原 estimate_finish_date 的逐日模拟"""
+    sim_date = today
+    days_count = 0
+    while needed > 0 and days_count < max_days:
+        needed -= schedule[sim_date.weekday()]
+        if needed > 0:
+            sim_date += timedelta(days=1)
+        days_count += 1
+    if days_count >= max_days:
+        return None
+    return (sim_date - today).days
+
+
+def _random_schedule(rng, allow_negative=False):
+    low = -4 if allow_negative else 0
+    schedule = [rng.randint(low, 8) / 2 for _ in range(7)]  # 半小时粒度，浮点运算精确
+    if sum(schedule) <= 0:
+        schedule[rng.randrange(7)] += 1.0 - sum(schedule)
+    return schedule
+
+
+class TestPrefixSums:
+    """weekday_prefix_sums() 测试"""
+
+    def test_wraps_around_week(self):
+        schedule = [1.0, 2.0, 0.0, 0.0, 0.0, 3.0, 4.0]
+        assert weekday_prefix_sums(schedule, 5) == [0.0, 3.0, 7.0, 8.0, 10.0, 10.0, 10.0, 10.0]
+
+
+class TestPlannedHours:
+    """planned_hours() 测试"""
+
+    def test_end_before_start(self):
+        assert planned_hours([1.0] * 7, date(2026, 6, 20), date(2026, 6, 19)) == 0.0
+
+    def test_single_day(self):
+        schedule = [0.0] * 5 + [2.5, 0.0]
+        assert planned_hours(schedule, date(2026, 6, 20), date(2026, 6, 20)) == 2.5  # 周六
+
+    def test_cost_independent_of_span(self):
+        assert planned_hours([1.0] * 7, date(1, 1, 1), date(9999, 12, 31)) == (date.max - date.min).days + 1
+
+    @pytest.mark.parametrize("seed", range(50))
+    def test_matches_daily_loop(self, seed):
+        rng = random.Random(seed)
+        schedule = _random_schedule(rng, allow_negative=seed % 5 == 0)
+        start = date(2026, 1, 1) + timedelta(days=rng.randrange(365))
+        end = start + timedelta(days=rng.randrange(-3, 800))
+        assert planned_hours(schedule, start, end) == _loop_planned(schedule, start, end)
+
+
+class TestFinishOffset:
+    """finish_offset() 测试"""
+
+    def test_nothing_needed_is_today(self):
+        assert finish_offset([1.0] * 7, 0, 0.0, 100) == 0
+
+    def test_exact_boundary_finishes_that_day(self):
+        assert finish_offset([1.0] * 7, 0, 3.0, 100) == 2
+
+    def test_too_far_returns_none(self):
+        assert finish_offset([0.01] + [0.0] * 6, 0, 1e9, 365 * 5) is None
+
+    @pytest.mark.parametrize("seed", range(100))
+    def test_matches_daily_simulation(self, seed):
+        rng = random.Random(seed)
+        schedule = _random_schedule(rng, allow_negative=seed % 4 == 0)
+        today = date(2026, 6, 1) + timedelta(days=rng.randrange(7))
+        needed = rng.randrange(1, 400 * 3600, 900) / 3600  # 15 分钟粒度
+        max_days = rng.choice([30, 365 * 5])
+        expected = _loop_finish(schedule, today, needed, max_days)
+        assert finish_offset(schedule, today.weekday(), needed, max_days) == expected
@@ -0,0 +1,48 @@
+"""测试 app/models/plan_preview.py — 计划预览的纯函数"""
+
+from datetime import date
+
+from models.plan_preview import PlanInputs, balance, remaining_days, finish_date, evaluate
+
+TODAY = date(2026, 6, 20)  # 周六
+
+
+class TestBalance:
+
+    def test_no_start_or_empty_plan(self):
+        assert balance([1.0] * 7, "", 3600.0, TODAY) == (0.0, 0.0, 0.0)
+        assert balance([1.0] * 7, "bad", 3600.0, TODAY) == (0.0, 0.0, 0.0)
+        assert balance([0.0] * 7, "2026-06-01", 3600.0, TODAY) == (0.0, 0.0, 0.0)
+        assert balance([1.0] * 7, "2026-06-21", 3600.0, TODAY) == (0.0, 0.0, 0.0)
+
+    def test_actual_minus_plan(self):
+        bal, actual, plan = balance([1.0] * 7, "2026-06-18", 7200.0, TODAY)
+        assert (bal, actual, plan) == (-60.0, 120.0, 180.0)
+
+
+class TestRemainingDays:
+
+    def test_history_first_then_plan_then_fallback(self):
+        assert remaining_days([1.0] * 7, 0.0, 3600.0, 1) == 0
+        assert remaining_days([1.0] * 7, 7200.0, 1800.0, 1) == 4
+        assert remaining_days([2.0] * 7, 7200.0, 0.0, 0) == 1
+        assert remaining_days([0.0] * 7, 7200.0, 0.0, 0) == 2
+
+
+class TestFinishDate:
+
+    def test_states(self):
+        assert finish_date([1.0] * 7, 0.0, TODAY) == "已完成"
+        assert finish_date([0.0] * 7, 3600.0, TODAY) == "--"
+        assert finish_date([1.0] * 7, 3 * 3600.0, TODAY) == "2026-06-22"
+        assert finish_date([0.001] + [0.0] * 6, 1e6, TODAY) == "--"  # 超过推算上限
+
+
+class TestEvaluate:
+
+    def test_combines_results(self):
+        inputs = PlanInputs(remaining_sec=3 * 3600.0, studied_sec=7200.0, studied_days=2, today=TODAY)
+        preview = evaluate([1.0] * 7, "2026-06-18", inputs)
+        assert preview.balance_hours == -1.0
+        assert preview.remaining_days == 3
+        assert preview.finish_date == "2026-06-22"
@@ -0,0 +1,104 @@
+"""测试 app/services/probe_cache.py — 时长探测缓存（SQLite）"""
+
+import pytest
+from services.probe_cache import ProbeCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = ProbeCache(tmp_path / "probe_cache.db", max_entries=3)
+    yield c
+    c.close()
+
+
+class TestLookup:
+
+    def test_hit_requires_same_size_and_mtime(self, cache):
+        cache.put("/c/a.mp4", 100, 5_000, 61.5)
+        assert cache.get("/c/a.mp4", 100, 5_000) == 61.5
+        assert cache.get("/c/a.mp4", 101, 5_000) is None
+        assert cache.get("/c/a.mp4", 100, 5_001) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_put_replaces_changed_file(self, cache):
+        cache.put("/c/a.mp4", 100, 5_000, 61.5)
+        cache.put("/c/a.mp4", 200, 6_000, 90.0)
+        assert len(cache) == 1
+        assert cache.get_many([("/c/a.mp4", 200, 6_000), ("/c/b.mp4", 1, 1)]) == {"/c/a.mp4": 90.0}
+
+    def test_persists_across_instances(self, tmp_path):
+        first = ProbeCache(tmp_path / "p.db")
+        first.put_many([("/c/a.mp4", 1, 2, 3.0), ("/c/b.mp4", 4, 5, 6.0)])
+        first.close()
+        second = ProbeCache(tmp_path / "p.db")
+        assert second.get("/c/b.mp4", 4, 5) == 6.0
+        second.close()
+
+
+class TestEviction:
+
+    def test_least_recently_used_is_evicted(self, cache):
+        cache.put_many([("/c/a.mp4", 1, 1, 1.0), ("/c/b.mp4", 1, 1, 2.0)])
+        cache.put("/c/c.mp4", 1, 1, 3.0)
+        cache.get("/c/a.mp4", 1, 1)          # a 变为最近使用
+        cache.put("/c/d.mp4", 1, 1, 4.0)     # 超出上限 3，淘汰 b
+        assert len(cache) == 3
+        assert cache.get("/c/b.mp4", 1, 1) is None
+        assert cache.get("/c/a.mp4", 1, 1) == 1.0
+
+    def test_lru_order_survives_reopen(self, tmp_path):
+        first = ProbeCache(tmp_path / "p.db", max_entries=2)
+        first.put("/c/a.mp4", 1, 1, 1.0)
+        first.put("/c/b.mp4", 1, 1, 2.0)
+        first.get("/c/a.mp4", 1, 1)
+        first.close()
+        second = ProbeCache(tmp_path / "p.db", max_entries=2)
+        second.put("/c/c.mp4", 1, 1, 3.0)
+        assert second.get("/c/a.mp4", 1, 1) == 1.0
+        assert second.get("/c/b.mp4", 1, 1) is None
+        second.close()
+
+
+    def test_put_does_not_count_table(self, cache):
+        """条目数保存在内存中，写入不做 COUNT(*) 全表扫描"""
+        statements = []
+        cache.conn.set_trace_callback(statements.append)
+        for i in range(5):
+            cache.put(f"/c/{i}.mp4", 1, 1, float(i))
+        cache.conn.set_trace_callback(None)
+        assert not any("COUNT(" in sql for sql in statements)
+        assert len(cache) == 3
+
+    def test_count_matches_table(self, tmp_path):
+        cache = ProbeCache(tmp_path / "p.db", max_entries=4)
+        cache.put_many([("/c/a.mp4", 1, 1, 1.0), ("/c/a.mp4", 2, 2, 2.0), ("/c/b.mp4", 1, 1, 1.0)])
+        cache.put_many([("/c/b.mp4", 3, 3, 3.0), ("/c/c.mp4", 1, 1, 1.0), ("/c/d.mp4", 1, 1, 1.0),
+                        ("/c/e.mp4", 1, 1, 1.0)])
+        cache.invalidate("/c/e.mp4")
+        cache.invalidate("/c/missing.mp4")
+        cache.invalidate_tree("/c/")
+        cache.put("/d/x.mp4", 1, 1, 1.0)
+        assert len(cache) == cache._count_rows() == 1
+        assert cache.get("/d/x.mp4", 1, 1) == 1.0
+        cache.close()
+        reopened = ProbeCache(tmp_path / "p.db", max_entries=4)
+        assert len(reopened) == 1
+        reopened.close()
+
+
+class TestInvalidate:
+
+    def test_invalidate_file_and_tree(self, tmp_path):
+        cache = ProbeCache(tmp_path / "p.db")
+        cache.put_many([("/lib/a/1.mp4", 1, 1, 1.0), ("/lib/a/sub/2.mp4", 1, 1, 2.0),
+                        ("/lib/ab/3.mp4", 1, 1, 3.0), ("C:\\lib\\a\\4.mp4", 1, 1, 4.0)])
+        cache.invalidate("/lib/ab/3.mp4")
+        assert cache.get("/lib/ab/3.mp4", 1, 1) is None
+        cache.put("/lib/ab/3.mp4", 1, 1, 3.0)
+        cache.invalidate_tree("/lib/a/")
+        cache.invalidate_tree("C:\\lib\\a")
+        assert cache.get_many([(p, 1, 1) for p in ("/lib/a/1.mp4", "/lib/a/sub/2.mp4", "C:\\lib\\a\\4.mp4")]) == {}
+        assert cache.get("/lib/ab/3.mp4", 1, 1) == 3.0  # 同前缀的兄弟目录不受影响
+        cache.clear()
+        assert len(cache) == 0
+        cache.close()
@@ -2,7 +2,7 @@
 
 import os
 import pytest
-from services.scanner import VideoScanner, VIDEO_EXTENSIONS
+from services.scanner import VideoScanner, VIDEO_EXTENSIONS, CancelToken, FOUND, PROBED
 
 
 class TestVideoExtensions:
@@ -105,17 +105,370 @@ class TestScanDirectory:
         assert progress_calls[-1] == (3, 3)
 
     def test_scan_permission_error_handled(self, tmp_path, mocker):
-        """PermissionError 被捕获，返回已收集的视频"""
-        # Mock os.walk 让它对第一层正常但进入子目录时抛异常
-        original_walk = __import__("os").walk
+        """无权限的子目录被跳过，返回已收集的视频"""
+        (tmp_path / "a.mp4").write_text("x")
+        (tmp_path / "locked").mkdir()
+        (tmp_path / "locked" / "b.mp4").write_text("x")
+        original_scandir = os.scandir
 
-        def mock_walk(path):
-            yield str(tmp_path), [], ["a.mp4"]
-            raise PermissionError("Access denied")
+        def mock_scandir(path):
+            if os.path.basename(path) == "locked":
+                raise PermissionError("Access denied")
+            return original_scandir(path)
 
-        mocker.patch("os.walk", side_effect=mock_walk)
+        mocker.patch("os.scandir", side_effect=mock_scandir)
         mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
 
         videos, stats = VideoScanner.scan_directory(str(tmp_path))
         # 应至少收集到 a.mp4
         assert stats["total_videos"] >= 1
+        assert [v["rel_path"] for v in videos] == ["a.mp4"]
+
+
+class TestParallelProbe:
+    """并行读取时长测试（工作进程中 TinyTag 未被 mock，假文件的时长为 0）"""
+
+    def _make(self, tmp_path, n):
+        for i in range(n):
+            sub = tmp_path / f"part{i % 3}"
+            sub.mkdir(exist_ok=True)
+            (sub / f"lesson{i:03d}.mp4").write_text("fake video content")
+
+    def test_keeps_walk_order(self, tmp_path, monkeypatch):
+        import services.scanner as scanner
+        monkeypatch.setattr(scanner, "PROBE_CHUNK_SIZE", 3)
+        self._make(tmp_path, scanner.PARALLEL_MIN_FILES + 5)
+        serial, serial_stats = VideoScanner.scan_directory(str(tmp_path), workers=1)
+        parallel, parallel_stats = VideoScanner.scan_directory(str(tmp_path), workers=2)
+        assert [v["rel_path"] for v in parallel] == [v["rel_path"] for v in serial]
+        assert parallel_stats == serial_stats
+
+    def test_progress_semantics_unchanged(self, tmp_path, monkeypatch):
+        import services.scanner as scanner
+        monkeypatch.setattr(scanner, "PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(scanner, "PROBE_CHUNK_SIZE", 4)
+        self._make(tmp_path, 10)
+        calls = []
+        VideoScanner.scan_directory(str(tmp_path), progress_callback=lambda c, t: calls.append((c, t)),
+                                    workers=2)
+        assert calls == [(i, 10) for i in range(1, 11)]
+
+    def test_small_scan_stays_serial(self, tmp_path, mocker):
+        (tmp_path / "a.mp4").write_text("x")
+        pool = mocker.patch("services.scanner.ProcessPoolExecutor")
+        mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
+        videos, stats = VideoScanner.scan_directory(str(tmp_path), workers=8)
+        assert stats["total_duration"] == 60.0
+        pool.assert_not_called()
+
+    def test_broken_pool_falls_back_to_serial(self, tmp_path, monkeypatch):
+        import services.scanner as scanner
+        from concurrent.futures.process import BrokenProcessPool
+
+        def broken(*args, **kwargs):
+            raise BrokenProcessPool("worker died")
+
+        monkeypatch.setattr(scanner, "PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(scanner, "ProcessPoolExecutor", broken)
+        monkeypatch.setattr(VideoScanner, "_read_duration", staticmethod(lambda path: 30.0))
+        self._make(tmp_path, 5)
+        calls = []
+        videos, stats = VideoScanner.scan_directory(
+            str(tmp_path), progress_callback=lambda c, t: calls.append((c, t)), workers=4)
+        assert stats["total_duration"] == 150.0
+        assert calls[-1] == (5, 5)
+
+
+class TestIterScan:
+    """iter_scan() 流式扫描测试"""
+
+    def _tree(self, tmp_path):
+        (tmp_path / "b").mkdir()
+        (tmp_path / "a").mkdir()
+        (tmp_path / "a" / "deep").mkdir()
+        for rel in ("top.mp4", "a/1.mp4", "a/deep/2.mkv", "b/3.mp4", "b/draft.mp4.part", "a/.hidden.mp4"):
+            (tmp_path / rel).write_text("x")
+
+    def test_found_batches_precede_probed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(VideoScanner, "_read_duration", staticmethod(lambda path: 10.0))
+        self._tree(tmp_path)
+        batches = list(VideoScanner.iter_scan(str(tmp_path), workers=1, batch_size=2))
+        kinds = [b.kind for b in batches]
+        assert kinds == sorted(kinds, key=lambda k: k == PROBED)
+        found = [v for b in batches if b.kind == FOUND for v in b.items]
+        assert all(len(b.items) <= 2 for b in batches if b.kind == FOUND)
+        assert all(v["duration"] == 0.0 for v in found)
+        walk_done = [b for b in batches if b.kind == FOUND][-1]
+        assert walk_done.total == walk_done.done == len(found)
+        assert all(b.total is None for b in batches if b.kind == FOUND and b is not walk_done)
+        probed = [b for b in batches if b.kind == PROBED]
+        assert sorted(i for b in probed for i, _ in b.items) == list(range(len(found)))
+        assert probed[-1].done == probed[-1].total == len(found)
+
+    def test_walk_end_reported_before_first_probe(self, tmp_path, monkeypatch):
+        """遍历结束的 FOUND 批次在读取任何时长之前产出"""
+        reads = []
+        monkeypatch.setattr(VideoScanner, "_read_duration", staticmethod(lambda path: reads.append(path) or 1.0))
+        self._tree(tmp_path)
+        for batch in VideoScanner.iter_scan(str(tmp_path), workers=1):
+            if batch.kind == FOUND and batch.total is not None:
+                assert reads == []
+                break
+        else:
+            pytest.fail("没有表示遍历结束的 FOUND 批次")
+
+    def test_order_matches_os_walk(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(VideoScanner, "_read_duration", staticmethod(lambda path: 0.0))
+        self._tree(tmp_path)
+        expected = []
+        for root, _, files in os.walk(tmp_path):
+            expected += [os.path.relpath(os.path.join(root, f), tmp_path)
+                         for f in files if f.lower().endswith(VIDEO_EXTENSIONS)]
+        found = [v["rel_path"] for b in VideoScanner.iter_scan(str(tmp_path), workers=1)
+                 if b.kind == FOUND for v in b.items]
+        assert found == expected
+
+    def test_ignore_globs(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(VideoScanner, "_read_duration", staticmethod(lambda path: 0.0))
+        self._tree(tmp_path)
+        found = [v["rel_path"] for b in VideoScanner.iter_scan(str(tmp_path), ignore=(".*", "deep"), workers=1)
+                 if b.kind == FOUND for v in b.items]
+        assert sorted(found) == sorted(["top.mp4", os.path.join("a", "1.mp4"), os.path.join("b", "3.mp4")])
+
+    def test_parallel_in_flight_is_bounded(self, tmp_path, monkeypatch):
+        import services.scanner as scanner
+        monkeypatch.setattr(scanner, "PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(scanner, "PROBE_CHUNK_SIZE", 2)
+        submitted = []
+
+        class FakeFuture:
+            def __init__(self, paths):
+                self.paths = paths
+
+            def result(self):
+                return [1.0] * len(self.paths)
+
+        class FakePool:
+            def __init__(self, max_workers, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, fn, paths):
+                submitted.append(len(submitted) - done_chunks[0])
+                return FakeFuture(paths)
+
+        done_chunks = [0]
+
+        def fake_wait(futures, timeout=None, return_when=None):
+            first = next(iter(futures))
+            done_chunks[0] += 1
+            return {first}, set(futures) - {first}
+
+        monkeypatch.setattr(scanner, "ProcessPoolExecutor", FakePool)
+        monkeypatch.setattr(scanner, "wait", fake_wait)
+        for i in range(20):
+            (tmp_path / f"{i:02d}.mp4").write_text("x")
+        batches = [b for b in VideoScanner.iter_scan(str(tmp_path), workers=2) if b.kind == PROBED]
+        assert batches[-1].done == 20
+        # 任意时刻在途的块数不超过 workers * MAX_PENDING_CHUNKS_PER_WORKER
+        assert max(submitted) < 2 * scanner.MAX_PENDING_CHUNKS_PER_WORKER
+
+    def test_closing_generator_stops_scan(self, tmp_path, mocker):
+        for i in range(5):
+            (tmp_path / f"{i}.mp4").write_text("x")
+        read = mocker.patch.object(VideoScanner, "_read_duration", return_value=1.0)
+        scan = VideoScanner.iter_scan(str(tmp_path), workers=1)
+        for batch in scan:
+            if batch.kind == PROBED:
+                break
+        scan.close()
+        assert read.call_count == 1
+
+
+class TestCancel:
+    """CancelToken 协作式取消测试"""
+
+    def _make(self, tmp_path, n):
+        for i in range(n):
+            (tmp_path / f"{i:03d}.mp4").write_text("x")
+
+    def test_cancel_before_scan(self, tmp_path, mocker):
+        self._make(tmp_path, 3)
+        read = mocker.patch.object(VideoScanner, "_read_duration", return_value=60.0)
+        token = CancelToken()
+        token.cancel()
+        videos, stats = VideoScanner.scan_directory(str(tmp_path), cancel=token)
+        assert (videos, stats["total_videos"]) == ([], 0)
+        read.assert_not_called()
+
+    def test_serial_cancel_returns_partial_result(self, tmp_path, mocker):
+        self._make(tmp_path, 5)
+        read = mocker.patch.object(VideoScanner, "_read_duration", return_value=60.0)
+        token = CancelToken()
+
+        def progress(current, total):
+            if current == 2:
+                token.cancel()
+
+        videos, stats = VideoScanner.scan_directory(str(tmp_path), progress, workers=1, cancel=token)
+        assert read.call_count == 2
+        assert stats == {"total_videos": 5, "total_duration": 120.0}
+        assert [v["duration"] for v in videos] == [60.0, 60.0, 0.0, 0.0, 0.0]
+
+    def test_cancel_during_walk_skips_probing(self, tmp_path, mocker):
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "v.mp4").write_text("x")
+        read = mocker.patch.object(VideoScanner, "_read_duration", return_value=60.0)
+        token = CancelToken()
+        batches = []
+        for batch in VideoScanner.iter_scan(str(tmp_path), batch_size=1, cancel=token):
+            batches.append(batch)
+            token.cancel()
+        assert [b.kind for b in batches] == [FOUND]
+        read.assert_not_called()
+
+    def test_parallel_cancel_stops_pool_promptly(self, tmp_path, monkeypatch):
+        import time
+        import services.scanner as scanner
+        monkeypatch.setattr(scanner, "PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(scanner, "PROBE_CHUNK_SIZE", 2)
+        self._make(tmp_path, 200)
+        token = CancelToken()
+        calls = []
+
+        def progress(current, total):
+            calls.append(current)
+            token.cancel()
+
+        started = time.monotonic()
+        videos, stats = VideoScanner.scan_directory(str(tmp_path), progress, workers=2, cancel=token)
+        assert time.monotonic() - started < 10
+        assert stats["total_videos"] == 200
+        assert 1 <= len(calls) < 200
+
+    def test_worker_chunk_stops_when_event_set(self, monkeypatch):
+        import threading
+        import services.scanner as scanner
+        event = threading.Event()
+        monkeypatch.setattr(scanner, "_worker_cancel", None)
+        scanner._init_worker(event)
+        monkeypatch.setattr(VideoScanner, "_read_duration", staticmethod(lambda path: 1.0))
+        assert scanner._probe_chunk(["a", "b"]) == [1.0, 1.0]
+        event.set()
+        assert scanner._probe_chunk(["a", "b"]) == []
+
+
+class TestProbeCache:
+    """scan_directory() 使用探测缓存"""
+
+    @pytest.fixture
+    def cache(self, tmp_path, monkeypatch):
+        from services.probe_cache import ProbeCache
+        cache = ProbeCache(tmp_path / "probe_cache.db")
+        monkeypatch.setattr(VideoScanner, "probe_cache", cache)
+        yield cache
+        cache.close()
+
+    def test_rescan_of_unchanged_tree_skips_tinytag(self, tmp_path, cache, mocker):
+        course = tmp_path / "course"
+        course.mkdir()
+        for name in ("a.mp4", "b.mp4", "c.mp4"):
+            (course / name).write_text("x")
+        get = mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
+
+        first, _ = VideoScanner.scan_directory(str(course), workers=1)
+        assert get.call_count == 3
+
+        calls = []
+        second, stats = VideoScanner.scan_directory(
+            str(course), progress_callback=lambda c, t: calls.append((c, t)), workers=1)
+        assert get.call_count == 3
+        assert second == first
+        assert stats["total_duration"] == 180.0
+        assert calls == [(1, 3), (2, 3), (3, 3)]
+
+    def test_changed_file_is_probed_again(self, tmp_path, cache, mocker):
+        course = tmp_path / "course"
+        course.mkdir()
+        (course / "a.mp4").write_text("x")
+        (course / "b.mp4").write_text("x")
+        get = mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
+        VideoScanner.scan_directory(str(course), workers=1)
+
+        (course / "b.mp4").write_text("longer content")
+        get.return_value = mocker.MagicMock(duration=90.0)
+        videos, stats = VideoScanner.scan_directory(str(course), workers=1)
+        assert get.call_count == 3
+        assert stats["total_duration"] == 150.0
+
+    def test_get_duration_populates_cache(self, tmp_path, cache, mocker):
+        path = tmp_path / "a.mp4"
+        path.write_text("x")
+        get = mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=42.0))
+        assert VideoScanner.get_duration(str(path)) == 42.0
+        assert VideoScanner.get_duration(str(path)) == 42.0
+        assert get.call_count == 1
+        cache.invalidate(str(path))
+        VideoScanner.get_duration(str(path))
+        assert get.call_count == 2
+
+
+class TestKnownFiles:
+    """重新同步：沿用课程中保存的文件键与时长，不依赖探测缓存"""
+
+    def _course(self, tmp_path):
+        course = tmp_path / "course"
+        course.mkdir()
+        for name in ("a.mp4", "b.mp4", "c.mp4"):
+            (course / name).write_text("x")
+        return course
+
+    def test_found_items_carry_file_keys(self, tmp_path, mocker):
+        course = self._course(tmp_path)
+        mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
+        videos, _ = VideoScanner.scan_directory(str(course), workers=1)
+        video = next(v for v in videos if v["rel_path"] == "a.mp4")
+        st = os.stat(course / "a.mp4")
+        assert (video["size"], video["mtime_ns"]) == (st.st_size, st.st_mtime_ns)
+
+    def test_unchanged_files_skip_tinytag_without_cache(self, tmp_path, mocker):
+        assert VideoScanner.probe_cache is None
+        course = self._course(tmp_path)
+        get = mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
+        first, _ = VideoScanner.scan_directory(str(course), workers=1)
+        known = {v["rel_path"]: (v["size"], v["mtime_ns"], v["duration"]) for v in first}
+
+        (course / "b.mp4").write_text("longer content")
+        get.return_value = mocker.MagicMock(duration=90.0)
+        calls = []
+        second, stats = VideoScanner.scan_directory(
+            str(course), progress_callback=lambda c, t: calls.append((c, t)), workers=1, known=known)
+        assert get.call_count == 4
+        assert {v["rel_path"]: v["duration"] for v in second} == {"a.mp4": 60.0, "b.mp4": 90.0, "c.mp4": 60.0}
+        assert stats["total_duration"] == 210.0
+        assert calls == [(1, 3), (2, 3), (3, 3)]
+
+    def test_resync_probes_only_changed_files(self, tmp_data_dir, frozen_clock, tmp_path, mocker):
+        """添加课程时保存文件键，重新同步时只读取变化的文件"""
+        from models.data_manager import DataManager
+        course_dir = self._course(tmp_path)
+        get = mocker.patch("tinytag.TinyTag.get", return_value=mocker.MagicMock(duration=60.0))
+        dm = DataManager()
+        videos, stats = VideoScanner.scan_directory(str(course_dir), workers=1)
+        course = dm.add_course("C", str(course_dir), videos, stats)
+        dm.close()
+
+        dm = DataManager()
+        (course_dir / "c.mp4").write_text("re-encoded")
+        (course_dir / "d.mp4").write_text("x")
+        get.return_value = mocker.MagicMock(duration=90.0)
+        videos, _ = VideoScanner.scan_directory(str(course_dir), workers=1,
+                                                known=dm.get_video_file_keys(course["id"]))
+        assert get.call_count == 5
+        assert dm.resync_course(course["id"], videos) == {"added": 1, "removed": 0, "updated": 1}
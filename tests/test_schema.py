@@ -0,0 +1,96 @@
+"""测试 app/models/schema.py — 版本迁移注册表与课程头信息校验，纯函数"""
+
+import pytest
+import models.schema as schema
+from models.schema import SCHEMA_VERSION, migrate, validate_headers, headers_checksum
+
+
+def _course(**overrides):
+    course = {
+        "id": "c1", "name": "Course", "path": "/c1", "added_at": "2026-01-01",
+        "total_videos": 1, "total_duration": 600.0, "start_date": "2026-06-01",
+        "weekly_schedule": [1.0] * 7, "daily_stats": {"2026-06-20": 60.0},
+    }
+    course.update(overrides)
+    return course
+
+
+class TestMigrate:
+    """migrate() 测试"""
+
+    def test_backfills_missing_fields(self):
+        data = {"courses": [{"id": "c1", "name": "Old", "path": "/old"}]}
+        version = migrate(data, 0, lambda c: [])
+        course = data["courses"][0]
+        assert version == SCHEMA_VERSION
+        assert course["daily_stats"] == {}
+        assert course["weekly_schedule"] == [0.0] * 7
+        assert course["start_date"] is None
+
+    def test_existing_values_kept(self):
+        data = {"courses": [_course()]}
+        migrate(data, 0, lambda c: [])
+        assert data["courses"][0] == _course()
+
+    def test_does_not_load_videos(self):
+        """视频字段在读取分片时补齐，迁移无需加载任何视频列表"""
+        calls = []
+        migrate({"courses": [_course()]}, 0, lambda c: calls.append(c) or [])
+        assert calls == []
+
+    def test_current_version_runs_nothing(self):
+        calls = []
+        data = {"courses": [_course(videos=[])]}
+        assert migrate(data, SCHEMA_VERSION, lambda c: calls.append(c) or []) == SCHEMA_VERSION
+        assert calls == []
+
+    def test_steps_run_in_order(self, monkeypatch):
+        order = []
+        monkeypatch.setattr(schema, "MIGRATIONS", {
+            3: lambda d, lv: order.append(3),
+            2: lambda d, lv: order.append(2),
+            1: lambda d, lv: order.append(1),
+        })
+        assert migrate({"courses": []}, 1, None) == 3
+        assert order == [2, 3]
+
+
+class TestValidateHeaders:
+    """validate_headers() 测试"""
+
+    def test_valid_headers_unchanged(self):
+        data = {"courses": [_course()]}
+        assert validate_headers(data) is False
+        assert data["courses"][0] == _course()
+
+    @pytest.mark.parametrize("field, bad, fixed", [
+        ("weekly_schedule", "abc", [0.0] * 7),
+        ("weekly_schedule", [1, 2], [1, 2, 0.0, 0.0, 0.0, 0.0, 0.0]),
+        ("weekly_schedule", [1, "x", 1, 1, 1, 1, 1], [1, 0.0, 1, 1, 1, 1, 1]),
+        ("start_date", "not a date", None),
+        ("start_date", 20260601, None),
+        ("daily_stats", [], {}),
+        ("daily_stats", {"2026-06-20": "1h", "2026-06-21": 30}, {"2026-06-21": 30}),
+        ("total_duration", None, 0),
+        ("total_videos", -3, 0),
+        ("name", 42, "42"),
+    ])
+    def test_repairs_invalid_field(self, field, bad, fixed):
+        data = {"courses": [_course(**{field: bad})]}
+        assert validate_headers(data) is True
+        assert data["courses"][0][field] == fixed
+
+    def test_drops_course_without_id(self):
+        data = {"courses": [_course(), {"name": "no id"}, "garbage"]}
+        assert validate_headers(data) is True
+        assert [c["id"] for c in data["courses"]] == ["c1"]
+
+
+class TestChecksum:
+    """headers_checksum() 测试"""
+
+    def test_stable(self):
+        assert headers_checksum([_course()]) == headers_checksum([_course()])
+
+    def test_detects_edit(self):
+        assert headers_checksum([_course()]) != headers_checksum([_course(name="Edited")])
@@ -0,0 +1,138 @@
+"""测试 app/utils/serialization.py — 编解码器与格式识别"""
+
+import json
+
+import pytest
+import utils.serialization as serialization
+from utils.serialization import (
+    FORMAT_JSON, FORMAT_JSON_COMPACT, FORMAT_MSGPACK, MSGPACK_HEADER,
+    CodecUnavailableError, encode, decode, detect_format, format_for_path, suffix_for_format,
+    available_formats,
+)
+from utils.atomic_write import atomic_write_json, safe_read_json
+
+SAMPLE = {
+    "daily_stats": {"2026-06-20": 1800.5},
+    "videos": [{"rel_path": "第1章/01.mp4", "duration": 600.0, "watched_duration": 0,
+                "completed": False, "last_watched": None}],
+}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def json_backend(request, monkeypatch):
+    """分别在有/无 orjson 的情况下运行"""
+    if request.param and not serialization.ORJSON_AVAILABLE:
+        pytest.skip("orjson 未安装")
+    if not request.param:
+        monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+    return request.param
+
+
+class TestEncodeDecode:
+    """往返测试"""
+
+    @pytest.mark.parametrize("fmt", [FORMAT_JSON, FORMAT_JSON_COMPACT])
+    def test_json_roundtrip(self, fmt, json_backend):
+        assert decode(encode(SAMPLE, fmt)) == SAMPLE
+
+    def test_pretty_json_matches_legacy_format(self):
+        assert encode(SAMPLE, FORMAT_JSON) == json.dumps(SAMPLE, indent=4, ensure_ascii=False).encode("utf-8")
+
+    def test_compact_is_smaller(self, json_backend):
+        assert len(encode(SAMPLE, FORMAT_JSON_COMPACT)) < len(encode(SAMPLE, FORMAT_JSON))
+
+    def test_compact_keeps_unicode_readable(self, json_backend):
+        assert "第1章".encode("utf-8") in encode(SAMPLE, FORMAT_JSON_COMPACT)
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            encode(SAMPLE, "yaml")
+
+    def test_decode_nan_written_by_stdlib(self, json_backend):
+        assert decode(b'{"d": NaN}')["d"] != 0
+
+    def test_decode_invalid_json_raises(self, json_backend):
+        with pytest.raises(json.JSONDecodeError):
+            decode(b'{"broken":')
+
+
+class TestMsgpack:
+    """msgpack 格式（未安装时回退为紧凑 JSON）"""
+
+    def test_roundtrip(self):
+        pytest.importorskip("msgpack")
+        raw = encode(SAMPLE, FORMAT_MSGPACK)
+        assert raw.startswith(MSGPACK_HEADER)
+        assert detect_format(raw) == FORMAT_MSGPACK
+        assert decode(raw) == SAMPLE
+
+    def test_fallback_without_msgpack(self, monkeypatch):
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", False)
+        raw = encode(SAMPLE, FORMAT_MSGPACK)
+        assert detect_format(raw) == FORMAT_JSON
+        assert decode(raw) == SAMPLE
+        assert FORMAT_MSGPACK not in available_formats()
+
+    def test_header_without_msgpack_raises(self, monkeypatch):
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", False)
+        with pytest.raises(CodecUnavailableError):
+            decode(MSGPACK_HEADER + b"\x80")
+
+
+class TestDetection:
+    """格式识别与文件读写"""
+
+    def test_detect_json(self):
+        assert detect_format(b'{"a": 1}') == FORMAT_JSON
+        assert detect_format(b"  [1]") == FORMAT_JSON
+
+    def test_format_for_path(self, tmp_path):
+        assert format_for_path(tmp_path / "a.json") == FORMAT_JSON
+        assert format_for_path(tmp_path / "a.msgpack") == FORMAT_MSGPACK
+        assert format_for_path(tmp_path / "a.bin", FORMAT_JSON_COMPACT) == FORMAT_JSON_COMPACT
+
+    def test_suffix_for_format(self, monkeypatch):
+        assert suffix_for_format(FORMAT_JSON) == ".json"
+        assert suffix_for_format(FORMAT_JSON_COMPACT) == ".json"
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", True)
+        assert suffix_for_format(FORMAT_MSGPACK) == ".msgpack"
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", False)
+        assert suffix_for_format(FORMAT_MSGPACK) == ".json"  # 回退为紧凑 JSON
+
+    def test_atomic_write_default_is_pretty(self, tmp_path):
+        path = tmp_path / "a.json"
+        atomic_write_json(path, {"k": 1})
+        assert path.read_text(encoding="utf-8") == '{\n    "k": 1\n}'
+
+    def test_atomic_write_compact_reads_back(self, tmp_path):
+        path = tmp_path / "a.json"
+        atomic_write_json(path, SAMPLE, fmt=FORMAT_JSON_COMPACT)
+        assert b"\n" not in path.read_bytes()
+        assert safe_read_json(path) == SAMPLE
+
+    def test_existing_pretty_file_still_loads(self, tmp_path):
+        path = tmp_path / "legacy.json"
+        path.write_text(json.dumps(SAMPLE, indent=4, ensure_ascii=False), encoding="utf-8")
+        assert safe_read_json(path) == SAMPLE
+
+    def test_corrupt_binary_is_backed_up(self, tmp_path, monkeypatch):
+        def unpackb(*args, **kwargs):
+            raise ValueError("bad msgpack")
+
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", True)
+        monkeypatch.setattr(serialization, "msgpack", type("FakeMsgpack", (), {"unpackb": staticmethod(unpackb)}))
+        path = tmp_path / "a.msgpack"
+        path.write_bytes(MSGPACK_HEADER + b"\xc1")
+        assert safe_read_json(path, default={"d": 1}) == {"d": 1}
+        assert (tmp_path / "a.msgpack.bak").exists()
+
+    def test_missing_codec_is_not_corruption(self, tmp_path, monkeypatch):
+        """未安装 msgpack 时读取 msgpack 文件：抛出异常，文件保持原样、不生成备份"""
+        monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", False)
+        path = tmp_path / "a.msgpack"
+        raw = MSGPACK_HEADER + b"\x81\xa1k\x01"
+        path.write_bytes(raw)
+        with pytest.raises(CodecUnavailableError):
+            safe_read_json(path, default={"d": 1})
+        assert path.read_bytes() == raw
+        assert not (tmp_path / "a.msgpack.bak").exists()
@@ -0,0 +1,146 @@
+"""测试 app/models/sqlite_store.py — SQLite 后端与 JSON 导入，使用 tmp_path"""
+
+import json
+
+import pytest
+from models.sqlite_store import SqliteStore
+
+
+def _course(course_id="c1", n_videos=2):
+    return {
+        "id": course_id,
+        "name": "课程",
+        "path": f"/courses/{course_id}",
+        "added_at": "2026-06-01T10:00:00",
+        "total_videos": n_videos,
+        "total_duration": 600.0 * n_videos,
+        "start_date": "2026-06-01",
+        "weekly_schedule": [1.0, 0.0, 0.0, 0.0, 0.0, 2.0, 0.0],
+        "daily_stats": {"2026-06-19": 300.0},
+        "videos": [
+            {"rel_path": f"{i:02d}.mp4", "duration": 600.0, "watched_duration": 0.0,
+             "completed": False, "last_watched": None}
+            for i in range(n_videos)
+        ],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SqliteStore(tmp_path / "courses.db")
+    yield s
+    s.close()
+
+
+class TestSchema:
+    """建库测试"""
+
+    def test_wal_mode(self, store):
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_tables_created(self, store):
+        tables = {r[0] for r in store.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert {"courses", "videos", "daily_stats", "activity_log", "settings"} <= tables
+
+    def test_empty_load(self, store):
+        assert store.load() == {"courses": []}
+
+
+class TestRoundtrip:
+    """save()/load() 往返测试"""
+
+    def test_save_and_load(self, store):
+        data = {
+            "courses": [_course("c1"), _course("c2", 1)],
+            "activity_log": {"2026-06-19": 2},
+            "settings": {"theme": "light"},
+        }
+        store.save(data)
+        assert store.load() == data
+
+    def test_file_keys_round_trip(self, store):
+        course = _course()
+        course["videos"][0].update(size=2048, mtime_ns=1_750_000_000_000_000_000)
+        store.add_course(course)
+        videos = store.load()["courses"][0]["videos"]
+        assert videos.file_key(0) == (2048, 1_750_000_000_000_000_000)
+        assert videos.file_key(1) is None
+
+    def test_early_database_gains_file_key_columns(self, tmp_path):
+        import sqlite3
+        db = tmp_path / "old.db"
+        conn = sqlite3.connect(str(db))
+        conn.execute("CREATE TABLE videos (course_id TEXT NOT NULL, position INTEGER NOT NULL, "
+                     "rel_path TEXT NOT NULL, duration REAL NOT NULL DEFAULT 0, "
+                     "watched_duration REAL NOT NULL DEFAULT 0, completed INTEGER NOT NULL DEFAULT 0, "
+                     "last_watched TEXT, PRIMARY KEY (course_id, rel_path))")
+        conn.commit()
+        conn.close()
+
+        store = SqliteStore(db)
+        columns = {row[1] for row in store.conn.execute("PRAGMA table_info(videos)")}
+        assert {"size", "mtime_ns"} <= columns
+        store.add_course(_course())
+        assert store.load()["courses"][0]["videos"].file_key(0) is None
+        store.close()
+
+    def test_add_course_keeps_order(self, store):
+        store.add_course(_course("b"))
+        store.add_course(_course("a"))
+        assert [c["id"] for c in store.load()["courses"]] == ["b", "a"]
+
+    def test_delete_course_cascades(self, store):
+        store.add_course(_course("c1"))
+        store.delete_course("c1")
+        assert store.conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 0
+        assert store.conn.execute("SELECT COUNT(*) FROM daily_stats").fetchone()[0] == 0
+
+    def test_update_course(self, store):
+        course = _course()
+        store.add_course(course)
+        course["name"] = "新名称"
+        course["weekly_schedule"] = [2.0] * 7
+        store.update_course(course)
+        loaded = store.load()["courses"][0]
+        assert loaded["name"] == "新名称"
+        assert loaded["weekly_schedule"] == [2.0] * 7
+
+
+class TestProgress:
+    """进度与活动写入测试"""
+
+    def test_update_progress_single_row(self, store):
+        course = _course()
+        store.add_course(course)
+        video = course["videos"][1]
+        video.update(watched_duration=600.0, completed=True, last_watched="2026-06-20T12:00:00")
+        course["daily_stats"]["2026-06-20"] = 600.0
+        store.update_progress(course, video, "2026-06-20")
+
+        loaded = store.load()["courses"][0]
+        assert loaded["videos"][0]["watched_duration"] == 0.0
+        assert loaded["videos"][1]["completed"] is True
+        assert loaded["daily_stats"]["2026-06-20"] == 600.0
+
+    def test_log_activity_upsert(self, store):
+        store.log_activity("2026-06-20", 1)
+        store.log_activity("2026-06-20", 2)
+        assert store.load()["activity_log"] == {"2026-06-20": 2}
+
+
+class TestImportJson:
+    """import_json() 测试"""
+
+    def test_import(self, tmp_path):
+        data = {"courses": [_course()], "activity_log": {"2026-06-19": 1}}
+        json_file = tmp_path / "courses.json"
+        json_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+        store = SqliteStore.import_json(json_file, tmp_path / "courses.db")
+        assert store.load() == data
+        store.close()
+
+    def test_import_missing_file(self, tmp_path):
+        store = SqliteStore.import_json(tmp_path / "missing.json", tmp_path / "courses.db")
+        assert store.load() == {"courses": []}
+        store.close()
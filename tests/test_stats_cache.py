@@ -0,0 +1,30 @@
+"""测试 app/models/stats_cache.py — 版本键缓存与命中计数，纯内存"""
+
+from models.stats_cache import StatsCache
+
+
+class TestStatsCache:
+    """StatsCache 测试"""
+
+    def test_hit_with_same_key(self):
+        cache = StatsCache()
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        assert cache.get("stats", "c1", (0,), compute) == 1
+        assert cache.get("stats", "c1", (0,), compute) == 1
+        assert cache.info == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_new_key_recomputes(self):
+        cache = StatsCache()
+        assert cache.get("stats", "c1", (0,), lambda: "old") == "old"
+        assert cache.get("stats", "c1", (1,), lambda: "new") == "new"
+        assert cache.misses == 2
+
+    def test_names_and_courses_are_separate(self):
+        cache = StatsCache()
+        cache.get("stats", "c1", (0,), lambda: 1)
+        cache.get("card", "c1", (0,), lambda: 2)
+        cache.get("stats", "c2", (0,), lambda: 3)
+        assert cache.get("card", "c1", (0,), lambda: None) == 2
+        cache.discard("c1")
+        assert cache.info["entries"] == 1
@@ -0,0 +1,63 @@
+"""测试 app/models/streak.py — 连续学习天数状态机，纯函数"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from models.streak import StreakTracker
+
+
+def _loop_streak(log, today):
+    """原 DataManager._calculate_streak 的逐日回溯"""
+    check = today if today.isoformat() in log else today - timedelta(days=1)
+    streak = 0
+    while log.get(check.isoformat(), 0) > 0:
+        streak += 1
+        check -= timedelta(days=1)
+    return streak
+
+
+class TestStreakTracker:
+    """StreakTracker 测试"""
+
+    def test_empty(self):
+        tracker = StreakTracker.from_log({})
+        assert tracker.current(date(2026, 6, 20)) == 0
+        assert tracker.longest == 0
+
+    def test_yesterday_keeps_streak_alive(self):
+        tracker = StreakTracker.from_log({"2026-06-18": 1, "2026-06-19": 1})
+        assert tracker.current(date(2026, 6, 19)) == 2
+        assert tracker.current(date(2026, 6, 20)) == 2
+        assert tracker.current(date(2026, 6, 21)) == 0  # 跨过一整天未学习
+
+    def test_record_same_day_and_gap(self):
+        tracker = StreakTracker()
+        assert tracker.record(date(2026, 6, 1))
+        assert tracker.record(date(2026, 6, 1))
+        assert tracker.record(date(2026, 6, 2))
+        assert tracker.record(date(2026, 6, 5))
+        assert tracker.current(date(2026, 6, 5)) == 1
+        assert tracker.longest == 2
+
+    def test_earlier_day_needs_rebuild(self):
+        tracker = StreakTracker.from_log({"2026-06-20": 1})
+        assert tracker.record(date(2026, 6, 19)) is False
+
+    def test_zero_counts_and_bad_keys_ignored(self):
+        tracker = StreakTracker.from_log({"2026-06-19": 0, "2026-06-20": 1, "昨天": 5})
+        assert tracker.current(date(2026, 6, 20)) == 1
+
+    @pytest.mark.parametrize("seed", range(30))
+    def test_matches_daily_walk(self, seed):
+        rng = random.Random(seed)
+        base = date(2026, 5, 1)
+        log = {(base + timedelta(days=d)).isoformat(): 1 for d in range(60) if rng.random() < 0.7}
+        tracker = StreakTracker.from_log(log)
+        for offset in range(59, 63):  # 今天不早于最后一条记录
+            today = base + timedelta(days=offset)
+            assert tracker.current(today) == _loop_streak(log, today)
+
+    def test_longest_is_max_run(self):
+        log = {f"2026-06-{d:02d}": 1 for d in (1, 2, 3, 4, 10, 11, 20)}
+        assert StreakTracker.from_log(log).longest == 4
@@ -0,0 +1,41 @@
+"""测试 app/models/time_buckets.py — 日 / ISO 周 / 月分桶，纯函数"""
+
+from datetime import date
+
+import pytest
+from models.time_buckets import bucket_start, next_bucket, buckets
+
+
+class TestBucketStart:
+
+    def test_week_starts_on_monday(self):
+        assert bucket_start(date(2026, 6, 20), "week") == date(2026, 6, 15)  # 周六
+        assert bucket_start(date(2026, 6, 15), "week") == date(2026, 6, 15)
+
+    def test_month(self):
+        assert bucket_start(date(2026, 6, 20), "month") == date(2026, 6, 1)
+        assert next_bucket(date(2026, 12, 1), "month") == date(2027, 1, 1)
+
+    def test_unknown_granularity(self):
+        with pytest.raises(ValueError):
+            buckets(date(2026, 6, 1), date(2026, 6, 2), "year")
+
+
+class TestBuckets:
+
+    def test_partial_edges_are_clipped(self):
+        result = buckets(date(2026, 6, 17), date(2026, 6, 24), "week")
+        assert result == [
+            (date(2026, 6, 15), date(2026, 6, 21), date(2026, 6, 17), date(2026, 6, 21)),
+            (date(2026, 6, 22), date(2026, 6, 28), date(2026, 6, 22), date(2026, 6, 24)),
+        ]
+
+    def test_months_cover_range_without_gaps(self):
+        result = buckets(date(2025, 11, 15), date(2026, 2, 3), "month")
+        assert [b[0] for b in result] == [date(2025, 11, 1), date(2025, 12, 1),
+                                          date(2026, 1, 1), date(2026, 2, 1)]
+        assert result[1][1] == date(2025, 12, 31)
+        assert result[-1][3] == date(2026, 2, 3)
+
+    def test_empty_range(self):
+        assert buckets(date(2026, 6, 2), date(2026, 6, 1), "day") == []
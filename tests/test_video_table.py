@@ -0,0 +1,114 @@
+"""测试 app/models/video_table.py — 列式视频进度表与只读视图，纯内存"""
+
+import math
+import sys
+from datetime import datetime
+
+import pytest
+from models.course_stats import VideoSummary
+from models.video_table import VideoTable, to_epoch, from_epoch
+
+
+def _videos(n=3):
+    return [{"rel_path": f"{i:02d}.mp4", "duration": 600.0, "watched_duration": 0.0,
+             "completed": False, "last_watched": None} for i in range(n)]
+
+
+class TestConversion:
+    """from_dicts() / to_dicts() 测试"""
+
+    def test_round_trip(self):
+        videos = _videos()
+        videos[1].update(watched_duration=300.0, completed=True, last_watched="2026-06-20T12:00:00")
+        assert VideoTable.from_dicts(videos).to_dicts() == videos
+
+    def test_missing_fields_get_defaults(self):
+        table = VideoTable.from_dicts([{"rel_path": "v.mp4", "duration": 100}])
+        assert dict(table[0]) == {"rel_path": "v.mp4", "duration": 100.0, "watched_duration": 0.0,
+                                  "completed": False, "last_watched": None}
+
+    def test_equals_dict_list(self):
+        assert VideoTable.from_dicts(_videos()) == _videos()
+        assert VideoTable.from_dicts(_videos()) != _videos(2)
+
+    def test_file_key_round_trip(self):
+        videos = _videos(2)
+        videos[0].update(size=1024, mtime_ns=1_750_000_000_000_000_000)
+        table = VideoTable.from_dicts(videos)
+        assert table.file_key(0) == (1024, 1_750_000_000_000_000_000)
+        assert table.file_key(1) is None
+        assert table.to_dicts() == videos
+        assert "size" not in dict(table[0])  # 视图的键保持不变
+
+    def test_rel_paths_interned(self):
+        rel = "".join(["章节/", "01.mp4"])
+        table = VideoTable.from_dicts([{"rel_path": rel, "duration": 1}])
+        assert table.rel_paths[0] is sys.intern("章节/01.mp4")
+
+
+class TestEpoch:
+    """last_watched 与 Unix 秒的转换测试"""
+
+    def test_iso_round_trip_at_second_precision(self):
+        assert from_epoch(to_epoch("2026-06-20T12:00:00.750000")) == "2026-06-20T12:00:00"
+
+    @pytest.mark.parametrize("value", [None, "not a date", 42j, math.inf])
+    def test_invalid_is_never(self, value):
+        assert math.isnan(to_epoch(value))
+        assert from_epoch(to_epoch(value)) is None
+
+    def test_number_passes_through(self):
+        ts = datetime(2026, 6, 20, 12).timestamp()
+        assert to_epoch(ts + 0.4) == ts
+
+
+class TestViewAndProgress:
+    """VideoView 与 set_progress() 测试"""
+
+    def test_view_is_read_only(self):
+        view = VideoTable.from_dicts(_videos())[0]
+        with pytest.raises(TypeError):
+            view["watched_duration"] = 1.0
+
+    def test_view_reflects_updates(self):
+        table = VideoTable.from_dicts(_videos())
+        view = table[2]
+        table.set_progress(2, 120.0, True, datetime(2026, 6, 20, 12).timestamp())
+        assert view["watched_duration"] == 120.0
+        assert view.get("completed") is True
+        assert view["last_watched"] == "2026-06-20T12:00:00"
+
+    def test_completion_bits_are_independent(self):
+        table = VideoTable.from_dicts(_videos(20))
+        for i in (0, 7, 8, 19):
+            table.set_progress(i, 600.0, True, None)
+        table.set_progress(7, 600.0, False, None)
+        assert [i for i in range(20) if table.is_completed(i)] == [0, 8, 19]
+        assert table.completed_count() == 3
+
+    def test_index_of_tracks_appends(self):
+        table = VideoTable.from_dicts(_videos())
+        assert table.index_of("01.mp4") == 1
+        table.append("new.mp4", 60.0)
+        assert table.index_of("new.mp4") == 3
+        assert table.index_of("missing.mp4") is None
+
+    def test_negative_index_and_bounds(self):
+        table = VideoTable.from_dicts(_videos())
+        assert table[-1]["rel_path"] == "02.mp4"
+        with pytest.raises(IndexError):
+            table[3]
+
+
+class TestSummary:
+    """summary() 与 VideoSummary.from_videos() 一致性测试"""
+
+    def test_matches_dict_summary(self):
+        videos = _videos(10)
+        videos[0].update(watched_duration=600.0, completed=True)
+        videos[3].update(watched_duration=250.0)
+        videos[5].update(watched_duration=700.0)
+        assert VideoTable.from_dicts(videos).summary() == VideoSummary.from_videos(videos)
+
+    def test_empty(self):
+        assert VideoTable().summary() == VideoSummary()